@@ -1,14 +1,39 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import Optional, Tuple
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import Optional
 import time
 import logging
-import re
+import json
+from contextlib import AsyncExitStack
 
-from app.schemas.email import EmailRequest, ClassificationResponse, FileUploadRequest
-from app.services.nlp import preprocess_text
-from app.services.ai import classify_email, generate_response
+from app.schemas.email import (
+    EmailRequest,
+    ClassificationResponse,
+    FileUploadRequest,
+    BatchEmailRequest,
+    BatchItemResult,
+    BatchClassificationResponse,
+    JobRequest,
+    JobCreatedResponse,
+    JobStatusResponse,
+)
+from app.services.pipeline import (
+    process_email,
+    process_batch,
+    process_email_stream,
+    process_mbox,
+    extract_subject_and_sender,
+)
+from app.services.cache import result_cache
+from app.services.near_duplicate import near_duplicate_index
+from app.services import jobs
 from app.services.text_extractor import extract_text_from_file
+from app.services.uploads import cpu_source, spooled_upload, UploadTooLargeError
 from app.core.config import settings
+from app.core.executor import run_blocking, run_cpu, run_cpu_thread, executor_stats
+from app.core.metrics import stage_timer
+from app.core.logging_config import log_payload
+from app.services.prompts import templates_info
 
 logger = logging.getLogger(__name__)
 
@@ -19,18 +44,14 @@ router = APIRouter(
 )
 
 
-def extract_subject_and_sender(text: str) -> Tuple[str, Optional[str]]:
-    """Extrai subject e sender do texto com IA"""
-    sender = None
-    
-    email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-    email_match = re.search(email_pattern, text)
-    if email_match:
-        sender = email_match.group(0)
-    
-    subject = ""
-    
-    return subject, sender
+def _build_response(
+    result: dict,
+    sender: Optional[str],
+    subject: str,
+    processing_time: float
+) -> ClassificationResponse:
+    """Monta a resposta da API a partir do resultado do pipeline"""
+    return ClassificationResponse.from_result(result, sender, subject, processing_time)
 
 
 @router.post("/classify", response_model=ClassificationResponse)
@@ -48,38 +69,31 @@ async def classify_email_endpoint(email: EmailRequest):
     try:
         full_text = f"{email.subject or ''} {email.message}"
         
-        logger.info(f"[CLASSIFY_ENDPOINT] Email recebido de: {email.sender or 'desconhecido'}")
-        logger.info(f"[CLASSIFY_ENDPOINT] Assunto: {email.subject or 'vazio'}")
-        logger.info(f"[CLASSIFY_ENDPOINT] Tamanho da mensagem: {len(email.message)} caracteres")
-        logger.info(f"[CLASSIFY_ENDPOINT] Primeiros 200 chars da mensagem: {email.message[:200]}")
-        logger.info(f"[CLASSIFY_ENDPOINT] Full text para processar (tamanho): {len(full_text)} caracteres")
-        
-        processed_text = preprocess_text(full_text)
-        
-        logger.info(f"[CLASSIFY_ENDPOINT] Texto após preprocess (tamanho): {len(processed_text)} caracteres")
-        logger.info(f"[CLASSIFY_ENDPOINT] Primeiros 200 chars após preprocess: {processed_text[:200]}")
+        logger.info(
+            "[CLASSIFY_ENDPOINT] Email recebido (mensagem: %d caracteres, texto completo: %d caracteres)",
+            len(email.message), len(full_text)
+        )
+        log_payload("[CLASSIFY_ENDPOINT] Remetente: %s | Assunto: %s", email.sender or 'desconhecido', email.subject or 'vazio')
+        log_payload("[CLASSIFY_ENDPOINT] Primeiros 200 chars da mensagem: %.200s", email.message)
         
-        classification_result = classify_email(processed_text)
+        result = await process_email(
+            text=full_text,
+            sender=email.sender,
+            subject=email.subject or "",
+            message=email.message,
+            use_cache=email.use_cache
+        )
         
-        if not classification_result.get("success"):
+        if not result.get("success"):
             raise HTTPException(
                 status_code=500,
                 detail="Erro ao classificar email"
             )    
-                 
-        suggested_response = generate_response(
-            sender=email.sender,
-            subject=email.subject or "",
-            message=email.message,
-            classification=classification_result["classification"]
-        )
         
         processing_time = time.time() - start_time
         
-        return ClassificationResponse(
-            classification=classification_result["classification"],
-            confidence=classification_result["confidence"],
-            suggested_response=suggested_response,
+        return _build_response(
+            result,
             sender=email.sender or None,
             subject=email.subject or "",
             processing_time=round(processing_time, 3)
@@ -88,7 +102,7 @@ async def classify_email_endpoint(email: EmailRequest):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Erro no endpoint de classificação: {e}")
+        logger.error("Erro no endpoint de classificação: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Erro interno ao processar email"
@@ -96,11 +110,12 @@ async def classify_email_endpoint(email: EmailRequest):
 
         
 @router.post("/classify-file", response_model=ClassificationResponse)
-async def classify_email_from_file(file: UploadFile = File(...)):
+async def classify_email_from_file(file: UploadFile = File(...), use_cache: bool = True):
     """
-    Classifica email a partir de arquivo (PDF ou TXT).
+    Classifica email a partir de arquivo (PDF, TXT ou EML).
     
-    - **file**: Arquivo PDF ou TXT com o email
+    - **file**: Arquivo PDF, TXT ou EML (RFC 5322) com o email
+    - **use_cache**: Se false, ignora o cache de resultados
     """
     
     start_time = time.time()
@@ -112,49 +127,49 @@ async def classify_email_from_file(file: UploadFile = File(...)):
                 detail=f"Tipo de arquivo não permitido. Aceita: {settings.ALLOWED_EXTENSIONS}"
             )
         
-        content = await file.read()
-        if len(content) > settings.MAX_FILE_SIZE:
+        try:
+            async with spooled_upload(file) as source:
+                with stage_timer("text_extraction"):
+                    cpu_file = cpu_source(source)
+                    if cpu_file is None:
+                        text = await run_cpu_thread(extract_text_from_file, source, file.filename)
+                    else:
+                        text = await run_cpu(extract_text_from_file, cpu_file, file.filename)
+        except UploadTooLargeError:
             raise HTTPException(
                 status_code=413,
                 detail=f"Arquivo muito grande. Máximo: {settings.MAX_FILE_SIZE / 1024 / 1024}MB"
             )
         
-        text = extract_text_from_file(content, file.filename)
-        
         if not text or text.strip() == "":
-            logger.error(f"Arquivo vazio ou sem texto: {file.filename}")
+            logger.error("Arquivo vazio ou sem texto: %s", file.filename)
             raise HTTPException(
                 status_code=400,
                 detail="Não foi possível extrair texto do arquivo. O arquivo pode estar corrompido ou vazio."
             )
         
-        logger.info(f"Processando arquivo: {file.filename}")
+        logger.info("Processando arquivo: %s", file.filename)
         
-        subject, sender = extract_subject_and_sender(text)
+        subject, sender = await run_cpu_thread(extract_subject_and_sender, text)
         
-        processed_text = preprocess_text(text)
-        
-        classification_result = classify_email(processed_text)
+        result = await process_email(
+            text=text,
+            sender=sender,
+            subject=subject,
+            message=text,
+            use_cache=use_cache
+        )
         
-        if not classification_result.get("success"):
+        if not result.get("success"):
             raise HTTPException(
                 status_code=500,
                 detail="Erro ao classificar email"
             )
         
-        suggested_response = generate_response(
-            sender=sender,
-            subject=subject,
-            message=text,
-            classification=classification_result["classification"]
-        )
-        
         processing_time = time.time() - start_time
         
-        return ClassificationResponse(
-            classification=classification_result["classification"],
-            confidence=classification_result["confidence"],
-            suggested_response=suggested_response,
+        return _build_response(
+            result,
             sender=sender,
             subject=subject,
             processing_time=round(processing_time, 3)
@@ -163,18 +178,326 @@ async def classify_email_from_file(file: UploadFile = File(...)):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Erro ao processar arquivo: {e}")
+        logger.error("Erro ao processar arquivo: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao processar: {str(e)}"
         )     
 
         
+def _sse_event(event: str, data: dict) -> str:
+    """Formata um evento Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/classify-stream")
+async def classify_email_stream_endpoint(email: EmailRequest):
+    """
+    Classifica email e envia a resposta sugerida via Server-Sent Events.
+    
+    Eventos enviados, nesta ordem:
+    - **classification**: classificação e confiança, assim que conhecidas
+    - **token**: trechos da resposta sugerida, à medida que são gerados
+    - **done**: resposta completa, tempos por etapa e tempo total
+    - **error**: em caso de falha (encerra o stream)
+    """
+    
+    start_time = time.time()
+    
+    logger.info("[CLASSIFY_STREAM] Email recebido (%d caracteres)", len(email.message))
+    log_payload("[CLASSIFY_STREAM] Remetente: %s", email.sender or 'desconhecido')
+    
+    async def event_stream():
+        try:
+            async for event, data in process_email_stream(
+                text=f"{email.subject or ''} {email.message}",
+                sender=email.sender,
+                subject=email.subject or "",
+                message=email.message,
+                use_cache=email.use_cache
+            ):
+                if event == "done":
+                    data = _build_response(
+                        data,
+                        sender=email.sender or None,
+                        subject=email.subject or "",
+                        processing_time=round(time.time() - start_time, 3)
+                    ).model_dump()
+                yield _sse_event(event, data)
+        except Exception as e:
+            logger.error("Erro no endpoint de classificação em streaming: %s", e)
+            yield _sse_event("error", {"detail": "Erro interno ao processar email"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+
+@router.post("/classify-batch", response_model=BatchClassificationResponse)
+async def classify_batch_endpoint(batch: BatchEmailRequest):
+    """
+    Classifica vários emails em uma única requisição.
+    
+    - **items**: Lista de emails (mesmo formato de `/classify`)
+    - **use_cache**: Se false, ignora o cache para todo o lote
+    
+    Cada item retorna seu próprio resultado ou erro.
+    """
+    
+    start_time = time.time()
+    
+    if not batch.items:
+        raise HTTPException(
+            status_code=400,
+            detail="O lote não contém emails"
+        )
+    
+    if len(batch.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lote muito grande. Máximo: {settings.BATCH_MAX_ITEMS} emails"
+        )
+    
+    logger.info("[CLASSIFY_BATCH] Lote recebido com %d emails", len(batch.items))
+    
+    results = await process_batch(
+        [
+            {
+                "text": f"{item.subject or ''} {item.message}",
+                "sender": item.sender,
+                "subject": item.subject or "",
+                "message": item.message,
+                "use_cache": item.use_cache,
+            }
+            for item in batch.items
+        ],
+        use_cache=batch.use_cache
+    )
+    
+    item_results = []
+    for index, (item, result) in enumerate(zip(batch.items, results)):
+        if not result.get("success"):
+            item_results.append(BatchItemResult(
+                index=index,
+                success=False,
+                error=result.get("error", "Erro ao classificar email")
+            ))
+            continue
+        
+        item_results.append(BatchItemResult(
+            index=index,
+            success=True,
+            result=_build_response(
+                result,
+                sender=item.sender or None,
+                subject=item.subject or "",
+                processing_time=round(sum(result["stage_timings"].values()), 3)
+            )
+        ))
+    
+    succeeded = sum(1 for item_result in item_results if item_result.success)
+    
+    return BatchClassificationResponse(
+        results=item_results,
+        total=len(item_results),
+        succeeded=succeeded,
+        failed=len(item_results) - succeeded,
+        processing_time=round(time.time() - start_time, 3)
+    )
+
+
+@router.post("/classify-mbox")
+async def classify_mbox_endpoint(file: UploadFile = File(...), use_cache: bool = True):
+    """
+    Classifica todas as mensagens de uma caixa .mbox.
+    
+    A resposta é NDJSON: uma linha por mensagem, na ordem do arquivo, no
+    mesmo formato dos itens de `/classify-batch` (`index`, `success`,
+    `result`, `error`). As linhas são enviadas à medida que os blocos de
+    mensagens são classificados; a caixa é lida em streaming, com memória
+    constante.
+    
+    - **file**: Arquivo .mbox (até `MBOX_MAX_FILE_SIZE`)
+    - **use_cache**: Se false, ignora o cache de resultados
+    """
+    
+    if not file.filename.endswith(".mbox"):
+        raise HTTPException(status_code=400, detail="Tipo de arquivo não permitido. Aceita: .mbox")
+    
+    stack = AsyncExitStack()
+    try:
+        source = await stack.enter_async_context(spooled_upload(file, settings.MBOX_MAX_FILE_SIZE))
+    except UploadTooLargeError:
+        await stack.aclose()
+        raise HTTPException(
+            status_code=413,
+            detail=f"Arquivo muito grande. Máximo: {settings.MBOX_MAX_FILE_SIZE / 1024 / 1024}MB"
+        )
+    
+    logger.info("[CLASSIFY_MBOX] Processando caixa: %s", file.filename)
+    
+    async def results():
+        index = 0
+        try:
+            async for parsed, result in process_mbox(source, use_cache=use_cache):
+                if result.get("success"):
+                    item = BatchItemResult(
+                        index=index,
+                        success=True,
+                        result=_build_response(
+                            result,
+                            sender=parsed.sender,
+                            subject=parsed.subject,
+                            processing_time=round(sum(result["stage_timings"].values()), 3)
+                        )
+                    )
+                else:
+                    item = BatchItemResult(index=index, success=False, error=result.get("error"))
+                yield item.model_dump_json() + "\n"
+                index += 1
+        except Exception as e:
+            logger.error("[CLASSIFY_MBOX] Erro na mensagem %d: %s", index, e)
+            yield json.dumps({"index": index, "success": False, "error": "Erro ao ler a caixa"}) + "\n"
+        finally:
+            logger.info("[CLASSIFY_MBOX] %d mensagem(ns) classificada(s)", index)
+            await stack.aclose()
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+def _job_created(job_id: str) -> JobCreatedResponse:
+    return JobCreatedResponse(
+        job_id=job_id,
+        status=jobs.QUEUED,
+        status_url=f"{settings.API_V1_STR}{router.prefix}/jobs/{job_id}"
+    )
+
+
+async def _check_callback(callback_url: Optional[str]) -> None:
+    if callback_url:
+        try:
+            await run_blocking(jobs.validate_callback_url, callback_url)
+        except jobs.InvalidCallbackError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/jobs", response_model=JobCreatedResponse, status_code=202)
+async def create_job(job: JobRequest):
+    """
+    Cria um job de classificação assíncrona e retorna o id imediatamente.
+    
+    - **callback_url**: Se informado, recebe um POST com o resultado ao final
+      (http/https; hosts internos são recusados, ver `JOB_CALLBACK_ALLOWED_HOSTS`)
+    
+    Consulte o andamento em `GET /email/jobs/{job_id}`.
+    """
+    
+    if not settings.JOBS_ENABLED:
+        raise HTTPException(status_code=503, detail="Fila de jobs desativada")
+    
+    await _check_callback(job.callback_url)
+    
+    job_id = await jobs.submit(
+        "email",
+        {
+            "sender": job.sender,
+            "subject": job.subject,
+            "message": job.message,
+            "use_cache": job.use_cache,
+        },
+        callback_url=job.callback_url
+    )
+    
+    logger.info("[JOBS] Job %s criado", job_id)
+    
+    return _job_created(job_id)
+
+
+@router.post("/jobs/file", response_model=JobCreatedResponse, status_code=202)
+async def create_file_job(
+    file: UploadFile = File(...),
+    callback_url: Optional[str] = Form(None),
+    use_cache: bool = Form(True)
+):
+    """
+    Cria um job de classificação assíncrona a partir de arquivo (PDF ou TXT).
+    
+    O arquivo é gravado em disco e a extração de texto acontece no worker,
+    então a requisição termina assim que o upload é recebido.
+    """
+    
+    if not settings.JOBS_ENABLED:
+        raise HTTPException(status_code=503, detail="Fila de jobs desativada")
+    
+    if not any(file.filename.endswith(ext) for ext in settings.ALLOWED_EXTENSIONS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Tipo de arquivo não permitido. Aceita: {settings.ALLOWED_EXTENSIONS}"
+        )
+    
+    await _check_callback(callback_url)
+    
+    path = jobs.new_job_file_path(file.filename)
+    
+    try:
+        async with spooled_upload(file) as source:
+            await run_blocking(jobs.save_job_file, source, path)
+    except UploadTooLargeError:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Arquivo muito grande. Máximo: {settings.MAX_FILE_SIZE / 1024 / 1024}MB"
+        )
+    
+    job_id = await jobs.submit(
+        "file",
+        {"path": path, "filename": file.filename, "use_cache": use_cache},
+        callback_url=callback_url
+    )
+    
+    logger.info("[JOBS] Job %s criado para o arquivo %s", job_id, file.filename)
+    
+    return _job_created(job_id)
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str):
+    """Consulta o estado e, quando concluído, o resultado de um job"""
+    
+    job = await jobs.get_job(job_id)
+    
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    
+    return JobStatusResponse(
+        job_id=job["id"],
+        status=job["status"],
+        created_at=job["created_at"],
+        started_at=job["started_at"],
+        finished_at=job["finished_at"],
+        attempts=job["attempts"],
+        result=job["result"],
+        error=job["error"]
+    )
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Estatísticas do cache de resultados e do índice de quase-duplicatas"""
+    return {**result_cache.stats(), "near_duplicates": near_duplicate_index.stats()}
+
+
 @router.get("/health")
 async def health_check():
     """Health check da API"""
     return {
         "status": "ok",
         "app": settings.APP_NAME,
-        "version": settings.APP_VERSION
+        "version": settings.APP_VERSION,
+        "executor": executor_stats(),
+        "prompts": templates_info()
     }
\ No newline at end of file
@@ -1,5 +1,8 @@
 from pydantic_settings import BaseSettings
 from typing import Optional
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 
 
 class Settings(BaseSettings):
@@ -8,6 +11,14 @@ class Settings(BaseSettings):
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = False
     
+    LOG_LEVEL: str = "INFO"
+    # "text" ou "json" (um registro JSON por linha, com request_id)
+    LOG_FORMAT: str = "text"
+    # Fração dos requests cujo conteúdo (email, saída do modelo) é logado em DEBUG
+    LOG_PAYLOAD_SAMPLE_RATE: float = 0.0
+    # Loga os prompts completos no canal "app.prompts"
+    LOG_PROMPTS: bool = False
+    
     API_V1_STR: str = "/api/v1"
     
     ALLOWED_ORIGINS: list = [
@@ -17,10 +28,170 @@ class Settings(BaseSettings):
     HF_API_URL: str = "https://router.huggingface.co/v1"
     HF_TOKEN: str = ""
     
+    # Modelo usado quando LLM_ROUTES está vazio (rota única em HF_API_URL)
+    LLM_MODEL: str = "openai/gpt-oss-20b:together"
+    # Registro de modelos por tarefa ("classify", "generate", "default"):
+    # {"classify": [{"base_url": "...", "model": "...", "api_key": "..."}], ...}
+    # base_url e api_key são opcionais (padrão: HF_API_URL e HF_TOKEN)
+    LLM_ROUTES: dict = {}
+    # "least_outstanding" ou "latency"
+    LLM_ROUTING_STRATEGY: str = "least_outstanding"
+    
+    LLM_TIMEOUT: float = 30.0
+    LLM_CONNECT_TIMEOUT: float = 5.0
+    LLM_MAX_CONNECTIONS: int = 200
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    LLM_MAX_CONCURRENCY: int = 200
+    
+    # Prazo total de uma chamada ao LLM, somando as novas tentativas (0 = sem prazo)
+    LLM_DEADLINE: float = 20.0
+    # Novas tentativas em timeouts, erros de conexão, 429 e 5xx
+    LLM_RETRIES: int = 2
+    LLM_RETRY_BACKOFF_BASE: float = 0.2
+    LLM_RETRY_BACKOFF_MAX: float = 2.0
+    # Falhas seguidas que abrem o circuito (0 = disjuntor desativado)
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5
+    LLM_BREAKER_RESET_TIMEOUT: float = 30.0
+    # Dispara uma cópia da chamada se ela passar deste tempo (0 = desativado)
+    LLM_HEDGE_DELAY: float = 0.0
+    
+    # "separate": classificação e resposta em chamadas distintas
+    # "fused": uma única chamada retorna classificação e resposta
+    AI_MODE: str = "separate"
+    
+    # "llm": sempre o LLM; "local": só o motor local;
+    # "hybrid": motor local, escalando para o LLM abaixo do limiar
+    CLASSIFIER_BACKEND: str = "llm"
+    LOCAL_CLASSIFIER_PATH: str = str(DATA_DIR / "local_classifier.npz")
+    LOCAL_CLASSIFIER_THRESHOLD: float = 0.85
+    
+    # Léxico ponderado do fallback: {"Categoria": {"termo": peso}}
+    KEYWORDS_PATH: str = str(DATA_DIR / "keywords.json")
+    
+    # Remetentes já analisados (nome e tipo por endereço) mantidos em memória
+    SENDER_CACHE_SIZE: int = 4096
+    
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_TTL: float = 24 * 60 * 60
+    # Caminho do SQLite do cache em disco (vazio desativa)
+    CACHE_DB_PATH: str = ""
+    # Intervalo (segundos) entre as limpezas dos resultados expirados no disco
+    CACHE_PRUNE_INTERVAL: float = 60 * 60
+    
+    # Orçamento de tokens (estimados) de cada tarefa; 0 = sem limite
+    TOKEN_BUDGET_CLASSIFY: int = 1500
+    TOKEN_BUDGET_GENERATE: int = 2000
+    # Reserva parte do orçamento para as frases do meio com mais palavras-chave
+    TOKEN_BUDGET_TOP_SENTENCES: bool = True
+    
+    # Redução de conteúdo: histórico citado, assinaturas e avisos legais são
+    # removidos antes do NLP e do prompt; abaixo do mínimo, o texto fica intacto
+    CONTENT_REDUCTION_ENABLED: bool = True
+    CONTENT_REDUCTION_MIN_CHARS: int = 20
+    
+    # Índice de quase-duplicatas (MinHash + LSH) sobre o texto lematizado:
+    # emails de modelo (newsletters, notificações) reaproveitam a classificação
+    NEAR_DUPLICATE_ENABLED: bool = True
+    # Similaridade de Jaccard (estimada) mínima para reaproveitar
+    NEAR_DUPLICATE_THRESHOLD: float = 0.9
+    # Faixas do LSH (divisor de 64): mais faixas acham pares menos
+    # parecidos, ao custo de mais candidatos por busca
+    NEAR_DUPLICATE_BANDS: int = 8
+    NEAR_DUPLICATE_MAX_ENTRIES: int = 100000
+    # Textos lematizados mais curtos que isso não entram no índice
+    NEAR_DUPLICATE_MIN_TOKENS: int = 20
+    # Reaproveita também a resposta sugerida (só para o mesmo remetente)
+    NEAR_DUPLICATE_REUSE_RESPONSE: bool = False
+    # Caminho do SQLite do índice em disco (vazio desativa)
+    NEAR_DUPLICATE_DB_PATH: str = ""
+    
+    BATCH_MAX_ITEMS: int = 500
+    BATCH_CONCURRENCY: int = 16
+    
+    # Fila de jobs assíncronos (POST /email/jobs)
+    JOBS_ENABLED: bool = True
+    JOBS_DB_PATH: str = str(DATA_DIR / "jobs" / "jobs.db")
+    # Arquivos enviados para jobs ficam aqui até serem processados
+    JOBS_FILES_DIR: str = str(DATA_DIR / "jobs" / "files")
+    # Jobs processados ao mesmo tempo por processo
+    JOB_WORKERS: int = 4
+    # Intervalo de verificação da fila quando não há jobs (jobs de outros processos)
+    JOB_POLL_INTERVAL: float = 1.0
+    # Jobs "running" há mais que isso são considerados abandonados e voltam à fila
+    JOB_STALE_AFTER: float = 15 * 60
+    JOB_MAX_ATTEMPTS: int = 3
+    # Jobs concluídos são removidos após este tempo
+    JOB_RETENTION: float = 7 * 24 * 60 * 60
+    # Intervalo de atualização da contagem de jobs por estado exposta em /metrics
+    JOB_COUNTS_INTERVAL: float = 10.0
+    JOB_CALLBACK_TIMEOUT: float = 10.0
+    # Hosts aceitos em callback_url (".example.com" inclui subdomínios);
+    # vazia, aceita qualquer host que resolva só para endereços públicos
+    JOB_CALLBACK_ALLOWED_HOSTS: list = []
+    
     SPACY_MODEL: str = "pt_core_news_sm"
+    # Componentes não usados por preprocess_text (não são carregados)
+    SPACY_EXCLUDE: list = ["parser", "ner", "senter"]
+    SPACY_BATCH_SIZE: int = 64
+    SPACY_N_PROCESS: int = 1
+    
+    # Gerado no build por scripts/prepare_assets.py (nunca baixado em runtime)
+    STOPWORDS_PATH: str = str(DATA_DIR / "stopwords_pt.txt")
+    NLTK_DATA_DIR: str = ""
+    
+    # Pool para trabalho CPU-bound (spaCy, PDF, regex): "thread" ou "process"
+    CPU_EXECUTOR: str = "thread"
+    # 0 = número de CPUs
+    CPU_WORKERS: int = 0
+    # Threads para I/O bloqueante (SQLite, DNS, leitura de arquivos), separadas
+    # do pool de CPU; 0 = padrão do Python (CPUs + 4, até 32)
+    IO_WORKERS: int = 0
+    
+    # Carrega modelo e stopwords no startup, em segundo plano
+    WARM_UP_ON_STARTUP: bool = True
+    
+    # Modo do `run.py`: "production" (gunicorn + workers uvicorn; ver
+    # app/core/server.py) ou "development" (processo único com reload)
+    SERVER_MODE: str = "production"
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    # 0 = número de CPUs
+    SERVER_WORKERS: int = 0
+    # Carrega os modelos no mestre antes do fork (memória compartilhada)
+    SERVER_PRELOAD: bool = True
+    SERVER_LOOP: str = "uvloop"
+    SERVER_HTTP: str = "httptools"
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEPALIVE: int = 5
+    # Worker sem sinal de vida por mais que isso é reiniciado
+    SERVER_TIMEOUT: int = 120
+    # Tempo para terminar as requisições em andamento no desligamento
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    # 0 = sem limite
+    SERVER_LIMIT_CONCURRENCY: int = 0
+    # Recicla o worker após N requisições (0 = nunca)
+    SERVER_MAX_REQUESTS: int = 0
     
     MAX_FILE_SIZE: int = 50 * 1024 * 1024
-    ALLOWED_EXTENSIONS: list = [".pdf", ".txt"]
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    # Uploads maiores que isso vão para um arquivo temporário em disco
+    UPLOAD_SPOOL_THRESHOLD: int = 2 * 1024 * 1024
+    ALLOWED_EXTENSIONS: list = [".pdf", ".txt", ".eml"]
+    
+    # Caixas .mbox (POST /email/classify-mbox), lidas em streaming
+    MBOX_MAX_FILE_SIZE: int = 4 * 1024 * 1024 * 1024
+    # Mensagens maiores são truncadas (os anexos, no fim, são descartados)
+    MBOX_MAX_MESSAGE_SIZE: int = 5 * 1024 * 1024
+    MBOX_BATCH_SIZE: int = 32
+    
+    # Só os primeiros caracteres importam para a classificação (0 = sem limite)
+    PDF_MAX_CHARS: int = 20000
+    PDF_MAX_PAGES: int = 0
+    # Extração paralela de PDFs grandes (0 workers = desativada)
+    PDF_WORKERS: int = 0
+    PDF_PARALLEL_MIN_PAGES: int = 32
+    PDF_PAGES_PER_TASK: int = 8
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import Histogram, registry, register_gauge
+
+logger = logging.getLogger(__name__)
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_io_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+_stats: Dict[str, Dict[str, float]] = {}
+
+QUEUE_WAIT = registry.register(Histogram(
+    "executor_queue_wait_seconds",
+    "Tempo de espera na fila do pool antes de executar",
+    ["pool"],
+))
+
+
+def _workers() -> int:
+    return settings.CPU_WORKERS or os.cpu_count() or 1
+
+
+def _io_workers() -> int:
+    return settings.IO_WORKERS or min(32, (os.cpu_count() or 1) + 4)
+
+
+def _init_process_worker() -> None:
+    """Pré-carrega o modelo spaCy e as stopwords em cada processo do pool"""
+    from app.services import nlp
+
+    nlp.warm_up()
+
+
+def _timed_call(func: Callable, args: tuple, kwargs: dict):
+    """
+    Executa a função no worker e retorna também o instante de início.
+
+    `time.monotonic` usa o mesmo relógio em todos os processos da máquina,
+    então o tempo de espera na fila pode ser calculado no event loop.
+    """
+    started_at = time.monotonic()
+    return func(*args, **kwargs), started_at
+
+
+def _get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=_workers(), thread_name_prefix="cpu")
+
+    return _thread_pool
+
+
+def _get_io_pool() -> ThreadPoolExecutor:
+    global _io_pool
+
+    if _io_pool is None:
+        _io_pool = ThreadPoolExecutor(max_workers=_io_workers(), thread_name_prefix="io")
+
+    return _io_pool
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=_workers(),
+            initializer=_init_process_worker,
+        )
+
+    return _process_pool
+
+
+def _pool_stats(pool: str) -> Dict[str, float]:
+    if pool not in _stats:
+        _stats[pool] = {
+            "in_flight": 0,
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "run_time_total": 0.0,
+        }
+    return _stats[pool]
+
+
+async def _submit(pool: str, executor: Executor, func: Callable, *args, **kwargs):
+    stats = _pool_stats(pool)
+    stats["in_flight"] += 1
+    stats["submitted"] += 1
+    submitted_at = time.monotonic()
+
+    try:
+        result, started_at = await asyncio.get_running_loop().run_in_executor(
+            executor, _timed_call, func, args, kwargs
+        )
+    except Exception:
+        stats["failed"] += 1
+        raise
+    finally:
+        stats["in_flight"] -= 1
+
+    finished_at = time.monotonic()
+    wait_time = max(0.0, started_at - submitted_at)
+    QUEUE_WAIT.observe(wait_time, pool=pool)
+    stats["completed"] += 1
+    stats["wait_time_total"] += wait_time
+    stats["wait_time_max"] = max(stats["wait_time_max"], wait_time)
+    stats["run_time_total"] += finished_at - started_at
+
+    return result
+
+
+async def run_cpu(func: Callable, *args, **kwargs):
+    """
+    Executa trabalho CPU-bound fora do event loop.
+
+    Usa o pool definido em `settings.CPU_EXECUTOR`:
+    - "thread": pool de threads (padrão)
+    - "process": pool de processos com o spaCy pré-carregado em cada um;
+      função e argumentos precisam ser serializáveis (pickle)
+    """
+    if settings.CPU_EXECUTOR == "process":
+        return await _submit("process", _get_process_pool(), func, *args, **kwargs)
+
+    return await _submit("thread", _get_thread_pool(), func, *args, **kwargs)
+
+
+async def run_cpu_thread(func: Callable, *args, **kwargs):
+    """
+    Executa trabalho CPU-bound no pool de threads de CPU, mesmo com `CPU_EXECUTOR=process`.
+
+    Para chamadas cujos argumentos não podem ir para outro processo
+    (ex.: arquivos abertos) ou que dependem de caches do processo atual.
+    """
+    return await _submit("thread", _get_thread_pool(), func, *args, **kwargs)
+
+
+async def run_blocking(func: Callable, *args, **kwargs):
+    """
+    Executa I/O bloqueante (SQLite, DNS, arquivos) no pool de threads de I/O.
+
+    O pool é separado do de CPU (`settings.IO_WORKERS`): uma espera longa
+    em disco ou rede não ocupa os workers do spaCy e da extração de PDF.
+    """
+    return await _submit("io", _get_io_pool(), func, *args, **kwargs)
+
+
+async def prestart() -> None:
+    """Inicia os processos do pool (e carrega o spaCy neles) antes do primeiro request"""
+    if settings.CPU_EXECUTOR == "process":
+        await asyncio.gather(*(run_cpu(os.getpid) for _ in range(_workers())))
+
+
+def executor_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Métricas dos pools: tarefas em andamento, profundidade da fila e
+    tempo de espera (médio e máximo) antes de começar a executar.
+    """
+    result = {}
+
+    for pool, stats in _stats.items():
+        workers = _io_workers() if pool == "io" else _workers()
+        completed = stats["completed"]
+        result[pool] = {
+            **stats,
+            "workers": workers,
+            "queue_depth": max(0, stats["in_flight"] - workers),
+            "wait_time_avg": round(stats["wait_time_total"] / completed, 6) if completed else 0.0,
+            "run_time_avg": round(stats["run_time_total"] / completed, 6) if completed else 0.0,
+        }
+
+    return result
+
+
+register_gauge(
+    "executor_in_flight",
+    "Tarefas submetidas ao pool e ainda não concluídas",
+    ["pool"],
+    lambda: {(pool,): stats["in_flight"] for pool, stats in _stats.items()},
+)
+
+register_gauge(
+    "executor_queue_depth",
+    "Tarefas aguardando um worker livre",
+    ["pool"],
+    lambda: {(pool,): stats["queue_depth"] for pool, stats in executor_stats().items()},
+)
+
+
+def shutdown_executor() -> None:
+    """Encerra os pools (chamado no shutdown da aplicação)"""
+    global _thread_pool, _io_pool, _process_pool
+
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
+
+    if _io_pool is not None:
+        _io_pool.shutdown(wait=False, cancel_futures=True)
+        _io_pool = None
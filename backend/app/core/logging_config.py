@@ -0,0 +1,155 @@
+import json
+import logging
+import random
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+from app.core.config import settings
+
+# Conteúdo de emails e saídas do modelo (amostrado por request)
+payload_logger = logging.getLogger("app.payload")
+# Prompts completos enviados ao LLM (desligado por padrão)
+prompt_logger = logging.getLogger("app.prompts")
+
+_request_id: ContextVar[str] = ContextVar("request_id", default="-")
+_payload_sampled: ContextVar[Optional[bool]] = ContextVar("payload_sampled", default=None)
+
+# Atributos padrão de LogRecord; o resto veio de `extra=` e vai para o JSON
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "request_id"}
+
+
+def get_request_id() -> str:
+    return _request_id.get()
+
+
+def _sample_payload() -> bool:
+    rate = settings.LOG_PAYLOAD_SAMPLE_RATE
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+def payload_enabled() -> bool:
+    """
+    Indica se o conteúdo deste request deve ser logado.
+
+    O sorteio é feito uma vez por request (no middleware), então os logs
+    de conteúdo de um request amostrado aparecem todos juntos.
+    """
+    if not payload_logger.isEnabledFor(logging.DEBUG):
+        return False
+
+    sampled = _payload_sampled.get()
+    if sampled is None:
+        return _sample_payload()
+    return sampled
+
+
+def log_payload(msg: str, *args) -> None:
+    """Loga conteúdo de email/modelo no canal `app.payload`, com amostragem"""
+    if payload_enabled():
+        payload_logger.debug(msg, *args)
+
+
+def log_prompt(task: str, prompt: str) -> None:
+    """Loga o prompt completo no canal `app.prompts` (só com LOG_PROMPTS)"""
+    if prompt_logger.isEnabledFor(logging.DEBUG):
+        prompt_logger.debug("[%s] Prompt:\n%s", task, prompt)
+
+
+class RequestIdFilter(logging.Filter):
+    """Adiciona o id do request atual a todos os registros"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Um objeto JSON por linha, com os campos passados em `extra=`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging() -> None:
+    """
+    Configura o logging da aplicação a partir das settings.
+
+    - LOG_FORMAT: "text" (legível) ou "json" (um registro por linha)
+    - LOG_LEVEL: nível do logger raiz
+    - LOG_PAYLOAD_SAMPLE_RATE: fração dos requests com conteúdo logado
+    - LOG_PROMPTS: habilita o canal de prompts
+    """
+    handler = logging.StreamHandler()
+    handler.addFilter(RequestIdFilter())
+
+    if settings.LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"
+        ))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    payload_logger.setLevel(logging.DEBUG if settings.LOG_PAYLOAD_SAMPLE_RATE > 0 else logging.WARNING)
+    prompt_logger.setLevel(logging.DEBUG if settings.LOG_PROMPTS else logging.WARNING)
+
+
+class RequestIdMiddleware:
+    """
+    Atribui um id a cada request HTTP.
+
+    Reaproveita o cabeçalho `X-Request-ID` quando enviado, devolve o id na
+    resposta e sorteia se o conteúdo do request será logado.
+    """
+
+    header = b"x-request-id"
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == self.header:
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        id_token = _request_id.set(request_id)
+        sample_token = _payload_sampled.set(
+            payload_logger.isEnabledFor(logging.DEBUG) and _sample_payload()
+        )
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(self.header, request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _request_id.reset(id_token)
+            _payload_sampled.reset(sample_token)
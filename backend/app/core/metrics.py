@@ -0,0 +1,257 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Contador monotônico com labels"""
+
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [
+                f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(self._values.items())
+            ]
+
+
+class Gauge(_Metric):
+    """Valor instantâneo, lido de uma função no momento da coleta"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 collect: Callable[[], Dict[LabelValues, float]]):
+        super().__init__(name, documentation, labelnames)
+        self._collect = collect
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._collect().items())
+        ]
+
+
+class Histogram(_Metric):
+    """Histograma de latências com buckets cumulativos"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * len(self.buckets)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key in sorted(self._counts):
+                cumulative = 0
+                for bound, count in zip(self.buckets, self._counts[key]):
+                    cumulative += count
+                    le = 'le="' + _format_value(bound) + '"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(self._sums[key])}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Exporta todas as métricas no formato texto do Prometheus (0.0.4)"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_DURATION = registry.register(Histogram(
+    "email_stage_duration_seconds",
+    "Duração de cada etapa do processamento de um email",
+    ["stage"],
+))
+
+LLM_REQUEST_DURATION = registry.register(Histogram(
+    "llm_request_duration_seconds",
+    "Duração das chamadas ao LLM",
+    ["task"],
+))
+
+LLM_ERRORS = registry.register(Counter(
+    "llm_errors_total",
+    "Chamadas ao LLM que falharam (exceto timeouts)",
+    ["task"],
+))
+
+LLM_TIMEOUTS = registry.register(Counter(
+    "llm_timeouts_total",
+    "Chamadas ao LLM que estouraram o timeout",
+    ["task"],
+))
+
+LLM_TOKENS = registry.register(Counter(
+    "llm_tokens_total",
+    "Tokens consumidos, segundo o campo usage das respostas",
+    ["task", "type"],
+))
+
+LLM_RETRIES = registry.register(Counter(
+    "llm_retries_total",
+    "Novas tentativas de chamadas ao LLM",
+    ["task"],
+))
+
+LLM_HEDGES = registry.register(Counter(
+    "llm_hedged_requests_total",
+    "Cópias de chamadas lentas disparadas (hedging)",
+    ["task"],
+))
+
+LLM_FAILOVERS = registry.register(Counter(
+    "llm_failovers_total",
+    "Chamadas que passaram para outro endpoint da rota",
+    ["task"],
+))
+
+LLM_SHORT_CIRCUITS = registry.register(Counter(
+    "llm_short_circuits_total",
+    "Chamadas recusadas com o circuito aberto",
+    ["task"],
+))
+
+PROMPT_TOKENS = registry.register(Counter(
+    "prompt_tokens_estimated_total",
+    "Tokens estimados dos prompts, separando o prefixo estático do conteúdo do email",
+    ["template", "part"],
+))
+
+FALLBACKS = registry.register(Counter(
+    "email_fallbacks_total",
+    "Vezes em que um fallback foi usado",
+    ["kind"],
+))
+
+CACHE_LOOKUPS = registry.register(Counter(
+    "email_cache_lookups_total",
+    "Buscas no cache de resultados",
+    ["result"],
+))
+
+NEAR_DUPLICATE_LOOKUPS = registry.register(Counter(
+    "email_near_duplicate_lookups_total",
+    "Buscas no índice de quase-duplicatas",
+    ["result"],
+))
+
+CONTENT_REDUCTION_CHARS = registry.register(Counter(
+    "email_content_reduction_chars_total",
+    "Caracteres removidos antes da análise (histórico citado, aviso legal, assinatura)",
+    ["kind"],
+))
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    STAGE_DURATION.observe(seconds, stage=stage)
+
+
+def stage_timer(stage: str):
+    """Context manager que registra a duração de uma etapa"""
+    return STAGE_DURATION.time(stage=stage)
+
+
+def register_gauge(name: str, documentation: str, labelnames: Sequence[str],
+                   collect: Callable[[], Dict[LabelValues, float]]) -> Gauge:
+    """Registra um gauge calculado no momento da coleta"""
+    return registry.register(Gauge(name, documentation, labelnames, collect))
+
+
+def render_metrics() -> str:
+    return registry.render()
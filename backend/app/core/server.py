@@ -0,0 +1,109 @@
+"""
+Modo de produção: gunicorn como gerenciador de processos e workers uvicorn.
+
+Com `SERVER_PRELOAD`, a aplicação e os modelos (spaCy, stopwords,
+classificador local, palavras-chave) são carregados uma única vez no
+processo mestre, antes do fork. Em seguida `gc.freeze()` move esses
+objetos para a geração permanente do coletor, para que as coletas nos
+workers não escrevam nas páginas compartilhadas (copy-on-write); assim a
+memória cresce bem menos que linearmente com o número de workers.
+"""
+
+import gc
+import logging
+import os
+
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AppWorker(UvicornWorker):
+    """Worker uvicorn com event loop e parser HTTP configuráveis (uvloop/httptools)"""
+
+    CONFIG_KWARGS = {
+        "loop": settings.SERVER_LOOP,
+        "http": settings.SERVER_HTTP,
+        "lifespan": "on",
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_TIMEOUT,
+        "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY or None,
+    }
+
+
+def _workers() -> int:
+    return settings.SERVER_WORKERS or os.cpu_count() or 1
+
+
+def preload_models() -> None:
+    """Carrega os recursos pesados no mestre, antes do fork dos workers"""
+    from app.core.startup import load_models
+
+    load_models()
+
+    # Objetos criados até aqui são compartilhados pelos workers e não
+    # precisam ser examinados pelo coletor de ciclos
+    gc.collect()
+    gc.freeze()
+
+    logger.info("Modelos pré-carregados no mestre (%d objetos congelados)", gc.get_freeze_count())
+
+
+def _when_ready(server) -> None:
+    if settings.SERVER_PRELOAD:
+        preload_models()
+    logger.info("Servidor pronto em %s:%s com %d worker(s)", settings.SERVER_HOST, settings.SERVER_PORT, _workers())
+
+
+def _post_fork(server, worker) -> None:
+    from app.services.cache import result_cache
+    from app.services.near_duplicate import near_duplicate_index
+
+    result_cache.reopen()
+    near_duplicate_index.reopen()
+
+
+class ProductionServer(BaseApplication):
+
+    def __init__(self, app_uri: str):
+        self.app_uri = app_uri
+        super().__init__()
+
+    def load_config(self) -> None:
+        options = {
+            "bind": f"{settings.SERVER_HOST}:{settings.SERVER_PORT}",
+            "workers": _workers(),
+            "worker_class": "app.core.server.AppWorker",
+            "preload_app": settings.SERVER_PRELOAD,
+            "backlog": settings.SERVER_BACKLOG,
+            "keepalive": settings.SERVER_KEEPALIVE,
+            "timeout": settings.SERVER_TIMEOUT,
+            # Margem para os eventos de shutdown após o dreno das requisições
+            "graceful_timeout": settings.SERVER_GRACEFUL_TIMEOUT + 5,
+            "max_requests": settings.SERVER_MAX_REQUESTS,
+            "max_requests_jitter": settings.SERVER_MAX_REQUESTS // 10,
+            "loglevel": settings.LOG_LEVEL.lower(),
+            "accesslog": None,
+            "when_ready": _when_ready,
+            "post_fork": _post_fork,
+        }
+        for key, value in options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from gunicorn.util import import_app
+
+        return import_app(self.app_uri)
+
+
+def run_production(app_uri: str = "app.main:app") -> None:
+    """
+    Inicia o servidor de produção (bloqueia até o encerramento).
+
+    SIGTERM inicia o desligamento gracioso: os workers param de aceitar
+    conexões, terminam as requisições em andamento (até
+    `SERVER_GRACEFUL_TIMEOUT` segundos) e executam os eventos de shutdown.
+    """
+    ProductionServer(app_uri).run()
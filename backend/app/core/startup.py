@@ -0,0 +1,68 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.executor import prestart
+
+logger = logging.getLogger(__name__)
+
+_state: Dict[str, any] = {
+    "ready": False,
+    "error": None,
+    "warm_up_time": None,
+}
+_warm_up_task: Optional[asyncio.Task] = None
+
+
+def load_models() -> None:
+    """Carrega modelo spaCy, stopwords, classificador local e índice de quase-duplicatas (síncrono)"""
+    from app.services import nlp
+    from app.services.near_duplicate import near_duplicate_index
+
+    nlp.warm_up()
+    near_duplicate_index.load()
+
+    if settings.CLASSIFIER_BACKEND != "llm":
+        from app.services.local_classifier import get_local_classifier
+
+        get_local_classifier()
+
+
+async def warm_up() -> None:
+    """
+    Carrega os recursos pesados (modelo spaCy, stopwords) fora do event loop.
+
+    Nenhum recurso é baixado da rede: tudo deve ter sido empacotado no
+    build por `scripts/prepare_assets.py`.
+    """
+    start = time.perf_counter()
+
+    try:
+        await asyncio.to_thread(load_models)
+        await prestart()
+        _state["ready"] = True
+        _state["error"] = None
+        _state["warm_up_time"] = round(time.perf_counter() - start, 3)
+        logger.info(f"✅ Modelos carregados em {_state['warm_up_time']}s")
+    except Exception as e:
+        _state["error"] = str(e)
+        logger.error(f"Erro no warm-up: {e}")
+
+
+def start_warm_up() -> None:
+    """Dispara o warm-up em segundo plano (o servidor já aceita conexões)"""
+    global _warm_up_task
+
+    if settings.WARM_UP_ON_STARTUP and _warm_up_task is None:
+        _warm_up_task = asyncio.create_task(warm_up())
+
+
+def readiness() -> Dict[str, any]:
+    """Estado de prontidão para o endpoint /ready"""
+    from app.services import nlp
+
+    _state["ready"] = _state["ready"] or nlp.is_ready()
+
+    return dict(_state)
@@ -1,11 +1,20 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 import logging
 
 from app.core.config import settings
+from app.core.startup import start_warm_up, readiness
+from app.core.executor import shutdown_executor
+from app.core.metrics import render_metrics
+from app.core.logging_config import configure_logging, RequestIdMiddleware
 from app.api.routes import email
+from app.services.llm import close_client
+from app.services.text_extractor import shutdown_pdf_pool
+from app.services.uploads import UploadSizeLimitMiddleware
+from app.services.jobs import start_workers, stop_workers
 
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 app = FastAPI(
@@ -14,6 +23,10 @@ app = FastAPI(
     description="API para classificação de emails em Produtivo/Improdutivo"
 )
 
+app.add_middleware(UploadSizeLimitMiddleware)
+
+app.add_middleware(RequestIdMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -35,11 +48,34 @@ async def root():
         "docs": "/docs"
     }
 
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 quando os modelos estão carregados, 503 caso contrário"""
+    state = readiness()
+    return JSONResponse(
+        status_code=200 if state["ready"] else 503,
+        content=state
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Métricas no formato texto do Prometheus"""
+    return PlainTextResponse(
+        render_metrics(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
 @app.on_event("startup")
 async def startup_event():
-    logger.info(f"🚀 {settings.APP_NAME} iniciando...")
-    logger.info(f"Debug: {settings.DEBUG}")
+    logger.info("🚀 %s iniciando...", settings.APP_NAME)
+    logger.info("Debug: %s", settings.DEBUG)
+    start_warm_up()
+    start_workers()
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    logger.info(f"🛑 {settings.APP_NAME} encerrado")
\ No newline at end of file
+    await stop_workers()
+    await close_client()
+    shutdown_pdf_pool()
+    shutdown_executor()
+    logger.info("🛑 %s encerrado", settings.APP_NAME)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 class EmailRequest(BaseModel):
@@ -9,6 +9,7 @@ class EmailRequest(BaseModel):
     sender: Optional[str] = None
     subject: Optional[str] = None
     message: str
+    use_cache: bool = True
     
     class Config:
         example = {
@@ -28,6 +29,40 @@ class ClassificationResponse(BaseModel):
     sender: Optional[str] = None
     subject: str
     processing_time: float
+    ai_mode: Optional[str] = None
+    classifier_engine: Optional[str] = None
+    stage_timings: Dict[str, float] = {}
+    cached: bool = False
+    fallback: bool = False
+    token_budget: Dict[str, Dict[str, float]] = {}
+    content_reduction: Dict[str, Dict[str, int]] = {}
+    near_duplicate_similarity: Optional[float] = None
+    
+    @classmethod
+    def from_result(
+        cls,
+        result: dict,
+        sender: Optional[str],
+        subject: str,
+        processing_time: float
+    ) -> "ClassificationResponse":
+        """Monta a resposta a partir do resultado do pipeline"""
+        return cls(
+            classification=result["classification"],
+            confidence=result["confidence"],
+            suggested_response=result["suggested_response"],
+            sender=sender,
+            subject=subject,
+            processing_time=processing_time,
+            ai_mode=result["ai_mode"],
+            classifier_engine=result.get("engine"),
+            stage_timings=result["stage_timings"],
+            cached=result["cached"],
+            fallback=result.get("fallback", False),
+            token_budget=result.get("token_budget", {}),
+            content_reduction=result.get("content_reduction", {}),
+            near_duplicate_similarity=result.get("near_duplicate_similarity")
+        )
     
     class Config:
         example = {
@@ -36,10 +71,101 @@ class ClassificationResponse(BaseModel):
             "suggested_response": "Obrigado pelo seu email sobre 'Reunião importante Joao'...",
             "sender": "joao@example.com",
             "subject": "Reunião importante",
-            "processing_time": 0.523
+            "processing_time": 0.523,
+            "ai_mode": "separate",
+            "classifier_engine": "llm",
+            "stage_timings": {"preprocess": 0.012, "classify": 0.204, "generate": 0.301},
+            "cached": False,
+            "fallback": False,
+            "token_budget": {
+                "classify": {"budget_tokens": 1500, "original_tokens": 4200, "kept_tokens": 1496, "truncation_ratio": 0.6438},
+                "generate": {"budget_tokens": 2000, "original_tokens": 4190, "kept_tokens": 1994, "truncation_ratio": 0.5241}
+            },
+            "content_reduction": {
+                "classify": {"original_chars": 2234, "removed_chars": 2128, "quoted": 1920, "disclaimer": 150, "signature": 57},
+                "generate": {"original_chars": 2210, "removed_chars": 2128, "quoted": 1920, "disclaimer": 150, "signature": 57}
+            }
+        }
+
+
+class BatchEmailRequest(BaseModel):
+    """
+    Esquema para classificação em lote.
+    """
+    items: List[EmailRequest]
+    use_cache: bool = True
+    
+    class Config:
+        example = {
+            "items": [
+                {
+                    "sender": "joao@example.com",
+                    "subject": "Reunião importante",
+                    "message": "Gostaria de agendar uma reunião para discutir o projeto"
+                }
+            ]
+        }
+
+
+class BatchItemResult(BaseModel):
+    """
+    Resultado de um item do lote.
+    """
+    index: int
+    success: bool
+    result: Optional[ClassificationResponse] = None
+    error: Optional[str] = None
+
+
+class BatchClassificationResponse(BaseModel):
+    """
+    Esquema para resposta da classificação em lote.
+    """
+    results: List[BatchItemResult]
+    total: int
+    succeeded: int
+    failed: int
+    processing_time: float
+
+
+class JobRequest(EmailRequest):
+    """
+    Esquema para criar um job de classificação assíncrona.
+    """
+    callback_url: Optional[str] = None
+    
+    class Config:
+        example = {
+            "sender": "joao@example.com",
+            "subject": "Reunião importante",
+            "message": "Gostaria de agendar uma reunião para discutir o projeto",
+            "callback_url": "https://cliente.example.com/webhooks/email"
         }
 
 
+class JobCreatedResponse(BaseModel):
+    """
+    Esquema para resposta da criação de um job.
+    """
+    job_id: str
+    status: str
+    status_url: str
+
+
+class JobStatusResponse(BaseModel):
+    """
+    Esquema para consulta de um job.
+    """
+    job_id: str
+    status: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    attempts: int = 0
+    result: Optional[ClassificationResponse] = None
+    error: Optional[str] = None
+
+
 class FileUploadRequest(BaseModel):
     """
     Esquema para upload de arquivo.
@@ -1,16 +1,23 @@
 import logging
-from typing import Dict
-from openai import OpenAI
+from typing import AsyncIterator, Dict, List, Optional
 from app.core.config import settings
+from app.core.executor import run_cpu_thread
+from app.core.metrics import FALLBACKS, stage_timer
+from app.core.logging_config import log_payload, log_prompt
+from app.services import prompts
+from app.services.llm import chat_completion, chat_completion_stream
+from app.services.local_classifier import get_local_classifier
+from app.services.keywords import keyword_matcher
+from app.services.sender import identify_sender
 import json
 import re
 
 logger = logging.getLogger(__name__)
 
-client = OpenAI(
-    base_url="https://router.huggingface.co/v1",
-    api_key=settings.HF_TOKEN,
-)
+
+# Hash dos templates de prompt; entra na chave do cache de resultados,
+# então qualquer mudança nos prompts invalida os resultados antigos
+PROMPT_VERSION = prompts.fingerprint()
 
 
 """
@@ -133,191 +140,161 @@ def _extract_json_from_text(text: str) -> Dict:
     raise ValueError("Não foi possível extrair JSON válido do texto")
 
 
-def classify_email(text: str) -> Dict[str, any]:
+def classify_locally(text: str) -> Optional[Dict[str, any]]:
+    """
+    Classifica com o motor local, conforme `settings.CLASSIFIER_BACKEND`.
+    
+    - "llm": nunca usa o motor local (retorna None)
+    - "local": sempre usa o motor local
+    - "hybrid": usa o motor local só quando a confiança atinge
+      `settings.LOCAL_CLASSIFIER_THRESHOLD`; abaixo disso retorna None
+      para que a classificação seja escalada para o LLM
+    """
+    
+    if settings.CLASSIFIER_BACKEND == "llm":
+        return None
+    
+    classifier = get_local_classifier()
+    if classifier is None:
+        return None
+    
+    result = classifier.classify(text)
+    
+    if settings.CLASSIFIER_BACKEND == "local":
+        return result
+    
+    if result["confidence"] >= settings.LOCAL_CLASSIFIER_THRESHOLD:
+        return result
+    
+    logger.info("[CLASSIFY_EMAIL] Confiança local %s abaixo do limiar. Escalando para o LLM.", result["confidence"])
+    return None
+
+
+async def classify_email(text: str) -> Dict[str, any]:
+    """
+    Classifica email E extrai confiança.
+    
+    Tenta primeiro o motor local (ver `classify_locally`) e só chama a IA
+    quando ele não está habilitado ou não tem confiança suficiente.
+    """
+    
+    local_result = classify_locally(text)
+    if local_result is not None:
+        return local_result
+    
+    return await _classify_with_llm(text)
+
+
+async def _classify_with_llm(text: str) -> Dict[str, any]:
     """
     Classifica email E extrai confiança usando IA.
     """
     
     try:
-        logger.info(f"[CLASSIFY_EMAIL] Tamanho do texto: {len(text)} caracteres")
-        logger.info(f"[CLASSIFY_EMAIL] Primeiros 200 chars do texto: {text[:200]}")
-        logger.info(f"[CLASSIFY_EMAIL] Token HF configurado: {'Sim' if settings.HF_TOKEN else 'NÃO - ERRO!'}")
+        logger.debug("[CLASSIFY_EMAIL] Tamanho do texto: %d caracteres", len(text))
+        log_payload("[CLASSIFY_EMAIL] Primeiros 200 chars do texto: %.200s", text)
+        if not settings.HF_TOKEN and not settings.LLM_ROUTES:
+            logger.error("[CLASSIFY_EMAIL] Token HF não configurado!")
         
-        prompt = f"""Classifique este email como "Produtivo" (trabalho relevante, propostas, projetos, reuniões, documentos importantes) ou "Improdutivo" (spam, promoções, clickbait, conteúdo irrelevante).
-
-Responda APENAS com este JSON (sem texto adicional):
-{{"classification": "Produtivo ou Improdutivo", "confidence": 0.0-1.0}}
-
-Email:
-{text}"""
+        messages = prompts.CLASSIFY.render(text=text)
         
-        logger.info(f"[CLASSIFY_EMAIL] Prompt completo a ser enviado:\n{prompt}")
+        log_prompt("CLASSIFY_EMAIL", messages[-1]["content"])
         
-        response = client.chat.completions.create(
-            model="openai/gpt-oss-20b:together",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "Você é um classificador de emails. Analise o texto e responda APENAS com um JSON válido, sem texto adicional."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.1
+        response = await chat_completion(
+            messages=messages,
+            temperature=0.1,
+            task="classify"
         )
         response_text = response.choices[0].message.content.strip()
         
-        logger.info(f"[CLASSIFY_EMAIL] Resposta da API (raw): '{response_text}'")
-        logger.info(f"[CLASSIFY_EMAIL] Tamanho da resposta: {len(response_text)} caracteres")
+        log_payload("[CLASSIFY_EMAIL] Resposta da API (raw): '%s'", response_text)
+        logger.debug("[CLASSIFY_EMAIL] Tamanho da resposta: %d caracteres", len(response_text))
         
-        result = _extract_json_from_text(response_text)
+        with stage_timer("json_parse"):
+            result = _extract_json_from_text(response_text)
         
         return {
             "classification": result.get("classification", "Produtivo"),
             "confidence": float(result.get("confidence", 0.5)),
-            "success": True
+            "success": True,
+            "engine": "llm"
         }
     
     except ValueError as e:
-        logger.error(f"Erro ao extrair JSON: {e}. Resposta: '{response_text if 'response_text' in locals() else 'N/A'}'")
+        logger.error("Erro ao extrair JSON: %s", e)
+        log_payload("Resposta sem JSON válido: '%s'", response_text if 'response_text' in locals() else 'N/A')
         return _fallback_classification(text)
     except json.JSONDecodeError as e:
-        logger.error(f"Erro ao fazer parse JSON: {e}. Resposta recebida: '{response_text if 'response_text' in locals() else 'N/A'}'")
+        logger.error("Erro ao fazer parse JSON: %s", e)
+        log_payload("Resposta com JSON inválido: '%s'", response_text if 'response_text' in locals() else 'N/A')
         return _fallback_classification(text)
     except Exception as e:
-        logger.error(f"Erro ao classificar: {e}")
+        logger.error("Erro ao classificar: %s", e)
         return _fallback_classification(text)
 
 
 def _fallback_classification(text: str) -> Dict[str, any]:
-    """Fallback com análise mais robusta de keywords"""
-    text_lower = text.lower()
-    
-    improdutive_keywords = [
-        "clique", "ganhe", "prêmio", "desconto", "promoção", "grátis",
-        "oferta", "compre agora", "limitado", "urgente", "aproveite",
-        "junte-se", "revenda", "oportunidade de ganho", "trabalhe conosco",
-        "acessar", "confirmar dados", "atualizar conta", "verificar segurança",
-        "click here", "buy now", "limited time", "exclusive offer",
-        "você ganhou", "parabéns", "sorteio", "loteria"
-    ]
-    
-    productive_keywords = [
-        "reunião", "projeto", "proposta", "análise", "relatório", "documento",
-        "apresentação", "planejamento", "estratégia", "objetivo", "meta",
-        "feedback", "revisão", "aprovação", "assinatura", "contrato",
-        "deadline", "entrega", "resultado", "performance", "dados",
-        "meeting", "schedule", "agenda", "discussion", "collaboration",
-        "budget", "invoice", "quarterly", "planning", "update"
-    ]
-    
-    improdutive_count = sum(1 for kw in improdutive_keywords if kw in text_lower)
-    productive_count = sum(1 for kw in productive_keywords if kw in text_lower)
-    
-    logger.info(f"Fallback - Improdutivo: {improdutive_count}, Produtivo: {productive_count}")
-    
-    if improdutive_count > productive_count:
-        return {
-            "classification": "Improdutivo",
-            "confidence": 0.6,
-            "success": True,
-            "fallback": True
-        }
+    """Fallback com análise de keywords ponderadas (ver `app/data/keywords.json`)"""
+    FALLBACKS.inc(kind="classification")
+    keyword_result = keyword_matcher.match(text)
     
-    if productive_count > improdutive_count:
-        return {
-            "classification": "Produtivo",
-            "confidence": 0.6,
-            "success": True,
-            "fallback": True
-        }
+    improdutive_score = keyword_result["scores"].get("Improdutivo", 0.0)
+    productive_score = keyword_result["scores"].get("Produtivo", 0.0)
     
-    return {
+    logger.info("Fallback - Improdutivo: %s, Produtivo: %s", improdutive_score, productive_score)
+    
+    result = {
         "classification": "Produtivo",
         "confidence": 0.5,
         "success": True,
-        "fallback": True
+        "fallback": True,
+        "engine": "fallback",
+        "keyword_scores": keyword_result["scores"],
+        "matched_terms": keyword_result["matches"]
     }
-
-
-def _extract_sender_name(sender: str, message: str) -> str:
-    """
-    Extrai e valida o nome do remetente (pessoa ou empresa) com regras específicas.
-    
-    Regras de identificação:
-    1. O nome do remetente vem do email, antes do @
-    2. Deve ter apenas letras (a-z, A-Z), acentos, números (para empresas), espaços e hífens
-    3. Não deve ser uma palavra comum que indica cargo/função (admin, suporte, etc)
-    4. Deve ter pelo menos 2 caracteres
-    5. Validação cruzada: verifica se aparece no corpo do email
-    
-    Detecta automaticamente se é:
-    - NOME DE PESSOA: padrão "nome sobrenome" (ex: "João Silva")
-    - NOME DE EMPRESA: pode conter números ou palavras maiúsculas (ex: "Tech123", "ABCConsultoria")
-    
-    Validação cruzada:
-    - Busca o nome no corpo da mensagem para confirmar origem
-    - Padrões: "João,", "meu nome é João", "sou a empresa X", etc
-    """
-    if not sender or "@" not in sender:
-        return None
     
-    email_prefix = sender.split("@")[0]
+    if improdutive_score > productive_score:
+        result["classification"] = "Improdutivo"
+        result["confidence"] = 0.6
     
-    cleaned_name = re.sub(r'[._+]', ' ', email_prefix).strip()
-    cleaned_name = cleaned_name.replace('-', ' ')
-    cleaned_name = re.sub(r'\s+', ' ', cleaned_name).strip()
+    elif productive_score > improdutive_score:
+        result["confidence"] = 0.6
     
-    function_words = [
-        'admin', 'suporte', 'vendas', 'contato', 'info', 'noreply',
-        'support', 'sales', 'contact', 'no-reply', 'hello', 'hi',
-        'service', 'servico', 'atendimento', 'help', 'helpdesk',
-        'newsletter', 'notificacao', 'notificação', 'alert', 'alerta'
-    ]
-    
-    if cleaned_name.lower() in function_words:
-        return None
+    return result
+
+
+def _sender_fields(sender: str, message: str) -> Dict[str, str]:
+    """Nome e tipo do remetente para os prompts (ver `app/services/sender.py`)"""
+    identity = identify_sender(sender, message)
     
-    if not re.match(r'^[a-záàâãéèêíïóôõöúçñ0-9\s\-&]+$', cleaned_name, re.IGNORECASE):
-        return None
+    if identity is None:
+        return {"sender_name": "não informado", "sender_kind": "não informado"}
     
-    if len(cleaned_name) < 2:
-        return None
+    logger.debug("[SENDER] %s (%s, confirmado no corpo: %s)", identity.name, identity.kind, identity.confirmed)
     
-    name_appears_in_message = False
-    if message:
-        message_lower = message.lower()
-        cleaned_lower = cleaned_name.lower()
-        first_word = cleaned_name.split()[0].lower()
-        
-        sender_patterns = [
-            f"^{re.escape(first_word)}[^a-z]",  # No início (Ex: "João,")
-            f" {re.escape(first_word)}[,.]",     # No meio com pontuação
-            f"meu nome é {re.escape(cleaned_lower)}",  # Explícito - pessoa
-            f"nome da empresa é {re.escape(cleaned_lower)}",  # Explícito - empresa
-            f"somos {re.escape(cleaned_lower)}",  # Explícito - empresa
-            f"sou o {re.escape(first_word)}",  # Explícito - pessoa
-            f"eu sou o {re.escape(first_word)}",  # Explícito - pessoa
-            f"estou na {re.escape(cleaned_lower)}",  # Trabalha em empresa
-            f"da {re.escape(cleaned_lower)}",  # Vem de empresa
-            f"pela {re.escape(cleaned_lower)}",  # Pela empresa
-        ]
-        
-        for pattern in sender_patterns:
-            try:
-                if re.search(pattern, message_lower):
-                    name_appears_in_message = True
-                    break
-            except re.error:
-                # Se houver erro no padrão, ignora
-                continue
+    return {
+        "sender_name": identity.name,
+        "sender_kind": f"{identity.kind}, citado no corpo do email" if identity.confirmed else identity.kind,
+    }
+
+
+def _build_response_messages(
+    sender: str,
+    subject: str,
+    message: str,
+    classification: str
+) -> List[Dict[str, str]]:
+    """Monta as mensagens do prompt de geração de resposta"""
     
-    return cleaned_name.title() if cleaned_name else None
+    return prompts.GENERATE.render(
+        classification=classification,
+        **_sender_fields(sender, message),
+        subject=subject or "não informado",
+        message=message,
+    )
 
 
-def generate_response(
+async def generate_response(
     sender: str,
     subject: str,
     message: str,
@@ -328,85 +305,18 @@ def generate_response(
     """
     
     try:
-        sender_name = _extract_sender_name(sender, message)
-        
-        greeting_instruction = ""
-        if sender_name:
-            greeting_instruction = f"""Comece a resposta chamando {sender_name} pelo nome ou empresa.
-            Regras para identificar que '{sender_name}' é o nome/empresa correto do remetente:
-            1. O nome foi extraído do email ({sender}) e validado
-            2. Pode ser NOME DE PESSOA (apenas letras: "João Silva") ou EMPRESA (pode ter números: "Tech123")
-            3. Não contém símbolos especiais problemáticos (como pontos, underscores, +)
-            4. Não é um cargo genérico (não é 'admin', 'suporte', 'vendas' ou 'contato')
-            5. Se encontrado no corpo do email, aumenta confiança de ser realmente o nome/empresa
-            6. Padrões de validação: "Meu nome é {sender_name}", "Somos {sender_name}", "Da {sender_name}", etc
-            Use este nome na saudação inicial: "Olá {sender_name}," ou "Prezados {sender_name},"
-            """
+        messages = await run_cpu_thread(_build_response_messages, sender, subject, message, classification)
+        log_prompt("GENERATE_RESPONSE", messages[-1]["content"])
         
-        response = client.chat.completions.create(
-            model="openai/gpt-oss-20b:together",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "Você é um assistente profissional que gera respostas de email. Gere respostas completas, contextualizadas e bem estruturadas."
-                },
-                {
-                    "role": "user",
-                    "content": f"""Gere uma resposta profissional de email com 6-8 linhas.
-                    {greeting_instruction}
-                    A resposta deve ser {"positiva, construtiva e interessada" if classification == "Produtivo" else "educada, profissional mas que recusa a proposta"}.
-                    Referencie o conteúdo específico do email, não uma resposta genérica.
-                    Se houver assunto relevante, você pode citá-lo: "{subject}"
-
-                    Texto do email recebido:
-                    {message}
-
-                    Gere a resposta completa do email, sem prefácio ou explicações. A resposta deve incluir:
-                    - Saudação e agradecimento pelo contato
-                    - Referência ao conteúdo específico
-                    - Seu posicionamento (positivo se Produtivo, recusa educada se Improdutivo)
-                    - Menção que retornarão com feedback completo em breve
-                    - Fechamento profissional
-                    A resposta não deve incluir assinatura, nome, empresa ou contato fictico no final.
-                    
-                    Regras:
-                    - Não pode deixar frases incompletas.
-                    - Não pode gerar respostas genéricas ou vagas.
-                    - Deve sedmpre enviar o texto.
-                    - Deve sempre pontuar corretamente as frases.
-                    - deve haver ao menos 6 linhas na resposta.
-                    - Não pode haver mais de 10 linhas de respostas, ela deve ser completa no limite recomendado.
-                    
-                    Exemplo de resposta produtiva:
-                    Olá,
-
-                    Recebemos sua mensagem e analisamos as informações relacionadas ao prazo, escopo e pontos levantados.
-                    Alguns detalhes mencionados exigem uma validação interna antes de um posicionamento definitivo.
-                    Neste momento, estamos revisando os impactos e alinhamentos necessários sobre o tema apresentado.
-                    Em breve, retornaremos com uma resposta mais completa e direcionada ao seu pedido.
-                    Caso seja necessário complementar alguma informação, entraremos em contato.
-                    Agradecemos a compreensão e seguimos à disposição.
-
-                    Atenciosamente
-                    
-                    Exemplo de resposta improdutiva:
-                    A mensagem foi recebida e as informações apresentadas foram consideradas.
-                    No momento, o conteúdo não demanda qualquer ação ou encaminhamento adicional.
-                    Dessa forma, não haverá continuidade sobre o tema tratado.
-                    Caso surja algum ponto novo ou relevante, poderá ser enviado em um novo contato.
-                    Agradecemos a comunicação e a atenção dispensada.
-
-                    Atenciosamente
-                    
-                    """
-                }
-            ],
-            temperature=0.4
+        response = await chat_completion(
+            messages=messages,
+            temperature=0.4,
+            task="generate"
         )
         
         response_text = response.choices[0].message.content.strip()
-        logger.info(f"[GENERATE_RESPONSE] Resposta gerada (tamanho: {len(response_text)} chars)")
-        logger.info(f"[GENERATE_RESPONSE] Primeiros 150 chars: {response_text[:150]}")
+        logger.debug("[GENERATE_RESPONSE] Resposta gerada (tamanho: %d chars)", len(response_text))
+        log_payload("[GENERATE_RESPONSE] Primeiros 150 chars: %.150s", response_text)
         
         if not response_text:
             logger.warning("[GENERATE_RESPONSE] Resposta vazia recebida! Usando fallback.")
@@ -415,12 +325,119 @@ def generate_response(
         return response_text
     
     except Exception as e:
-        logger.error(f"[GENERATE_RESPONSE] Erro ao gerar resposta: {e}")
+        logger.error("[GENERATE_RESPONSE] Erro ao gerar resposta: %s", e)
         return _fallback_response(classification)
 
 
+async def generate_response_stream(
+    sender: str,
+    subject: str,
+    message: str,
+    classification: str
+) -> AsyncIterator[str]:
+    """
+    Versão em streaming de `generate_response`.
+    
+    Produz os trechos da resposta à medida que o modelo os gera. Se a
+    chamada falhar antes do primeiro trecho, ou vier vazia, produz o
+    fallback de resposta de uma vez.
+    """
+    
+    received = False
+    
+    try:
+        messages = await run_cpu_thread(_build_response_messages, sender, subject, message, classification)
+        log_prompt("GENERATE_RESPONSE", messages[-1]["content"])
+        
+        async for chunk in chat_completion_stream(
+            messages=messages,
+            temperature=0.4,
+            task="generate"
+        ):
+            if not received:
+                chunk = chunk.lstrip()
+                if not chunk:
+                    continue
+            received = True
+            yield chunk
+    
+    except Exception as e:
+        logger.error("[GENERATE_RESPONSE_STREAM] Erro ao gerar resposta: %s", e)
+        if received:
+            return
+    
+    if not received:
+        logger.warning("[GENERATE_RESPONSE_STREAM] Nenhum trecho recebido! Usando fallback.")
+        yield _fallback_response(classification)
+
+
+async def classify_and_respond(
+    text: str,
+    sender: str,
+    subject: str,
+    message: str
+) -> Dict[str, any]:
+    """
+    Modo "fused": classifica E gera a resposta em uma única chamada à IA.
+    
+    Usa um prompt com saída JSON estruturada contendo classificação,
+    confiança e resposta sugerida. O email vai uma única vez, no texto
+    original (`message`); `text` (normalizado) só é usado pelo fallback
+    de classificação. Se o JSON vier inválido, cai nos fallbacks de
+    classificação e de resposta.
+    """
+    
+    try:
+        sender_fields = await run_cpu_thread(_sender_fields, sender, message)
+        
+        messages = prompts.CLASSIFY_AND_RESPOND.render(
+            **sender_fields,
+            subject=subject or "não informado",
+            message=message,
+        )
+        
+        log_prompt("CLASSIFY_AND_RESPOND", messages[-1]["content"])
+        
+        response = await chat_completion(
+            messages=messages,
+            temperature=0.2,
+            task="classify_and_respond"
+        )
+        response_text = response.choices[0].message.content.strip()
+        
+        logger.debug("[CLASSIFY_AND_RESPOND] Tamanho da resposta: %d caracteres", len(response_text))
+        log_payload("[CLASSIFY_AND_RESPOND] Resposta da API (raw): '%s'", response_text)
+        
+        with stage_timer("json_parse"):
+            result = _extract_json_from_text(response_text)
+        
+        classification = result.get("classification", "Produtivo")
+        suggested_response = (result.get("suggested_response") or "").strip()
+        
+        if not suggested_response:
+            logger.warning("[CLASSIFY_AND_RESPOND] Resposta vazia no JSON! Usando fallback.")
+            suggested_response = _fallback_response(classification)
+        
+        return {
+            "classification": classification,
+            "confidence": float(result.get("confidence", 0.5)),
+            "suggested_response": suggested_response,
+            "success": True,
+            "engine": "llm"
+        }
+    
+    except Exception as e:
+        logger.error("[CLASSIFY_AND_RESPOND] Erro: %s", e)
+        classification_result = _fallback_classification(text)
+        classification_result["suggested_response"] = _fallback_response(
+            classification_result["classification"]
+        )
+        return classification_result
+
+
 def _fallback_response(classification: str) -> str:
     """Fallback de resposta"""
+    FALLBACKS.inc(kind="response")
     if classification == "Produtivo":
         return """Agradecemos o envio deste material.
         Analisamos o conteúdo e consideramos relevante para nossa análise.
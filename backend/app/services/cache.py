@@ -0,0 +1,185 @@
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normaliza o texto para a chave do cache (minúsculas, espaços colapsados)"""
+    return re.sub(r"\s+", " ", (text or "").lower()).strip()
+
+
+def make_cache_key(*parts: Optional[str]) -> str:
+    """
+    Gera uma chave de cache a partir de um hash SHA-256.
+
+    Cada parte é normalizada antes do hash, então variações de caixa e
+    espaçamento produzem a mesma chave.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(normalize_text(part or "").encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Cache de resultados em dois níveis.
+
+    - Memória: LRU com TTL, limitado por `max_entries`
+    - Disco (opcional): SQLite em `db_path`, compartilhado entre processos;
+      as linhas expiradas são apagadas a cada `prune_interval` segundos
+
+    Com o disco ativo, `get` e `set` fazem I/O bloqueante: no event loop,
+    chame-os via `run_blocking`.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, db_path: str = "", prune_interval: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.prune_interval = prune_interval
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._last_prune = 0.0
+        self.stats_counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "pruned": 0,
+        }
+
+        self._db_path = db_path
+
+        if db_path:
+            self._open_db()
+
+    def _open_db(self) -> None:
+        self._db = sqlite3.connect(self._db_path, check_same_thread=False, timeout=30)
+        # WAL: leitores não bloqueiam a escrita dos outros workers e cada commit custa menos
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_created_at ON results (created_at)")
+        self._db.commit()
+
+    @property
+    def disk_enabled(self) -> bool:
+        return self._db is not None
+
+    def reopen(self) -> None:
+        """
+        Abre uma conexão SQLite própria no processo atual.
+
+        Chamado nos workers após o fork: conexões SQLite não podem ser
+        compartilhadas entre processos.
+        """
+        if self._db_path:
+            self._lock = threading.Lock()
+            self._open_db()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Busca um resultado (memória primeiro, depois disco)"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if now - created_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.stats_counters["memory_hits"] += 1
+                    CACHE_LOOKUPS.inc(result="memory_hit")
+                    return dict(value)
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] <= self.ttl:
+                    value = json.loads(row[0])
+                    self._store_in_memory(key, value, row[1])
+                    self.stats_counters["disk_hits"] += 1
+                    CACHE_LOOKUPS.inc(result="disk_hit")
+                    return dict(value)
+
+            self.stats_counters["misses"] += 1
+            CACHE_LOOKUPS.inc(result="miss")
+            return None
+
+    def set(self, key: str, value: Dict) -> None:
+        """Armazena um resultado nos dois níveis"""
+        now = time.time()
+
+        with self._lock:
+            self._store_in_memory(key, value, now)
+            self.stats_counters["sets"] += 1
+
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO results (key, value, created_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(value, ensure_ascii=False), now)
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.warning("[CACHE] Erro ao gravar no disco: %s", e)
+
+                if now - self._last_prune >= self.prune_interval:
+                    self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        """Apaga do disco os resultados expirados (chamado com o lock adquirido)"""
+        self._last_prune = now
+        try:
+            cursor = self._db.execute("DELETE FROM results WHERE created_at < ?", (now - self.ttl,))
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning("[CACHE] Erro ao apagar resultados expirados: %s", e)
+            return
+
+        if cursor.rowcount:
+            self.stats_counters["pruned"] += cursor.rowcount
+            logger.info("[CACHE] %d resultados expirados apagados do disco", cursor.rowcount)
+
+    def _store_in_memory(self, key: str, value: Dict, created_at: float) -> None:
+        self._entries[key] = (created_at, dict(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, any]:
+        """Retorna contadores de hit/miss e tamanho atual"""
+        with self._lock:
+            hits = self.stats_counters["memory_hits"] + self.stats_counters["disk_hits"]
+            lookups = hits + self.stats_counters["misses"]
+            return {
+                **self.stats_counters,
+                "entries": len(self._entries),
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "disk_enabled": self._db is not None,
+            }
+
+
+result_cache = ResultCache(
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    ttl=settings.CACHE_TTL,
+    db_path=settings.CACHE_DB_PATH,
+    prune_interval=settings.CACHE_PRUNE_INTERVAL,
+)
@@ -0,0 +1,448 @@
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from app.core.config import settings
+from app.core.executor import run_blocking, run_cpu, run_cpu_thread
+from app.core.metrics import register_gauge
+from app.schemas.email import ClassificationResponse
+from app.services.pipeline import extract_subject_and_sender, process_email
+from app.services.text_extractor import extract_text_from_file
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class InvalidCallbackError(ValueError):
+    """URL de callback recusada: esquema inválido, host fora da lista ou endereço interno"""
+
+
+def _remove_job_file(job: Dict[str, any]) -> None:
+    path = job["payload"].get("path")
+    if job["kind"] == "file" and path and os.path.exists(path):
+        os.unlink(path)
+
+
+class JobQueue:
+    """
+    Fila de jobs persistente em SQLite.
+
+    O arquivo pode ser compartilhado por vários processos (workers do
+    servidor): a retirada de um job é feita em uma transação IMMEDIATE,
+    então cada job é entregue a um único worker.
+    """
+
+    def __init__(self, db_path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, "
+            "payload TEXT NOT NULL, result TEXT, error TEXT, callback_url TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, "
+            "started_at REAL, finished_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def enqueue(self, kind: str, payload: Dict[str, any], callback_url: Optional[str] = None) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, kind, status, payload, callback_url, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, json.dumps(payload, ensure_ascii=False), callback_url, time.time())
+            )
+        return job_id
+
+    def claim(self) -> Optional[Dict[str, any]]:
+        """Retira o job mais antigo da fila e o marca como em execução"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is None:
+                    self._db.execute("COMMIT")
+                    return None
+                started_at = time.time()
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                    (RUNNING, started_at, row["id"])
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+        job = self._to_dict(row)
+        job.update(status=RUNNING, started_at=started_at, attempts=job["attempts"] + 1)
+        return job
+
+    def finish(self, job_id: str, result: Optional[Dict] = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (
+                    FAILED if error else DONE,
+                    None if result is None else json.dumps(result, ensure_ascii=False),
+                    error,
+                    time.time(),
+                    job_id,
+                )
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, any]]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return None if row is None else self._to_dict(row)
+
+    def recover(self, stale_after: float, max_attempts: int) -> int:
+        """
+        Devolve à fila jobs "running" abandonados (ex.: processo reiniciado
+        no meio da execução); os que já esgotaram as tentativas falham.
+        """
+        cutoff = time.time() - stale_after
+        with self._lock:
+            failed = self._db.execute(
+                "SELECT * FROM jobs WHERE status = ? AND started_at < ? AND attempts >= ?",
+                (RUNNING, cutoff, max_attempts)
+            ).fetchall()
+            self._db.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                "WHERE status = ? AND started_at < ? AND attempts >= ?",
+                (FAILED, "Job interrompido", time.time(), RUNNING, cutoff, max_attempts)
+            )
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ? WHERE status = ? AND started_at < ?",
+                (QUEUED, RUNNING, cutoff)
+            )
+
+        # Jobs que não voltam à fila não precisam mais do arquivo enviado
+        for row in failed:
+            _remove_job_file(self._to_dict(row))
+
+        return cursor.rowcount
+
+    def purge(self, older_than: float) -> int:
+        """Remove jobs concluídos há mais de `older_than` segundos"""
+        cutoff = time.time() - older_than
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (DONE, FAILED, cutoff)
+            )
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = None if job["result"] is None else json.loads(job["result"])
+        return job
+
+
+_queue: Optional[JobQueue] = None
+_workers: List[asyncio.Task] = []
+_wake_up: Optional[asyncio.Event] = None
+# Última contagem de jobs por estado; o /metrics lê daqui, sem consultar o SQLite
+_counts: Dict[str, int] = {}
+
+
+def get_queue() -> JobQueue:
+    global _queue
+
+    if _queue is None:
+        os.makedirs(os.path.dirname(settings.JOBS_DB_PATH) or ".", exist_ok=True)
+        _queue = JobQueue(settings.JOBS_DB_PATH)
+
+    return _queue
+
+
+def new_job_file_path(filename: str) -> str:
+    """Caminho onde o arquivo de um job de upload fica até ser processado"""
+    os.makedirs(settings.JOBS_FILES_DIR, exist_ok=True)
+    return os.path.join(settings.JOBS_FILES_DIR, uuid.uuid4().hex + os.path.splitext(filename)[1])
+
+
+def save_job_file(source: BinaryIO, path: str) -> None:
+    """Copia o upload para o diretório de jobs (executado fora do event loop)"""
+    source.seek(0)
+    with open(path, "wb") as target:
+        shutil.copyfileobj(source, target, settings.UPLOAD_CHUNK_SIZE)
+
+
+def _host_allowed(host: str, allowed: List[str]) -> bool:
+    host = host.lower().rstrip(".")
+    return any(
+        host == entry or (entry.startswith(".") and host.endswith(entry))
+        for entry in (entry.lower() for entry in allowed)
+    )
+
+
+def validate_callback_url(url: str) -> Optional[str]:
+    """
+    Recusa callbacks que fariam o servidor acessar a rede interna (SSRF).
+
+    Só http e https são aceitos. Com `settings.JOB_CALLBACK_ALLOWED_HOSTS`,
+    o host precisa estar na lista (".example.com" aceita os subdomínios);
+    sem ela, todos os endereços do host precisam ser públicos (nada de
+    loopback, rede privada, link-local, onde ficam os endpoints de
+    metadados das nuvens, ou multicast). Resolve o DNS: deve ser chamada
+    fora do event loop.
+
+    Returns:
+        O endereço IP validado, ao qual o envio deve se conectar (o DNS
+        pode mudar entre a validação e a conexão); None para hosts da
+        lista de permitidos.
+
+    Raises:
+        InvalidCallbackError: Se a URL for recusada.
+    """
+    parts = urlsplit(url)
+
+    try:
+        port = parts.port
+    except ValueError:
+        raise InvalidCallbackError("Porta inválida na callback_url")
+
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise InvalidCallbackError("callback_url deve ser uma URL http ou https")
+
+    if settings.JOB_CALLBACK_ALLOWED_HOSTS:
+        if not _host_allowed(parts.hostname, settings.JOB_CALLBACK_ALLOWED_HOSTS):
+            raise InvalidCallbackError(f"Host de callback não permitido: {parts.hostname}")
+        return None
+
+    try:
+        addresses = socket.getaddrinfo(
+            parts.hostname, port or (443 if parts.scheme == "https" else 80), proto=socket.IPPROTO_TCP
+        )
+    except (socket.gaierror, UnicodeError):
+        raise InvalidCallbackError(f"Host de callback não encontrado: {parts.hostname}")
+
+    for *_, sockaddr in addresses:
+        address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+        if not address.is_global or address.is_multicast:
+            raise InvalidCallbackError(f"Host de callback aponta para endereço interno: {parts.hostname}")
+
+    return addresses[0][4][0].split("%")[0]
+
+
+def _pinned_request(url: str, address: Optional[str]) -> Tuple[str, Dict[str, str], Dict[str, str]]:
+    """
+    URL, cabeçalhos e extensões do httpx para enviar a `url` conectando em `address`.
+
+    O host original segue no cabeçalho Host e no SNI (que o httpx também
+    usa para verificar o certificado), então HTTPS continua valendo.
+
+    Returns:
+        Tupla (url, cabeçalhos, extensões).
+    """
+    if address is None:
+        return url, {}, {}
+
+    parts = urlsplit(url)
+    userinfo, _, host_port = parts.netloc.rpartition("@")
+    host = f"[{address}]" if ":" in address else address
+    netloc = host if parts.port is None else f"{host}:{parts.port}"
+    if userinfo:
+        netloc = f"{userinfo}@{netloc}"
+
+    return urlunsplit(parts._replace(netloc=netloc)), {"Host": host_port}, {"sni_hostname": parts.hostname}
+
+
+async def submit(kind: str, payload: Dict[str, any], callback_url: Optional[str] = None) -> str:
+    """Grava o job na fila e acorda um worker deste processo"""
+    queue = get_queue()
+    job_id = await run_blocking(queue.enqueue, kind, payload, callback_url)
+    if _wake_up is not None:
+        _wake_up.set()
+    return job_id
+
+
+async def get_job(job_id: str) -> Optional[Dict[str, any]]:
+    return await run_blocking(get_queue().get, job_id)
+
+
+async def _run_job(job: Dict[str, any]) -> Dict[str, any]:
+    payload = job["payload"]
+    start = time.perf_counter()
+
+    if job["kind"] == "file":
+        text = await run_cpu(extract_text_from_file, payload["path"], payload["filename"])
+        if not text or not text.strip():
+            raise ValueError("Não foi possível extrair texto do arquivo")
+        subject, sender = await run_cpu_thread(extract_subject_and_sender, text)
+        message = text
+    else:
+        sender = payload.get("sender")
+        subject = payload.get("subject") or ""
+        message = payload["message"]
+        text = f"{subject} {message}"
+
+    result = await process_email(
+        text=text,
+        sender=sender,
+        subject=subject,
+        message=message,
+        use_cache=payload.get("use_cache", True)
+    )
+
+    if not result.get("success"):
+        raise RuntimeError("Erro ao classificar email")
+
+    return ClassificationResponse.from_result(
+        result,
+        sender=sender or None,
+        subject=subject,
+        processing_time=round(time.perf_counter() - start, 3)
+    ).model_dump()
+
+
+async def _send_callback(job: Dict[str, any]) -> None:
+    """Envia o estado final do job para a URL de callback (uma tentativa)"""
+    import httpx
+
+    # Validada de novo no envio e a conexão vai para o IP validado: um host
+    # com DNS trocado (rebinding) não alcança a rede interna
+    try:
+        address = await run_blocking(validate_callback_url, job["callback_url"])
+    except InvalidCallbackError as e:
+        logger.warning("[JOBS] Callback do job %s recusado: %s", job["id"], e)
+        return
+
+    body = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "result": job["result"],
+        "error": job["error"],
+    }
+
+    url, headers, extensions = _pinned_request(job["callback_url"], address)
+
+    try:
+        async with httpx.AsyncClient(timeout=settings.JOB_CALLBACK_TIMEOUT, follow_redirects=False) as client:
+            response = await client.post(url, json=body, headers=headers, extensions=extensions)
+            response.raise_for_status()
+    except Exception as e:
+        logger.warning("[JOBS] Callback do job %s falhou: %s", job["id"], e)
+
+
+async def _worker(number: int) -> None:
+    queue = get_queue()
+
+    while True:
+        job = await run_blocking(queue.claim)
+
+        if job is None:
+            _wake_up.clear()
+            try:
+                await asyncio.wait_for(_wake_up.wait(), settings.JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        logger.info("[JOBS] Worker %d executando job %s (%s)", number, job["id"], job["kind"])
+
+        try:
+            result = await _run_job(job)
+            await run_blocking(queue.finish, job["id"], result)
+            job.update(status=DONE, result=result, error=None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("[JOBS] Job %s falhou: %s", job["id"], e)
+            await run_blocking(queue.finish, job["id"], None, str(e))
+            job.update(status=FAILED, result=None, error=str(e))
+        finally:
+            if job["status"] != RUNNING:
+                _remove_job_file(job)
+
+        if job["callback_url"]:
+            await _send_callback(job)
+
+
+async def _maintenance() -> None:
+    """Recupera jobs abandonados e remove os antigos, periodicamente"""
+    queue = get_queue()
+
+    while True:
+        try:
+            recovered = await run_blocking(queue.recover, settings.JOB_STALE_AFTER, settings.JOB_MAX_ATTEMPTS)
+            if recovered:
+                logger.warning("[JOBS] %d job(s) abandonado(s) devolvido(s) à fila", recovered)
+                _wake_up.set()
+            await run_blocking(queue.purge, settings.JOB_RETENTION)
+        except Exception as e:
+            logger.error("[JOBS] Erro na manutenção da fila: %s", e)
+
+        await asyncio.sleep(60)
+
+
+async def _count_jobs() -> None:
+    """Atualiza `_counts` a cada `settings.JOB_COUNTS_INTERVAL` segundos"""
+    global _counts
+
+    queue = get_queue()
+
+    while True:
+        try:
+            _counts = await run_blocking(queue.counts)
+        except Exception as e:
+            logger.error("[JOBS] Erro ao contar jobs: %s", e)
+
+        await asyncio.sleep(settings.JOB_COUNTS_INTERVAL)
+
+
+def start_workers() -> None:
+    """Inicia `settings.JOB_WORKERS` workers neste processo (chamado no startup)"""
+    global _wake_up
+
+    if not settings.JOBS_ENABLED or _workers:
+        return
+
+    _wake_up = asyncio.Event()
+    _workers.append(asyncio.create_task(_maintenance()))
+    _workers.append(asyncio.create_task(_count_jobs()))
+    for number in range(settings.JOB_WORKERS):
+        _workers.append(asyncio.create_task(_worker(number)))
+
+
+async def stop_workers() -> None:
+    """
+    Interrompe os workers (chamado no shutdown). Jobs em execução ficam como
+    "running" e voltam para a fila pela manutenção após `JOB_STALE_AFTER`.
+    """
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+register_gauge(
+    "jobs",
+    "Jobs na fila por estado",
+    ["status"],
+    lambda: {(status,): count for status, count in _counts.items()},
+)
@@ -0,0 +1,118 @@
+import json
+import logging
+import re
+from typing import Dict, Iterable, List, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _build_trie_pattern(terms: Iterable[str]) -> str:
+    """
+    Monta uma alternância de regex fatorada por prefixo (trie).
+
+    Com milhares de termos, `(?:abc|abd|...)` testaria cada alternativa em
+    cada posição do texto; a trie compartilha prefixos e o custo por
+    posição passa a depender só do tamanho do termo, não da quantidade.
+    Espaços nos termos casam com qualquer sequência de espaços.
+    """
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def to_pattern(node: Dict[str, dict]) -> str:
+        is_end = "" in node
+        branches = []
+        for char in sorted(c for c in node if c):
+            piece = r"\s+" if char == " " else re.escape(char)
+            branches.append(piece + to_pattern(node[char]))
+
+        if not branches:
+            return ""
+
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if is_end:
+            body = "(?:" + body + ")?"
+        return body
+
+    return to_pattern(trie)
+
+
+class KeywordMatcher:
+    """
+    Casamento de várias palavras-chave com pesos em uma única varredura.
+
+    Todos os termos são compilados uma vez em um único regex com limites
+    de palavra ("meta" não casa dentro de "metade"). O texto é percorrido
+    uma vez, independente do tamanho do léxico.
+    """
+
+    def __init__(self, lexicon: Dict[str, Dict[str, float]]):
+        self.categories = list(lexicon)
+        self._terms: Dict[str, List[Tuple[str, float]]] = {}
+
+        for category, terms in lexicon.items():
+            for term, weight in terms.items():
+                key = " ".join(term.lower().split())
+                if key:
+                    self._terms.setdefault(key, []).append((category, float(weight)))
+
+        pattern = _build_trie_pattern(self._terms)
+        self._regex = re.compile(rf"(?<!\w)(?:{pattern})(?!\w)") if pattern else None
+
+    @classmethod
+    def from_file(cls, path: str) -> "KeywordMatcher":
+        """
+        Carrega o léxico de um arquivo JSON no formato:
+        {"Categoria": {"termo": peso, ...}, ...}
+        """
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def match(self, text: str) -> Dict[str, any]:
+        """
+        Procura os termos do léxico no texto.
+
+        Returns:
+            Dicionário com:
+            - scores: soma dos pesos encontrados por categoria
+            - matches: termos encontrados por categoria, com a contagem
+        """
+        scores = {category: 0.0 for category in self.categories}
+        matches: Dict[str, Dict[str, int]] = {category: {} for category in self.categories}
+
+        if self._regex is None or not text:
+            return {"scores": scores, "matches": matches}
+
+        # Minúsculas uma vez: o regex sem IGNORECASE é cerca de 2x mais rápido
+        for found in self._regex.finditer(text.lower()):
+            key = " ".join(found.group(0).split())
+            for category, weight in self._terms.get(key, ()):
+                scores[category] += weight
+                matches[category][key] = matches[category].get(key, 0) + 1
+
+        return {"scores": scores, "matches": matches}
+
+    def weighted_spans(self, text: str) -> List[Tuple[int, float]]:
+        """
+        Posição e peso total (somando as categorias) de cada termo encontrado.
+
+        Usado para pontuar trechos do texto sem uma varredura por trecho.
+        """
+        if self._regex is None or not text:
+            return []
+
+        spans = []
+        for found in self._regex.finditer(text.lower()):
+            key = " ".join(found.group(0).split())
+            weight = sum(w for _, w in self._terms.get(key, ()))
+            if weight:
+                spans.append((found.start(), weight))
+        return spans
+
+
+keyword_matcher = KeywordMatcher.from_file(settings.KEYWORDS_PATH)
@@ -0,0 +1,257 @@
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import (
+    LLM_ERRORS,
+    LLM_FAILOVERS,
+    LLM_HEDGES,
+    LLM_REQUEST_DURATION,
+    LLM_RETRIES,
+    LLM_SHORT_CIRCUITS,
+    LLM_TIMEOUTS,
+    LLM_TOKENS,
+    observe_stage,
+)
+from app.services.resilience import CircuitOpenError, call_with_resilience, is_retryable
+from app.services.routing import Endpoint, get_router
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+_clients: Dict[Tuple[str, str], "AsyncOpenAI"] = {}
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def get_client(endpoint: Endpoint) -> "AsyncOpenAI":
+    """
+    Retorna o cliente assíncrono do endpoint.
+
+    Os clientes são criados sob demanda, um por par (URL, chave), cada um
+    com um único pool de conexões httpx e timeouts/limites de `Settings`.
+    """
+    key = (endpoint.base_url, endpoint.api_key)
+    client = _clients.get(key)
+
+    if client is None:
+        import httpx
+        from openai import AsyncOpenAI
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(
+                settings.LLM_TIMEOUT,
+                connect=settings.LLM_CONNECT_TIMEOUT,
+            ),
+        )
+        client = _clients[key] = AsyncOpenAI(
+            base_url=endpoint.base_url,
+            api_key=endpoint.api_key,
+            http_client=http_client,
+            timeout=settings.LLM_TIMEOUT,
+            max_retries=0,
+        )
+
+    return client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Semáforo que limita as chamadas simultâneas ao LLM neste processo"""
+    global _semaphore
+
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+
+    return _semaphore
+
+
+def _record_error(task: str, error: Exception) -> None:
+    if isinstance(error, asyncio.TimeoutError) or "Timeout" in type(error).__name__:
+        LLM_TIMEOUTS.inc(task=task)
+    else:
+        LLM_ERRORS.inc(task=task)
+
+
+def _record_duration(task: str, start: float) -> None:
+    elapsed = time.perf_counter() - start
+    LLM_REQUEST_DURATION.observe(elapsed, task=task)
+    observe_stage(f"{task}_llm", elapsed)
+
+
+async def _with_failover(
+    task: str,
+    call: Callable[[Endpoint], Awaitable],
+    hedge_delay: Optional[float] = None,
+) -> Tuple[Endpoint, object]:
+    """
+    Executa `call` no melhor endpoint da tarefa, passando para o próximo
+    em erros transitórios ou circuito aberto.
+
+    O prazo `settings.LLM_DEADLINE` vale para o conjunto das tentativas
+    em todos os endpoints.
+    """
+    expires_at = time.monotonic() + settings.LLM_DEADLINE if settings.LLM_DEADLINE > 0 else None
+    last_error: Optional[Exception] = None
+
+    for endpoint in get_router().candidates(task):
+        remaining = 0.0
+        if expires_at is not None:
+            remaining = expires_at - time.monotonic()
+            if remaining <= 0:
+                break
+
+        if last_error is not None:
+            LLM_FAILOVERS.inc(task=task)
+            logger.warning("[FAILOVER] %s: tentando %s após %s", task, endpoint.name, type(last_error).__name__)
+
+        try:
+            result = await call_with_resilience(
+                lambda: call(endpoint),
+                endpoint.breaker,
+                deadline=remaining,
+                hedge_delay=hedge_delay,
+                on_retry=lambda n, e: LLM_RETRIES.inc(task=task),
+                on_hedge=lambda: LLM_HEDGES.inc(task=task),
+            )
+            return endpoint, result
+        except CircuitOpenError as e:
+            LLM_SHORT_CIRCUITS.inc(task=task)
+            last_error = e
+        except asyncio.TimeoutError as e:
+            LLM_TIMEOUTS.inc(task=task)
+            last_error = e
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            last_error = e
+
+    raise last_error or CircuitOpenError(f"Nenhum endpoint disponível para {task}")
+
+
+async def chat_completion(
+    messages: List[Dict[str, str]],
+    temperature: float,
+    task: str,
+):
+    """
+    Executa uma chamada de chat completion sem bloquear o event loop.
+
+    O modelo e o endpoint são escolhidos pelo roteador a partir da tarefa
+    (ver `app.services.routing`). Cada endpoint passa pela camada de
+    resiliência (ver `app.services.resilience`): novas tentativas com
+    jitter, disjuntor e hedging opcional; em erros transitórios a chamada
+    segue para o próximo endpoint da rota.
+
+    Args:
+        messages: Mensagens no formato da API OpenAI
+        temperature: Temperatura de amostragem
+        task: Tarefa da chamada ("classify", "generate", ...), usada no
+            roteamento e nas métricas
+
+    Returns:
+        Objeto de resposta da API.
+
+    Raises:
+        CircuitOpenError: se nenhum endpoint da rota estiver disponível
+        asyncio.TimeoutError: se `settings.LLM_DEADLINE` se esgotar
+    """
+
+    async def attempt(endpoint: Endpoint):
+        async with _get_semaphore():
+            endpoint.outstanding += 1
+            start = time.perf_counter()
+            try:
+                response = await get_client(endpoint).chat.completions.create(
+                    model=endpoint.model,
+                    messages=messages,
+                    temperature=temperature,
+                )
+            except Exception as e:
+                _record_error(task, e)
+                raise
+            finally:
+                endpoint.outstanding -= 1
+                _record_duration(task, start)
+
+            endpoint.record_latency(time.perf_counter() - start)
+            return response
+
+    _, response = await _with_failover(task, attempt)
+
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        LLM_TOKENS.inc(usage.prompt_tokens or 0, task=task, type="prompt")
+        LLM_TOKENS.inc(usage.completion_tokens or 0, task=task, type="completion")
+
+    return response
+
+
+async def chat_completion_stream(
+    messages: List[Dict[str, str]],
+    temperature: float,
+    task: str,
+) -> AsyncIterator[str]:
+    """
+    Executa uma chamada de chat completion em modo streaming.
+
+    Produz os trechos de texto (deltas) à medida que chegam. A vaga no
+    semáforo de concorrência fica ocupada até o fim do stream.
+
+    Só a abertura do stream tem novas tentativas, failover e prazo (depois
+    do primeiro trecho não dá para repetir sem duplicar texto); entre
+    trechos vale o timeout de leitura do cliente (`settings.LLM_TIMEOUT`).
+    Não há hedging em streams.
+    """
+    endpoint: Optional[Endpoint] = None
+
+    async with _get_semaphore():
+        start = time.perf_counter()
+        try:
+            endpoint, stream = await _with_failover(
+                task,
+                lambda e: get_client(e).chat.completions.create(
+                    model=e.model,
+                    messages=messages,
+                    temperature=temperature,
+                    stream=True,
+                ),
+                hedge_delay=0,
+            )
+            endpoint.record_latency(time.perf_counter() - start)
+            endpoint.outstanding += 1
+            try:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+            finally:
+                endpoint.outstanding -= 1
+        except Exception as e:
+            if endpoint is not None:
+                _record_error(task, e)
+                # Falhas na abertura já foram contadas pela camada de resiliência
+                if is_retryable(e):
+                    endpoint.breaker.record_failure()
+            elif not isinstance(e, (CircuitOpenError, asyncio.TimeoutError)):
+                _record_error(task, e)
+            raise
+        finally:
+            _record_duration(task, start)
+
+
+async def close_client() -> None:
+    """Fecha os pools de conexões (chamado no shutdown da aplicação)"""
+    clients = list(_clients.values())
+    _clients.clear()
+
+    for client in clients:
+        await client.close()
@@ -0,0 +1,206 @@
+import hashlib
+import logging
+import os
+import threading
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LABELS = ("Improdutivo", "Produtivo")
+
+_classifier: Optional["LocalClassifier"] = None
+_classifier_loaded = False
+_classifier_lock = threading.Lock()
+
+
+def _hash_ngrams(text: str, n_features: int, ngram_max: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converte o texto lematizado em features de n-gramas com hashing.
+
+    Usa CRC32 (estável entre processos, ao contrário de `hash`) e o bit
+    mais alto como sinal, para reduzir o viés das colisões.
+
+    Returns:
+        Tupla (índices, valores) com TF logarítmico normalizado (L2).
+    """
+    tokens = text.split()
+    counts: Dict[int, float] = {}
+
+    for n in range(1, ngram_max + 1):
+        for i in range(len(tokens) - n + 1):
+            hashed = zlib.crc32(" ".join(tokens[i:i + n]).encode("utf-8"))
+            index = hashed % n_features
+            sign = 1.0 if hashed & 0x80000000 else -1.0
+            counts[index] = counts.get(index, 0.0) + sign
+
+    if not counts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    values = np.sign(values) * np.log1p(np.abs(values))
+
+    norm = np.linalg.norm(values)
+    if norm > 0:
+        values /= norm
+
+    return indices, values
+
+
+class LocalClassifier:
+    """
+    Classificador linear local (regressão logística sobre n-gramas com hashing).
+
+    Trabalha sobre a saída lematizada de `preprocess_text`. Os pesos ficam
+    em um array NumPy e a classificação de um email leva microssegundos.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: float, ngram_max: int = 2):
+        self.weights = weights.astype(np.float32)
+        self.bias = float(bias)
+        self.ngram_max = ngram_max
+
+        # Identifica o modelo (pesos e hiperparâmetros) nas chaves de cache
+        digest = hashlib.sha256(self.weights.tobytes())
+        digest.update(f"{self.bias!r}/{self.ngram_max}".encode("utf-8"))
+        self.digest = digest.hexdigest()[:16]
+
+    @property
+    def n_features(self) -> int:
+        return self.weights.shape[0]
+
+    def predict_proba(self, text: str) -> float:
+        """Probabilidade de o email ser Produtivo"""
+        indices, values = _hash_ngrams(text, self.n_features, self.ngram_max)
+        score = float(np.dot(self.weights[indices], values)) + self.bias
+        return float(1.0 / (1.0 + np.exp(-score)))
+
+    def classify(self, text: str) -> Dict[str, any]:
+        """Classifica no mesmo formato de `classify_email`"""
+        probability = self.predict_proba(text)
+        label = int(probability >= 0.5)
+
+        return {
+            "classification": LABELS[label],
+            "confidence": round(probability if label else 1.0 - probability, 4),
+            "success": True,
+            "engine": "local",
+        }
+
+    def save(self, path: str) -> None:
+        """Exporta o modelo em formato .npz"""
+        np.savez_compressed(
+            path,
+            weights=self.weights,
+            bias=np.array([self.bias], dtype=np.float32),
+            ngram_max=np.array([self.ngram_max], dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "LocalClassifier":
+        """Carrega um modelo exportado por `save`"""
+        with np.load(path) as data:
+            return cls(
+                weights=data["weights"],
+                bias=float(data["bias"][0]),
+                ngram_max=int(data["ngram_max"][0]),
+            )
+
+
+def train(
+    texts: Sequence[str],
+    labels: Sequence[str],
+    n_features: int = 2 ** 18,
+    ngram_max: int = 2,
+    epochs: int = 200,
+    learning_rate: float = 0.5,
+    l2: float = 1e-4,
+) -> LocalClassifier:
+    """
+    Treina o classificador com gradiente descendente em lote completo.
+
+    Args:
+        texts: Textos já processados por `preprocess_text`
+        labels: "Produtivo" ou "Improdutivo" para cada texto
+        n_features: Tamanho do espaço de hashing
+        ngram_max: Maior n-grama usado (1 = só unigramas)
+        epochs: Número de épocas
+        learning_rate: Taxa de aprendizado
+        l2: Regularização L2
+
+    Returns:
+        Classificador treinado.
+    """
+    y = np.array([LABELS.index(label) for label in labels], dtype=np.float32)
+
+    rows: List[np.ndarray] = []
+    all_indices: List[np.ndarray] = []
+    all_values: List[np.ndarray] = []
+    for row, text in enumerate(texts):
+        indices, values = _hash_ngrams(text, n_features, ngram_max)
+        rows.append(np.full(len(indices), row, dtype=np.int64))
+        all_indices.append(indices)
+        all_values.append(values)
+
+    row_ids = np.concatenate(rows)
+    indices = np.concatenate(all_indices)
+    values = np.concatenate(all_values)
+
+    weights = np.zeros(n_features, dtype=np.float32)
+    bias = 0.0
+    n_samples = len(y)
+
+    for _ in range(epochs):
+        scores = np.bincount(row_ids, weights=weights[indices] * values, minlength=n_samples) + bias
+        errors = 1.0 / (1.0 + np.exp(-scores)) - y
+
+        gradient = np.bincount(indices, weights=values * errors[row_ids], minlength=n_features)
+        weights -= learning_rate * (gradient / n_samples + l2 * weights).astype(np.float32)
+        bias -= learning_rate * float(errors.mean())
+
+    return LocalClassifier(weights=weights, bias=bias, ngram_max=ngram_max)
+
+
+def get_local_classifier() -> Optional[LocalClassifier]:
+    """
+    Retorna o classificador local, carregando-o na primeira chamada.
+
+    Retorna None se não houver modelo em `settings.LOCAL_CLASSIFIER_PATH`.
+    """
+    global _classifier, _classifier_loaded
+
+    if not _classifier_loaded:
+        with _classifier_lock:
+            if not _classifier_loaded:
+                if os.path.exists(settings.LOCAL_CLASSIFIER_PATH):
+                    _classifier = LocalClassifier.load(settings.LOCAL_CLASSIFIER_PATH)
+                    logger.info(f"Classificador local carregado: {settings.LOCAL_CLASSIFIER_PATH}")
+                else:
+                    logger.warning(
+                        f"Classificador local não encontrado em {settings.LOCAL_CLASSIFIER_PATH}. "
+                        f"Execute: python scripts/train_classifier.py"
+                    )
+                _classifier_loaded = True
+
+    return _classifier
+
+
+def classifier_signature() -> str:
+    """
+    Backend de classificação, limiar e hash do modelo local em uso.
+
+    Entra na chave do cache de resultados e no contexto do índice de
+    quase-duplicatas: trocar o backend ou retreinar o modelo invalida as
+    classificações guardadas.
+    """
+    if settings.CLASSIFIER_BACKEND == "llm":
+        return "llm"
+
+    classifier = get_local_classifier()
+    digest = classifier.digest if classifier is not None else "sem-modelo"
+    return f"{settings.CLASSIFIER_BACKEND}/{settings.LOCAL_CLASSIFIER_THRESHOLD}/{digest}"
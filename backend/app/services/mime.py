@@ -0,0 +1,260 @@
+import html
+import re
+from email import policy
+from email.header import decode_header, make_header
+from email.message import EmailMessage
+from email.parser import BytesParser
+from email.utils import parseaddr
+from io import BytesIO
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from app.core.config import settings
+
+EmailSource = Union[bytes, str, BinaryIO]
+
+_PARSER = BytesParser(policy=policy.default)
+
+# Cabeçalhos em texto livre (.txt, PDF de email impresso): só o início é examinado
+_HEADER_SCAN_CHARS = 4096
+_TEXT_HEADER = re.compile(
+    r'^[ \t]*(from|de|remetente|subject|assunto)[ \t]*:[ \t]*(.*\S)',
+    re.IGNORECASE | re.MULTILINE
+)
+_EMAIL_ADDRESS = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+_HTML_DROP = re.compile(r'<(script|style|head)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_HTML_BREAK = re.compile(r'<(?:br|/p|/div|/tr|/li|/h[1-6])\b[^>]*>', re.IGNORECASE)
+_HTML_TAG = re.compile(r'<[^>]*>')
+_SPACES = re.compile(r'[ \t\r\f\v\xa0]+')
+_BLANK_LINES = re.compile(r'\n\s*\n\s*')
+
+# mboxrd: linhas ">From ", ">>From "... perdem um ">" na leitura
+_ESCAPED_FROM = re.compile(rb'^>+From ')
+_LINE_LIMIT = 64 * 1024
+
+_BOUNDARY = re.compile(rb'boundary\s*=\s*(?:"([^"]+)"|([^\s;]+))', re.IGNORECASE)
+_CONTENT_TYPE = re.compile(rb'^content-type\s*:\s*([a-z0-9.+-]+)/', re.IGNORECASE | re.MULTILINE)
+# Partes cujo conteúdo é mantido; o de todas as outras (anexos) é descartado
+_KEPT_TYPES = (b"text", b"multipart", b"message")
+
+
+class ParsedEmail(NamedTuple):
+    """Email RFC 5322 reduzido ao que a classificação usa"""
+    sender: Optional[str]
+    subject: str
+    body: str
+
+    def to_text(self) -> str:
+        """Texto com cabeçalhos "De:"/"Assunto:" (lido de volta por `extract_subject_and_sender`)"""
+        headers = []
+        if self.sender:
+            headers.append(f"De: {self.sender}")
+        if self.subject:
+            headers.append(f"Assunto: {self.subject}")
+        return "\n".join(headers) + "\n\n" + self.body if headers else self.body
+
+
+def html_to_text(markup: str) -> str:
+    """Remove tags de HTML com expressões regulares (sem montar árvore DOM)"""
+    text = _HTML_DROP.sub(" ", markup)
+    text = _HTML_BREAK.sub("\n", text)
+    text = html.unescape(_HTML_TAG.sub(" ", text))
+    text = _SPACES.sub(" ", text)
+    return _BLANK_LINES.sub("\n\n", text).strip()
+
+
+class _AttachmentFilter:
+    """
+    Descarta, linha a linha, o conteúdo das partes MIME que não são texto.
+
+    Delimitadores e cabeçalhos das partes são mantidos, então a estrutura
+    continua válida para o parser, mas o corpo dos anexos binários nunca é
+    acumulado, analisado ou decodificado.
+    """
+
+    def __init__(self):
+        self.boundaries = set()
+        self.in_headers = True
+        self.headers: List[bytes] = []
+        self.skipping = False
+
+    def keep(self, line: bytes) -> bool:
+        if self.in_headers:
+            self.headers.append(line)
+            match = _BOUNDARY.search(line)
+            if match:
+                self.boundaries.add(match.group(1) or match.group(2))
+            if line in (b"\n", b"\r\n"):
+                self.in_headers = False
+                content_type = _CONTENT_TYPE.search(b"".join(self.headers))
+                self.skipping = content_type is not None and content_type.group(1).lower() not in _KEPT_TYPES
+            return True
+
+        if self.boundaries and line.startswith(b"--"):
+            marker = line.rstrip()[2:]
+            if marker in self.boundaries:
+                # Início de parte: seguem os cabeçalhos dela
+                self.in_headers = True
+                self.headers = []
+                self.skipping = False
+                return True
+            if marker.endswith(b"--") and marker[:-2] in self.boundaries:
+                self.skipping = False
+                return True
+
+        return not self.skipping
+
+
+def _open(source: EmailSource) -> Tuple[BinaryIO, bool]:
+    if isinstance(source, bytes):
+        return BytesIO(source), True
+    if isinstance(source, str):
+        return open(source, "rb"), True
+    source.seek(0)
+    return source, False
+
+
+def _lines(stream: BinaryIO) -> Iterator[bytes]:
+    """Linhas do arquivo; linhas longas demais vêm em blocos de `_LINE_LIMIT` bytes"""
+    return iter(lambda: stream.readline(_LINE_LIMIT), b"")
+
+
+def _part_text(part: EmailMessage) -> str:
+    try:
+        return part.get_content()
+    except (LookupError, UnicodeError):
+        # Charset desconhecido ou inválido
+        payload = part.get_payload(decode=True) or b""
+        return payload.decode("latin-1")
+
+
+def _header(message: EmailMessage, name: str) -> str:
+    try:
+        return str(message.get(name, "") or "").strip()
+    except Exception:
+        # Cabeçalho malformado que o policy não consegue decodificar
+        return str(message.get_all(name, [""])[0]).strip()
+
+
+def parse_message(message: EmailMessage) -> ParsedEmail:
+    """
+    Remetente, assunto e corpo de uma mensagem já analisada.
+
+    O corpo é a parte text/plain (ou text/html, convertida por
+    `html_to_text`) escolhida por `get_body`; anexos e partes binárias
+    nunca são decodificados.
+    """
+    sender = _header(message, "From") or None
+    subject = _header(message, "Subject")
+
+    body_part = message.get_body(preferencelist=("plain", "html"))
+    if body_part is None:
+        body = ""
+    elif body_part.get_content_subtype() == "html":
+        body = html_to_text(_part_text(body_part))
+    else:
+        body = _part_text(body_part).strip()
+
+    return ParsedEmail(sender, subject, body)
+
+
+def parse_email(source: EmailSource) -> ParsedEmail:
+    """Analisa um arquivo .eml (bytes, caminho ou arquivo binário), sem o conteúdo dos anexos"""
+    stream, should_close = _open(source)
+
+    try:
+        keep = _AttachmentFilter().keep
+        raw = b"".join(line for line in _lines(stream) if keep(line))
+    finally:
+        if should_close:
+            stream.close()
+
+    return parse_message(_PARSER.parsebytes(raw))
+
+
+def _parse_mbox_message(lines: List[bytes]) -> ParsedEmail:
+    return parse_message(_PARSER.parsebytes(b"".join(lines)))
+
+
+def iter_mbox(source: EmailSource, max_message_size: Optional[int] = None) -> Iterator[ParsedEmail]:
+    """
+    Lê um arquivo mbox como gerador, uma mensagem por vez.
+
+    O arquivo é percorrido linha a linha (linhas longas em blocos de
+    64 KiB) e o conteúdo dos anexos é descartado na leitura, então a
+    memória usada não depende do tamanho da caixa. O texto de uma
+    mensagem acima de `max_message_size` bytes (padrão:
+    `settings.MBOX_MAX_MESSAGE_SIZE`) é truncado.
+    """
+    max_message_size = settings.MBOX_MAX_MESSAGE_SIZE if max_message_size is None else max_message_size
+
+    stream, should_close = _open(source)
+
+    try:
+        lines: List[bytes] = []
+        size = 0
+        started = False
+        previous_blank = True
+        keep = None
+
+        for line in _lines(stream):
+            if previous_blank and line.startswith(b"From "):
+                if started:
+                    yield _parse_mbox_message(lines)
+                lines = []
+                size = 0
+                started = True
+                previous_blank = False
+                keep = _AttachmentFilter().keep
+                continue
+
+            previous_blank = line in (b"\n", b"\r\n")
+
+            if started and size < max_message_size:
+                if _ESCAPED_FROM.match(line):
+                    line = line[1:]
+                if keep(line):
+                    lines.append(line)
+                    size += len(line)
+
+        if started:
+            yield _parse_mbox_message(lines)
+
+    finally:
+        if should_close:
+            stream.close()
+
+
+def _decode_header_value(value: str) -> str:
+    try:
+        return str(make_header(decode_header(value)))
+    except Exception:
+        return value
+
+
+def extract_subject_and_sender(text: str) -> Tuple[str, Optional[str]]:
+    """
+    Assunto e remetente de um email em texto livre.
+
+    Usa as linhas de cabeçalho "From:"/"De:"/"Remetente:" e
+    "Subject:"/"Assunto:" do início do texto (como as produzidas por
+    `ParsedEmail.to_text`); sem cabeçalho de remetente, usa o primeiro
+    endereço de email que aparecer no texto.
+    """
+    sender = None
+    subject = ""
+
+    for match in _TEXT_HEADER.finditer(text, 0, _HEADER_SCAN_CHARS):
+        name = match.group(1).lower()
+        value = _decode_header_value(match.group(2))
+        if name in ("subject", "assunto"):
+            subject = subject or value
+        elif sender is None and "@" in parseaddr(value)[1]:
+            sender = value
+
+    if sender is None:
+        email_match = _EMAIL_ADDRESS.search(text)
+        if email_match:
+            sender = email_match.group(0)
+
+    return subject, sender
@@ -0,0 +1,288 @@
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import NEAR_DUPLICATE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+# Posições da assinatura MinHash (valores de 32 bits)
+SIGNATURE_SIZE = 64
+
+_EMPTY = np.uint32(0xFFFFFFFF)
+_POSITIONS = np.arange(SIGNATURE_SIZE)
+
+# Combinação de dois unigramas em um bigrama e constantes do splitmix64
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX_MULTIPLIERS = (np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB))
+_MIX_SHIFTS = (np.uint64(30), np.uint64(27), np.uint64(31))
+_POSITION_SHIFT = np.uint64(58)
+_VALUE_MASK = np.uint64(0xFFFFFFFF)
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """Finalizador do splitmix64: espalha os 32 bits do CRC pelos 64 bits da feature"""
+    z = values + _GOLDEN
+    z = (z ^ (z >> _MIX_SHIFTS[0])) * _MIX_MULTIPLIERS[0]
+    z = (z ^ (z >> _MIX_SHIFTS[1])) * _MIX_MULTIPLIERS[1]
+    return z ^ (z >> _MIX_SHIFTS[2])
+
+
+def minhash(text: str, min_tokens: int = 1) -> Optional[bytes]:
+    """
+    Assinatura MinHash do texto lematizado (saída de `preprocess_text`).
+
+    As features são unigramas e bigramas: cada unigrama passa por CRC32
+    (estável entre processos, como em `local_classifier`), os bigramas
+    combinam os hashes vizinhos e tudo é misturado para 64 bits. Usa uma
+    única permutação: os 6 bits altos escolhem a posição da assinatura e
+    cada posição guarda o menor valor que recebeu; posições vazias copiam
+    a próxima preenchida (densificação por rotação). O custo é linear no
+    número de tokens e a fração de posições iguais entre duas assinaturas
+    estima a similaridade de Jaccard dos textos.
+
+    Returns:
+        `SIGNATURE_SIZE` valores uint32 em bytes, ou None com menos de `min_tokens` tokens.
+    """
+    tokens = text.split()
+    if not tokens or len(tokens) < min_tokens:
+        return None
+
+    unigrams = np.fromiter(map(zlib.crc32, map(str.encode, tokens)), dtype=np.uint64, count=len(tokens))
+    features = _mix(np.concatenate((unigrams, unigrams[:-1] * _GOLDEN + unigrams[1:])))
+
+    signature = np.full(SIGNATURE_SIZE, _EMPTY, dtype=np.uint32)
+    np.minimum.at(signature, (features >> _POSITION_SHIFT).astype(np.intp), (features & _VALUE_MASK).astype(np.uint32))
+
+    filled = np.flatnonzero(signature != _EMPTY)
+    if len(filled) < SIGNATURE_SIZE:
+        source = filled[np.searchsorted(filled, _POSITIONS) % len(filled)]
+        offset = ((source - _POSITIONS) % SIGNATURE_SIZE).astype(np.uint32)
+        signature = signature[source] + offset * np.uint32(0x9E3779B9)
+
+    return signature.tobytes()
+
+
+def similarity(a: bytes, b: bytes) -> float:
+    """Fração de posições iguais entre duas assinaturas (estimativa do Jaccard)"""
+    equal = np.count_nonzero(np.frombuffer(a, dtype=np.uint32) == np.frombuffer(b, dtype=np.uint32))
+    return int(equal) / SIGNATURE_SIZE
+
+
+class IndexedResult(NamedTuple):
+    """Resultado guardado no índice para um email já classificado"""
+    context: str
+    classification: str
+    confidence: float
+    sender: Optional[str]
+    suggested_response: Optional[str]
+
+
+class NearDuplicateIndex:
+    """
+    Índice de quase-duplicatas (MinHash + LSH).
+
+    - Memória: LRU de assinaturas limitado por `max_entries`. Cada
+      assinatura é dividida em `bands` faixas e cada faixa indexa um
+      bucket; só os emails com alguma faixa idêntica são comparados, o que
+      mantém a busca em microssegundos mesmo com milhões de entradas
+    - Disco (opcional): SQLite em `db_path`, carregado por `load`; cada
+      processo mantém o próprio índice em memória e as entradas que saem
+      do LRU também são apagadas do disco
+
+    Com o disco ativo, `add` faz I/O bloqueante: no event loop, chame-o
+    via `run_blocking`.
+    """
+
+    def __init__(self, max_entries: int, threshold: float, bands: int, db_path: str = ""):
+        if SIGNATURE_SIZE % bands:
+            raise ValueError(f"NEAR_DUPLICATE_BANDS deve dividir {SIGNATURE_SIZE}")
+
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._band_size = SIGNATURE_SIZE // bands * 4
+        self._entries: "OrderedDict[bytes, IndexedResult]" = OrderedDict()
+        self._buckets: List[Dict[int, List[bytes]]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+        # A conexão SQLite tem lock próprio: `lookup` (no event loop) só
+        # disputa `_lock`, que nunca é mantido durante I/O
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._loaded = False
+        self.stats_counters = {
+            "hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+        }
+
+        self._db_path = db_path
+
+        if db_path:
+            self._open_db()
+
+    def _open_db(self) -> None:
+        self._db = sqlite3.connect(self._db_path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS near_duplicates ("
+            "signature BLOB PRIMARY KEY, context TEXT NOT NULL, classification TEXT NOT NULL, "
+            "confidence REAL NOT NULL, sender TEXT, suggested_response TEXT, created_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS near_duplicates_created_at ON near_duplicates (created_at)"
+        )
+        self._db.commit()
+
+    @property
+    def disk_enabled(self) -> bool:
+        return self._db is not None
+
+    def reopen(self) -> None:
+        """Abre uma conexão SQLite própria no processo atual (após o fork)"""
+        if self._db_path:
+            self._lock = threading.Lock()
+            self._db_lock = threading.Lock()
+            self._open_db()
+
+    def load(self) -> int:
+        """
+        Carrega do disco as `max_entries` entradas mais recentes e apaga as demais.
+
+        Só a primeira chamada lê o disco; com `SERVER_PRELOAD` ela acontece
+        no mestre e os workers herdam o índice.
+
+        Returns:
+            Número de entradas carregadas.
+        """
+        if self._db is None or self._loaded:
+            return 0
+
+        with self._db_lock, self._lock:
+            self._loaded = True
+            rows = self._db.execute(
+                "SELECT signature, context, classification, confidence, sender, suggested_response, "
+                "created_at FROM near_duplicates ORDER BY created_at DESC LIMIT ?",
+                (self.max_entries,)
+            ).fetchall()
+
+            # Da mais antiga para a mais recente, para manter a ordem do LRU
+            for signature, *entry, _ in reversed(rows):
+                self._store_in_memory(signature, IndexedResult(*entry))
+
+            if len(rows) == self.max_entries:
+                self._db.execute("DELETE FROM near_duplicates WHERE created_at < ?", (rows[-1][-1],))
+                self._db.commit()
+
+        logger.info("[NEAR_DUPLICATE] %d entradas carregadas do disco", len(rows))
+        return len(rows)
+
+    def _bands(self, signature: bytes) -> List[int]:
+        # `hash` de bytes varia entre processos, mas os buckets só existem em memória
+        size = self._band_size
+        return [hash(signature[start:start + size]) for start in range(0, len(signature), size)]
+
+    def lookup(self, signature: bytes, context: str) -> Optional[Tuple[IndexedResult, float]]:
+        """
+        Busca a entrada mais parecida, acima do limiar, com o mesmo contexto.
+
+        Returns:
+            Tupla (entrada, similaridade), ou None se não houver quase-duplicata.
+        """
+        with self._lock:
+            candidates = set()
+            for band, value in enumerate(self._bands(signature)):
+                candidates.update(self._buckets[band].get(value, ()))
+
+            best = None
+            best_similarity = self.threshold
+
+            for candidate in candidates:
+                score = similarity(signature, candidate)
+                if score >= best_similarity and self._entries[candidate].context == context:
+                    best = candidate
+                    best_similarity = score
+
+            if best is None:
+                self.stats_counters["misses"] += 1
+                NEAR_DUPLICATE_LOOKUPS.inc(result="miss")
+                return None
+
+            self._entries.move_to_end(best)
+            self.stats_counters["hits"] += 1
+            NEAR_DUPLICATE_LOOKUPS.inc(result="hit")
+            return self._entries[best], best_similarity
+
+    def add(self, signature: bytes, entry: IndexedResult) -> None:
+        """Indexa um resultado (memória e, se configurado, disco)"""
+        with self._lock:
+            evicted = self._store_in_memory(signature, entry)
+            self.stats_counters["sets"] += 1
+
+        if self._db is None:
+            return
+
+        with self._db_lock:
+            try:
+                if evicted:
+                    self._db.executemany(
+                        "DELETE FROM near_duplicates WHERE signature = ?", [(old,) for old in evicted]
+                    )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO near_duplicates (signature, context, classification, "
+                    "confidence, sender, suggested_response, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (signature, *entry, time.time())
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning("[NEAR_DUPLICATE] Erro ao gravar no disco: %s", e)
+
+    def _store_in_memory(self, signature: bytes, entry: IndexedResult) -> List[bytes]:
+        """Guarda a entrada no LRU e retorna as assinaturas descartadas"""
+        if signature not in self._entries:
+            for band, value in enumerate(self._bands(signature)):
+                self._buckets[band].setdefault(value, []).append(signature)
+
+        self._entries[signature] = entry
+        self._entries.move_to_end(signature)
+
+        evicted = []
+        while len(self._entries) > self.max_entries:
+            old, _ = self._entries.popitem(last=False)
+            evicted.append(old)
+            self.stats_counters["evictions"] += 1
+            for band, value in enumerate(self._bands(old)):
+                bucket = self._buckets[band][value]
+                bucket.remove(old)
+                if not bucket:
+                    del self._buckets[band][value]
+
+        return evicted
+
+    def stats(self) -> Dict[str, any]:
+        """Retorna contadores de hit/miss e tamanho atual"""
+        with self._lock:
+            lookups = self.stats_counters["hits"] + self.stats_counters["misses"]
+            return {
+                **self.stats_counters,
+                "entries": len(self._entries),
+                "hit_ratio": round(self.stats_counters["hits"] / lookups, 4) if lookups else 0.0,
+                "threshold": self.threshold,
+                "disk_enabled": self._db is not None,
+            }
+
+
+near_duplicate_index = NearDuplicateIndex(
+    max_entries=settings.NEAR_DUPLICATE_MAX_ENTRIES,
+    threshold=settings.NEAR_DUPLICATE_THRESHOLD,
+    bands=settings.NEAR_DUPLICATE_BANDS,
+    db_path=settings.NEAR_DUPLICATE_DB_PATH,
+)
@@ -1,25 +1,119 @@
 import re
 import os
-import spacy
-import nltk
-from nltk.corpus import stopwords
+import logging
+import threading
+from typing import List, Optional, Set
 from app.core.config import settings
 
-NLTK_DATA_DIR = "/opt/render/project/src/nltk_data"
-os.makedirs(NLTK_DATA_DIR, exist_ok=True)
+logger = logging.getLogger(__name__)
 
-nltk.data.path.append(NLTK_DATA_DIR)
-nltk.download("stopwords", download_dir=NLTK_DATA_DIR)
+_nlp = None
+_nlp_lock = threading.Lock()
+_stop_words: Optional[Set[str]] = None
 
-try:
-    nlp = spacy.load(settings.SPACY_MODEL)
-except OSError:
-    raise RuntimeError(
-        f"Modelo Spacy não encontrado. "
-        f"Execute: python -m spacy download {settings.SPACY_MODEL}"
+
+def get_nlp():
+    """
+    Retorna o pipeline spaCy, carregando-o na primeira chamada.
+    
+    Apenas os componentes usados por `preprocess_text` são carregados
+    (tokenizer, tok2vec, morphologizer, attribute_ruler e lemmatizer);
+    os listados em `settings.SPACY_EXCLUDE` (parser, NER) ficam de fora.
+    """
+    global _nlp
+    
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+                
+                try:
+                    _nlp = spacy.load(settings.SPACY_MODEL, exclude=settings.SPACY_EXCLUDE)
+                except OSError:
+                    raise RuntimeError(
+                        f"Modelo Spacy não encontrado. "
+                        f"Execute: python -m spacy download {settings.SPACY_MODEL}"
+                    )
+    
+    return _nlp
+
+
+def _load_stop_words() -> Set[str]:
+    """
+    Carrega as stopwords sem acessar a rede.
+    
+    Ordem de busca:
+    1. Arquivo empacotado no build (`settings.STOPWORDS_PATH`)
+    2. Corpus do NLTK já presente em `settings.NLTK_DATA_DIR`
+    3. Lista embutida do spaCy para português
+    """
+    if os.path.exists(settings.STOPWORDS_PATH):
+        with open(settings.STOPWORDS_PATH, encoding="utf-8") as f:
+            return {line.strip() for line in f if line.strip()}
+    
+    if settings.NLTK_DATA_DIR and os.path.isdir(settings.NLTK_DATA_DIR):
+        try:
+            import nltk
+            from nltk.corpus import stopwords
+            
+            nltk.data.path.append(settings.NLTK_DATA_DIR)
+            return set(stopwords.words("portuguese"))
+        except LookupError:
+            pass
+    
+    logger.warning(
+        f"Stopwords não encontradas em {settings.STOPWORDS_PATH}. "
+        f"Usando a lista do spaCy. Execute: python scripts/prepare_assets.py"
     )
+    from spacy.lang.pt.stop_words import STOP_WORDS
+    
+    return set(STOP_WORDS)
+
+
+def get_stop_words() -> Set[str]:
+    """Retorna o conjunto de stopwords, carregando-o na primeira chamada"""
+    global _stop_words
+    
+    if _stop_words is None:
+        _stop_words = _load_stop_words()
+    
+    return _stop_words
+
+
+def is_ready() -> bool:
+    """Indica se o modelo e as stopwords já estão carregados"""
+    return _nlp is not None and _stop_words is not None
+
+
+def warm_up() -> None:
+    """Carrega modelo e stopwords e processa um texto curto para aquecer o pipeline"""
+    get_stop_words()
+    get_nlp()("aquecimento do modelo")
+
+
+def _normalize(text: str) -> str:
+    """Minúsculas, remoção de URLs e de caracteres especiais"""
+    text = text.lower()
+    
+    text = re.sub(r'http\S+|www\S+', '', text)
+    
+    text = re.sub(r"[^a-zà-ú\s]", " ", text)
+    
+    return text
 
-stop_words = set(stopwords.words("portuguese"))
+
+def _doc_to_text(doc) -> str:
+    """Remove stopwords/pontuação e junta os lemas"""
+    stop_words = get_stop_words()
+    
+    tokens = [
+        token.lemma_ for token in doc
+        if token.text not in stop_words 
+        and not token.is_punct 
+        and len(token.text) > 2
+    ]
+    
+    return " ".join(tokens)
 
 
 def preprocess_text(text: str) -> str:
@@ -40,21 +134,29 @@ def preprocess_text(text: str) -> str:
             Texto processado e pronto para classificação.
     """
     
+    return _doc_to_text(get_nlp()(_normalize(text)))
+
+
+def preprocess_texts(
+    texts: List[str],
+    batch_size: Optional[int] = None,
+    n_process: Optional[int] = None
+) -> List[str]:
+    """ Versão em lote de `preprocess_text` usando `nlp.pipe`.
     
-    text = text.lower()
-    
-    text = re.sub(r'http\S+|www\S+', '', text)
-    
-    text = re.sub(r"[^a-zà-ú\s]", " ", text)
-    
-    doc = nlp(text)
+        Args:
+            texts: Lista de textos brutos
+            batch_size: Tamanho do lote do spaCy (padrão: settings.SPACY_BATCH_SIZE)
+            n_process: Número de processos do spaCy (padrão: settings.SPACY_N_PROCESS)
+            
+        Returns:
+            Lista de textos processados, na mesma ordem da entrada.
+    """
     
-    tokens = [
-        token.lemma_ for token in doc
-        if token.text not in stop_words 
-        and not token.is_punct 
-        and len(token.text) > 2
-    ]
+    docs = get_nlp().pipe(
+        (_normalize(text) for text in texts),
+        batch_size=batch_size or settings.SPACY_BATCH_SIZE,
+        n_process=n_process or settings.SPACY_N_PROCESS
+    )
     
-        
-    return " ".join(tokens)
+    return [_doc_to_text(doc) for doc in docs]
@@ -0,0 +1,542 @@
+import asyncio
+import logging
+import time
+from email.utils import parseaddr
+from itertools import islice
+from typing import AsyncIterator, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.executor import run_blocking, run_cpu
+from app.core.metrics import CONTENT_REDUCTION_CHARS, observe_stage
+from app.services.nlp import preprocess_text, preprocess_texts
+from app.services.ai import (
+    classify_email,
+    generate_response,
+    generate_response_stream,
+    classify_and_respond,
+    classify_locally,
+    PROMPT_VERSION,
+)
+from app.services.cache import result_cache, make_cache_key
+from app.services.local_classifier import classifier_signature
+from app.services.mime import ParsedEmail, extract_subject_and_sender, iter_mbox
+from app.services.near_duplicate import IndexedResult, minhash, near_duplicate_index
+from app.services.routing import get_router
+from app.services.reducer import RULES_VERSION, reduce_and_budget, reduce_and_budget_batch
+
+logger = logging.getLogger(__name__)
+
+
+def _cache_key(text: str, sender: Optional[str], message: str) -> str:
+    return make_cache_key(
+        text, message, sender, get_router().signature(), PROMPT_VERSION, settings.AI_MODE,
+        f"{settings.TOKEN_BUDGET_CLASSIFY}/{settings.TOKEN_BUDGET_GENERATE}/{settings.TOKEN_BUDGET_TOP_SENTENCES}",
+        f"{RULES_VERSION if settings.CONTENT_REDUCTION_ENABLED else 'off'}/{settings.CONTENT_REDUCTION_MIN_CHARS}",
+        classifier_signature()
+    )
+
+
+async def _lookup_cache(cache_key: str, stage_timings: Dict[str, float]) -> Optional[Dict]:
+    start = time.perf_counter()
+    # Com o disco ativo, a leitura do SQLite não pode bloquear o event loop
+    if result_cache.disk_enabled:
+        cached = await run_blocking(result_cache.get, cache_key)
+    else:
+        cached = result_cache.get(cache_key)
+    stage_timings["cache"] = round(time.perf_counter() - start, 3)
+
+    if cached is not None:
+        cached["stage_timings"] = stage_timings
+        cached["cached"] = True
+
+    return cached
+
+
+def _index_context() -> str:
+    # Resultados de outro modelo ou de outra versão dos prompts não são reaproveitados
+    return f"{PROMPT_VERSION}/{settings.AI_MODE}/{get_router().signature()}/{classifier_signature()}"
+
+
+def _same_sender(a: Optional[str], b: Optional[str]) -> bool:
+    return bool(a and b) and parseaddr(a)[1].lower() == parseaddr(b)[1].lower()
+
+
+async def _find_near_duplicate(
+    processed_text: str,
+    sender: Optional[str],
+    stage_timings: Dict[str, float]
+) -> Tuple[Optional[bytes], Optional[Dict[str, any]]]:
+    """
+    Procura no índice de quase-duplicatas um email já classificado parecido com este.
+
+    A resposta sugerida só é reaproveitada com
+    `settings.NEAR_DUPLICATE_REUSE_RESPONSE` e o mesmo remetente (ela cita
+    o nome de quem escreveu).
+
+    Returns:
+        Tupla (assinatura MinHash, resultado reaproveitado ou None).
+    """
+    start = time.perf_counter()
+    signature = await run_cpu(minhash, processed_text, settings.NEAR_DUPLICATE_MIN_TOKENS)
+    match = near_duplicate_index.lookup(signature, _index_context()) if signature else None
+    elapsed = time.perf_counter() - start
+    observe_stage("near_duplicate", elapsed)
+    stage_timings["near_duplicate"] = round(elapsed, 3)
+
+    if match is None:
+        return signature, None
+
+    entry, score = match
+    result = {
+        "classification": entry.classification,
+        "confidence": entry.confidence,
+        "success": True,
+        "engine": "near_duplicate",
+        "near_duplicate_similarity": round(score, 4),
+    }
+    if entry.suggested_response and settings.NEAR_DUPLICATE_REUSE_RESPONSE and _same_sender(sender, entry.sender):
+        result["suggested_response"] = entry.suggested_response
+
+    logger.info("[NEAR_DUPLICATE] Classificação reaproveitada (similaridade %.3f)", score)
+    return signature, result
+
+
+async def _index_result(signature: Optional[bytes], sender: Optional[str], result: Dict[str, any]) -> None:
+    """Guarda no índice de quase-duplicatas um resultado obtido pelos modelos"""
+    if signature is None or not result.get("success") or result.get("fallback"):
+        return
+    if result.get("engine") == "near_duplicate":
+        return
+
+    entry = IndexedResult(
+        _index_context(),
+        result["classification"],
+        result["confidence"],
+        sender,
+        result.get("suggested_response") if settings.NEAR_DUPLICATE_REUSE_RESPONSE else None,
+    )
+
+    # Com o disco ativo, a gravação no SQLite não pode bloquear o event loop
+    if near_duplicate_index.disk_enabled:
+        await run_blocking(near_duplicate_index.add, signature, entry)
+    else:
+        near_duplicate_index.add(signature, entry)
+
+
+async def _run_models(
+    processed_text: str,
+    sender: Optional[str],
+    subject: str,
+    message: str,
+    stage_timings: Dict[str, float],
+    use_index: bool = False
+) -> Dict[str, any]:
+    """
+    Executa as chamadas de IA conforme `settings.AI_MODE`.
+
+    Com `use_index`, um email quase idêntico a outro já classificado
+    reaproveita a classificação (ver `_find_near_duplicate`) e só a
+    resposta é gerada. No modo "fused", se o motor local classificar com
+    confiança, também só a resposta é gerada pela IA.
+    """
+
+    signature = None
+    local_result = None
+    if use_index and settings.NEAR_DUPLICATE_ENABLED:
+        signature, local_result = await _find_near_duplicate(processed_text, sender, stage_timings)
+
+    if local_result is None and settings.AI_MODE == "fused":
+        start = time.perf_counter()
+        local_result = classify_locally(processed_text)
+        if local_result is not None:
+            stage_timings["classify"] = round(time.perf_counter() - start, 3)
+
+    if local_result is not None:
+        result = local_result
+        if "suggested_response" not in result:
+            start = time.perf_counter()
+            result["suggested_response"] = await generate_response(
+                sender=sender,
+                subject=subject,
+                message=message,
+                classification=result["classification"]
+            )
+            stage_timings["generate"] = round(time.perf_counter() - start, 3)
+
+    elif settings.AI_MODE == "fused":
+        start = time.perf_counter()
+        result = await classify_and_respond(
+            text=processed_text,
+            sender=sender,
+            subject=subject,
+            message=message
+        )
+        stage_timings["classify_and_respond"] = round(time.perf_counter() - start, 3)
+
+    else:
+        start = time.perf_counter()
+        result = await classify_email(processed_text)
+        stage_timings["classify"] = round(time.perf_counter() - start, 3)
+
+        if result.get("success"):
+            start = time.perf_counter()
+            result["suggested_response"] = await generate_response(
+                sender=sender,
+                subject=subject,
+                message=message,
+                classification=result["classification"]
+            )
+            stage_timings["generate"] = round(time.perf_counter() - start, 3)
+
+    result["ai_mode"] = settings.AI_MODE
+    result.setdefault("fallback", False)
+
+    await _index_result(signature, sender, result)
+
+    return result
+
+
+def _record_reduction(
+    reduction: Dict[str, Dict[str, int]],
+    reduce_seconds: float,
+    total_seconds: float,
+    stage_timings: Dict[str, float]
+) -> None:
+    """Registra os tempos da redução de conteúdo e do orçamento de tokens"""
+    if reduction:
+        observe_stage("content_reduction", reduce_seconds)
+        stage_timings["content_reduction"] = round(reduce_seconds, 3)
+        for kind in ("quoted", "disclaimer", "signature"):
+            removed = reduction["classify"][kind]
+            if removed:
+                CONTENT_REDUCTION_CHARS.inc(removed, kind=kind)
+
+    observe_stage("token_budget", total_seconds - reduce_seconds)
+    stage_timings["token_budget"] = round(total_seconds - reduce_seconds, 3)
+
+
+async def _reduce_and_budget(
+    text: str,
+    message: str,
+    stage_timings: Dict[str, float]
+) -> Tuple[str, str, Dict[str, Dict[str, float]], Dict[str, Dict[str, int]]]:
+    """
+    Remove histórico citado, assinaturas e avisos legais e limita o texto
+    de classificação e a mensagem aos orçamentos de tokens
+    """
+    start = time.perf_counter()
+    text, message, token_budget, reduction, reduce_seconds = await run_cpu(reduce_and_budget, text, message)
+    _record_reduction(reduction, reduce_seconds, time.perf_counter() - start, stage_timings)
+    return text, message, token_budget, reduction
+
+
+async def _finish(
+    result: Dict[str, any],
+    cache_key: Optional[str],
+    stage_timings: Dict[str, float],
+    token_budget: Optional[Dict[str, Dict[str, float]]] = None,
+    reduction: Optional[Dict[str, Dict[str, int]]] = None
+) -> Dict[str, any]:
+    result["token_budget"] = token_budget or {}
+    result["content_reduction"] = reduction or {}
+
+    if cache_key and result.get("success") and not result.get("fallback"):
+        if result_cache.disk_enabled:
+            await run_blocking(result_cache.set, cache_key, result)
+        else:
+            result_cache.set(cache_key, result)
+
+    result["stage_timings"] = stage_timings
+    result["cached"] = False
+
+    return result
+
+
+async def process_email(
+    text: str,
+    sender: Optional[str],
+    subject: str,
+    message: str,
+    use_cache: bool = True
+) -> Dict[str, any]:
+    """
+    Executa o pipeline completo: pré-processamento, classificação e resposta.
+
+    O modo é definido por `settings.AI_MODE`:
+    - "separate": uma chamada para classificar e outra para gerar a resposta
+    - "fused": uma única chamada retorna classificação e resposta
+
+    Resultados são guardados no cache de resultados, com chave baseada no
+    texto normalizado, remetente, modelo e versão dos prompts. Um email
+    repetido custa apenas uma busca no cache; um email quase idêntico a
+    outro já classificado (mesmo modelo, com outro nome ou número, por
+    exemplo) reaproveita a classificação pelo índice de quase-duplicatas.
+
+    Args:
+        text: Texto usado na classificação (assunto + corpo)
+        sender: Remetente do email
+        subject: Assunto do email
+        message: Corpo original do email
+        use_cache: Se False, ignora o cache nesta requisição
+
+    Returns:
+        Dicionário com classificação, confiança, resposta sugerida e
+        o tempo (em segundos) de cada etapa.
+    """
+
+    stage_timings = {}
+    cache_key = None
+
+    if use_cache and settings.CACHE_ENABLED:
+        cache_key = _cache_key(text, sender, message)
+        cached = await _lookup_cache(cache_key, stage_timings)
+        if cached is not None:
+            return cached
+
+    text, message, token_budget, reduction = await _reduce_and_budget(text, message, stage_timings)
+
+    start = time.perf_counter()
+    processed_text = await run_cpu(preprocess_text, text)
+    elapsed = time.perf_counter() - start
+    observe_stage("preprocess", elapsed)
+    stage_timings["preprocess"] = round(elapsed, 3)
+
+    result = await _run_models(processed_text, sender, subject, message, stage_timings, use_index=use_cache)
+
+    return await _finish(result, cache_key, stage_timings, token_budget, reduction)
+
+
+async def process_batch(
+    items: List[Dict[str, any]],
+    use_cache: bool = True
+) -> List[Dict[str, any]]:
+    """
+    Processa vários emails em uma única chamada.
+
+    O pré-processamento dos itens que não estão no cache é feito em lote
+    com `nlp.pipe` e as chamadas de IA são disparadas em paralelo,
+    limitadas por `settings.BATCH_CONCURRENCY`.
+
+    Args:
+        items: Lista de dicionários com `text`, `sender`, `subject`,
+            `message` e, opcionalmente, `use_cache`
+        use_cache: Se False, ignora o cache para todo o lote
+
+    Returns:
+        Lista de resultados na mesma ordem da entrada. Itens com erro têm
+        `success` False e a mensagem em `error`.
+    """
+
+    results: List[Optional[Dict[str, any]]] = [None] * len(items)
+    timings: List[Dict[str, float]] = [{} for _ in items]
+    cache_keys: List[Optional[str]] = [None] * len(items)
+    pending: List[int] = []
+
+    for index, item in enumerate(items):
+        if use_cache and item.get("use_cache", True) and settings.CACHE_ENABLED:
+            cache_keys[index] = _cache_key(item["text"], item["sender"], item["message"])
+            cached = await _lookup_cache(cache_keys[index], timings[index])
+            if cached is not None:
+                results[index] = cached
+                continue
+        pending.append(index)
+
+    if pending:
+        start = time.perf_counter()
+        budgeted = await run_cpu(
+            reduce_and_budget_batch,
+            [(items[i]["text"], items[i]["message"]) for i in pending]
+        )
+        elapsed = time.perf_counter() - start
+        reduce_elapsed = sum(reduce_seconds for *_, reduce_seconds in budgeted)
+        observe_stage("token_budget_batch", elapsed)
+        reduce_time = round(reduce_elapsed / len(pending), 3)
+        budget_time = round((elapsed - reduce_elapsed) / len(pending), 3)
+
+        start = time.perf_counter()
+        processed_texts = await run_cpu(preprocess_texts, [text for text, *_ in budgeted])
+        elapsed = time.perf_counter() - start
+        observe_stage("preprocess_batch", elapsed)
+        preprocess_time = round(elapsed / len(pending), 3)
+
+        semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+
+        async def run(
+            index: int,
+            processed_text: str,
+            message: str,
+            token_budget: Dict,
+            reduction: Dict
+        ) -> None:
+            item = items[index]
+            if reduction:
+                timings[index]["content_reduction"] = reduce_time
+            timings[index]["token_budget"] = budget_time
+            timings[index]["preprocess"] = preprocess_time
+            async with semaphore:
+                try:
+                    result = await _run_models(
+                        processed_text,
+                        item["sender"],
+                        item["subject"],
+                        message,
+                        timings[index],
+                        use_index=use_cache and item.get("use_cache", True)
+                    )
+                    results[index] = await _finish(result, cache_keys[index], timings[index], token_budget, reduction)
+                except Exception as e:
+                    logger.error("[BATCH] Erro no item %d: %s", index, e)
+                    results[index] = {
+                        "success": False,
+                        "error": str(e),
+                        "stage_timings": timings[index],
+                    }
+
+        await asyncio.gather(*(
+            run(index, processed_text, message, token_budget, reduction)
+            for index, processed_text, (_, message, token_budget, reduction, _)
+            in zip(pending, processed_texts, budgeted)
+        ))
+
+    return results
+
+
+def _take(iterator: Iterator[ParsedEmail], count: int) -> List[ParsedEmail]:
+    return list(islice(iterator, count))
+
+
+async def process_mbox(
+    source: BinaryIO,
+    use_cache: bool = True
+) -> AsyncIterator[Tuple[ParsedEmail, Dict[str, any]]]:
+    """
+    Classifica as mensagens de um arquivo mbox, em ordem, à medida que são lidas.
+
+    As mensagens são lidas (fora do event loop) em blocos de
+    `settings.MBOX_BATCH_SIZE` e cada bloco passa por `process_batch`;
+    só um bloco fica em memória por vez, qualquer que seja o tamanho do
+    arquivo.
+
+    Yields:
+        Tuplas (mensagem, resultado); mensagens sem corpo de texto têm
+        `success` False.
+    """
+
+    messages = iter_mbox(source)
+
+    while True:
+        chunk = await run_blocking(_take, messages, settings.MBOX_BATCH_SIZE)
+        if not chunk:
+            break
+
+        with_body = [parsed for parsed in chunk if parsed.body.strip()]
+        results = await process_batch(
+            [
+                {
+                    "text": f"{parsed.subject} {parsed.body}",
+                    "sender": parsed.sender,
+                    "subject": parsed.subject,
+                    "message": parsed.body,
+                }
+                for parsed in with_body
+            ],
+            use_cache=use_cache
+        )
+        by_message = dict(zip(map(id, with_body), results))
+
+        for parsed in chunk:
+            yield parsed, by_message.get(id(parsed)) or {
+                "success": False,
+                "error": "Mensagem sem corpo de texto",
+                "stage_timings": {},
+            }
+
+
+async def process_email_stream(
+    text: str,
+    sender: Optional[str],
+    subject: str,
+    message: str,
+    use_cache: bool = True
+) -> AsyncIterator[Tuple[str, Dict[str, any]]]:
+    """
+    Versão em streaming de `process_email`.
+
+    Sempre classifica e gera em chamadas separadas (independente de
+    `settings.AI_MODE`), para que a classificação seja enviada assim que
+    estiver pronta.
+
+    Produz tuplas `(evento, dados)`:
+    - "classification": classificação e confiança
+    - "token": trecho da resposta sugerida
+    - "done": resposta completa e tempos de cada etapa
+    """
+
+    stage_timings = {}
+    cache_key = None
+
+    if use_cache and settings.CACHE_ENABLED:
+        cache_key = _cache_key(text, sender, message)
+        cached = await _lookup_cache(cache_key, stage_timings)
+        if cached is not None:
+            yield "classification", {
+                "classification": cached["classification"],
+                "confidence": cached["confidence"],
+                "fallback": cached.get("fallback", False),
+                "cached": True,
+            }
+            yield "token", {"text": cached["suggested_response"]}
+            yield "done", cached
+            return
+
+    text, message, token_budget, reduction = await _reduce_and_budget(text, message, stage_timings)
+
+    start = time.perf_counter()
+    processed_text = await run_cpu(preprocess_text, text)
+    elapsed = time.perf_counter() - start
+    observe_stage("preprocess", elapsed)
+    stage_timings["preprocess"] = round(elapsed, 3)
+
+    signature = result = None
+    if use_cache and settings.NEAR_DUPLICATE_ENABLED:
+        signature, result = await _find_near_duplicate(processed_text, sender, stage_timings)
+
+    if result is None:
+        start = time.perf_counter()
+        result = await classify_email(processed_text)
+        stage_timings["classify"] = round(time.perf_counter() - start, 3)
+
+    if not result.get("success"):
+        yield "error", {"detail": "Erro ao classificar email"}
+        return
+
+    result.setdefault("fallback", False)
+
+    yield "classification", {
+        "classification": result["classification"],
+        "confidence": result["confidence"],
+        "fallback": result["fallback"],
+        "cached": False,
+    }
+
+    if "suggested_response" in result:
+        yield "token", {"text": result["suggested_response"]}
+    else:
+        start = time.perf_counter()
+        chunks = []
+        async for chunk in generate_response_stream(
+            sender=sender,
+            subject=subject,
+            message=message,
+            classification=result["classification"]
+        ):
+            chunks.append(chunk)
+            yield "token", {"text": chunk}
+        stage_timings["generate"] = round(time.perf_counter() - start, 3)
+
+        result["suggested_response"] = "".join(chunks).strip()
+
+    result["ai_mode"] = "separate"
+    await _index_result(signature, sender, result)
+
+    yield "done", await _finish(result, cache_key, stage_timings, token_budget, reduction)
@@ -0,0 +1,173 @@
+import hashlib
+import string
+from typing import Dict, List
+
+from app.core.metrics import PROMPT_TOKENS
+from app.services.token_budget import estimate_tokens
+
+
+class _EmptyFields(dict):
+    def __missing__(self, key: str) -> str:
+        return ""
+
+
+class PromptTemplate:
+    """
+    Template de prompt versionado.
+
+    A parte estática (instruções e exemplos) vai inteira na mensagem de
+    sistema e é idêntica em todas as chamadas, formando um prefixo estável
+    que o provedor pode reaproveitar (prefix caching). O conteúdo de cada
+    email vai por último, na mensagem do usuário, a partir de
+    `content_template` (campos no formato de `str.format`).
+    """
+
+    def __init__(self, name: str, version: str, system: str, content_template: str):
+        self.name = name
+        self.version = version
+        self.system = system.strip()
+        self.content_template = content_template.strip()
+        self.fields = sorted({
+            field for _, field, _, _ in string.Formatter().parse(self.content_template) if field
+        })
+        self.hash = hashlib.sha256(
+            "\x00".join([name, version, self.system, self.content_template]).encode("utf-8")
+        ).hexdigest()[:12]
+        self._content_static_tokens = estimate_tokens(
+            string.Formatter().vformat(self.content_template, (), _EmptyFields())
+        )
+        self.static_tokens = estimate_tokens(self.system) + self._content_static_tokens
+
+    def render(self, **values: str) -> List[Dict[str, str]]:
+        """Monta as mensagens da chamada e contabiliza os tokens estimados"""
+        content = self.content_template.format_map(values)
+
+        PROMPT_TOKENS.inc(self.static_tokens, template=self.name, part="static")
+        PROMPT_TOKENS.inc(
+            max(0, estimate_tokens(content) - self._content_static_tokens),
+            template=self.name,
+            part="dynamic",
+        )
+
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": content},
+        ]
+
+    def info(self) -> Dict[str, any]:
+        return {
+            "version": self.version,
+            "hash": self.hash,
+            "static_tokens": self.static_tokens,
+            "fields": self.fields,
+        }
+
+
+_CLASSIFY_CRITERIA = """\
+Classifique emails como:
+- "Produtivo": trabalho relevante, propostas, projetos, reuniões, documentos importantes
+- "Improdutivo": spam, promoções, clickbait, conteúdo irrelevante"""
+
+_RESPONSE_RULES = """\
+Regras da resposta sugerida:
+- Profissional, com 6 a 8 linhas e nunca mais de 10.
+- Positiva, construtiva e interessada se o email for Produtivo; educada e profissional, mas recusando a proposta, se for Improdutivo.
+- Referencie o conteúdo específico do email, nunca uma resposta genérica ou vaga. Se o assunto for relevante, pode citá-lo.
+- Inclua saudação e agradecimento pelo contato, referência ao conteúdo, seu posicionamento, menção de que retornarão com feedback completo em breve e fechamento profissional.
+- Se o nome do remetente for informado, comece chamando-o pelo nome: "Olá <nome>," se for pessoa ou "Prezados <nome>," se for empresa. Se não for informado, use uma saudação genérica.
+- Não inclua assinatura, nome, empresa ou contato fictício no final.
+- Não deixe frases incompletas e pontue corretamente as frases.
+- Sempre envie o texto da resposta, sem prefácio ou explicações.
+
+Exemplo de resposta para email Produtivo:
+Olá,
+
+Recebemos sua mensagem e analisamos as informações relacionadas ao prazo, escopo e pontos levantados.
+Alguns detalhes mencionados exigem uma validação interna antes de um posicionamento definitivo.
+Neste momento, estamos revisando os impactos e alinhamentos necessários sobre o tema apresentado.
+Em breve, retornaremos com uma resposta mais completa e direcionada ao seu pedido.
+Caso seja necessário complementar alguma informação, entraremos em contato.
+Agradecemos a compreensão e seguimos à disposição.
+
+Atenciosamente
+
+Exemplo de resposta para email Improdutivo:
+A mensagem foi recebida e as informações apresentadas foram consideradas.
+No momento, o conteúdo não demanda qualquer ação ou encaminhamento adicional.
+Dessa forma, não haverá continuidade sobre o tema tratado.
+Caso surja algum ponto novo ou relevante, poderá ser enviado em um novo contato.
+Agradecemos a comunicação e a atenção dispensada.
+
+Atenciosamente"""
+
+
+CLASSIFY = PromptTemplate(
+    name="classify",
+    version="2",
+    system=f"""\
+Você é um classificador de emails.
+
+{_CLASSIFY_CRITERIA}
+
+Responda APENAS com este JSON válido, sem texto adicional:
+{{"classification": "Produtivo ou Improdutivo", "confidence": 0.0-1.0}}""",
+    content_template="""\
+Email:
+{text}""",
+)
+
+GENERATE = PromptTemplate(
+    name="generate",
+    version="3",
+    system=f"""\
+Você é um assistente profissional que gera respostas de email completas, contextualizadas e bem estruturadas.
+
+{_RESPONSE_RULES}""",
+    content_template="""\
+Classificação: {classification}
+Nome do remetente: {sender_name}
+Tipo do remetente: {sender_kind}
+Assunto: {subject}
+
+Texto do email recebido:
+{message}""",
+)
+
+CLASSIFY_AND_RESPOND = PromptTemplate(
+    name="classify_and_respond",
+    version="4",
+    system=f"""\
+Você é um classificador de emails e assistente profissional que gera respostas.
+
+{_CLASSIFY_CRITERIA}
+
+Classifique o email e gere a resposta sugerida para ele.
+
+{_RESPONSE_RULES}
+
+Responda APENAS com este JSON válido, sem texto adicional:
+{{"classification": "Produtivo ou Improdutivo", "confidence": 0.0-1.0, "suggested_response": "texto da resposta"}}""",
+    content_template="""\
+Nome do remetente: {sender_name}
+Tipo do remetente: {sender_kind}
+Assunto: {subject}
+
+Texto do email recebido:
+{message}""",
+)
+
+TEMPLATES: Dict[str, PromptTemplate] = {
+    template.name: template for template in (CLASSIFY, GENERATE, CLASSIFY_AND_RESPOND)
+}
+
+
+def fingerprint() -> str:
+    """Hash de todos os templates; muda sempre que qualquer prompt mudar"""
+    return hashlib.sha256(
+        "".join(TEMPLATES[name].hash for name in sorted(TEMPLATES)).encode("utf-8")
+    ).hexdigest()[:12]
+
+
+def templates_info() -> Dict[str, Dict[str, any]]:
+    """Versão, hash e tokens estáticos de cada template"""
+    return {name: template.info() for name, template in TEMPLATES.items()}
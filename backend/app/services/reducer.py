@@ -0,0 +1,289 @@
+import re
+import time
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from app.core.config import settings
+from app.services.token_budget import apply_token_budgets
+
+# Versão das regras; entra na chave do cache de resultados
+RULES_VERSION = "3"
+
+# Início do histórico citado: tudo a partir daqui é removido.
+# Gmail/Apple Mail: "Em qui., 1 de jan. de 2026 às 10:00, Fulano <f@x.com> escreveu:"
+# (o cabeçalho pode quebrar em duas linhas e termina a linha); o grupo 1
+# é o que fica entre "Em" e "escreveu"
+_REPLY_HEADER = re.compile(
+    r"^[ \t]*(?:Em|On|Le|El)\b([^\n]{0,200}(?:\n[^\n]{0,200})?)"
+    r"\b(?:escreveu|wrote|a écrit|escribió)[ \t]*:[ \t]*$",
+    re.IGNORECASE | re.MULTILINE
+)
+# Um cabeçalho de resposta tem data ou hora seguida do autor (nome ou <endereço>)
+_HEADER_DATE = re.compile(r"\d{1,2}:\d{2}|\d{1,4}[/.-]\d{1,2}[/.-]\d{2,4}|\b(?:19|20)\d{2}\b")
+_HEADER_AUTHOR = re.compile(r"<[^<>\s@]+@[^<>\s]+>|[^\W\d_]{2,}")
+
+# Outlook e clientes antigos
+_QUOTE_HEADERS = re.compile(
+    r"^[ \t]*(?:"
+    r"-{2,}[ \t]*(?:Mensagem original|Original Message|Mensaje original)[ \t]*-{2,}"
+    r"|_{10,}[ \t]*$"
+    # Bloco de cabeçalhos da mensagem anterior ("De: ... / Enviado: ...")
+    r"|(?:De|From)[ \t]*:[^\n]*\n[ \t]*(?:Enviad[oa](?: em)?|Sent|Data|Date)[ \t]*:"
+    r")",
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Só se algum destes aparecer (em minúsculas) o texto é examinado pela regex acima
+_QUOTE_HINTS = ("escreveu", "wrote", "écrit", "escribió", "original", "______", "enviad", "sent:", "data:", "date:")
+
+_FORWARD_MARKER = re.compile(
+    r"-{2,}[ \t]*(?:Forwarded message|Mensagem encaminhada|Mensaje reenviado)[ \t]*-{2,}",
+    re.IGNORECASE
+)
+
+# Linhas citadas com ">"
+_QUOTED_LINES = re.compile(r"^[ \t]*>[^\n]*(?:\n|$)", re.MULTILINE)
+
+# Delimitador de assinatura (RFC 3676) e assinaturas automáticas de celular/cliente
+_SIGNATURE_DELIMITER = re.compile(r"^-- ?$", re.MULTILINE)
+_SENT_FROM = re.compile(
+    r"^[ \t]*(?:Enviado (?:do|de) meu|Enviado pelo|Sent from my|Get Outlook for|Obter o Outlook)[^\n]*(?:\n|$)",
+    re.IGNORECASE | re.MULTILINE
+)
+
+
+def _valediction(words: str, line_chars: int) -> Pattern:
+    # Fecho em parágrafo próprio seguido de até 8 linhas curtas (nome,
+    # cargo, telefone) até o fim; o grupo 1 é o que vem depois do fecho
+    return re.compile(
+        rf"\n[ \t]*\n[ \t]*(?:{words})[ \t]*[,.!]?[ \t]*\n"
+        rf"((?:[^\n]{{0,{line_chars}}}\n){{0,7}}[^\n]{{0,{line_chars}}})\Z",
+        re.IGNORECASE
+    )
+
+
+_VALEDICTIONS = (
+    _valediction(
+        r"Atenciosamente|Att|Atte|Abs|Abraços?|Cordialmente|Saudações"
+        r"|Best regards|Kind regards|Regards|Sincerely",
+        80
+    ),
+    # Agradecimentos também abrem pedidos ("Obrigado!\nPoderia...");
+    # só contam como fecho antes de linhas bem curtas
+    _valediction(r"Obrigad[oa]|Grat[oa]|Thanks|Best|Cheers", 40),
+)
+
+# Linhas que pedem algo ("Poderia...", "Me liga...", "Please send...") não são assinatura
+_REQUEST_START = re.compile(
+    r"(?:poderi[ao]|pode|podem|por favor|favor|preciso|precisamos|gostari[ao]|me|nos|aguardo"
+    r"|envi[ea]m?|mand[ea]m?|lig[ua]e?m?|confirm[ea]m?|verifi(?:que|ca)m?"
+    r"|could|can|would|please|send|call|let|need|i|we)\b",
+    re.IGNORECASE
+)
+_CONTACT = re.compile(r"\d{4}|@|www\.|https?://")
+_WORDS = re.compile(r"[^\W\d_]+")
+_NAME_CONNECTORS = {"de", "da", "do", "das", "dos", "e", "and", "of", "the"}
+
+
+def _looks_like_signature(lines: str) -> bool:
+    """Nome, cargo ou contato: sem perguntas nem pedidos e com palavras em maiúscula ou telefone/email"""
+    for line in lines.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if "?" in line or _REQUEST_START.match(line):
+            return False
+        if _CONTACT.search(line):
+            continue
+        words = [word for word in _WORDS.findall(line) if word.lower() not in _NAME_CONNECTORS]
+        if sum(word[0].isupper() for word in words) * 2 < len(words):
+            return False
+    return True
+
+# Rodapés legais e de impressão (parágrafos inteiros, comparados em
+# minúsculas). O parágrafo precisa abrir com a frase típica do rodapé:
+# palavras soltas como "confidencial" aparecem em texto de negócio.
+# Rodapés de descadastramento ficam: são pistas de email improdutivo.
+_DISCLAIMER = re.compile(
+    r"[ \t]*(?:"
+    # Títulos e avisos de impressão
+    r"aviso legal|aviso de confidencialidade|disclaimer|confidentiality notice|legal notice"
+    r"|antes de imprimir|before printing|please consider the environment|pense no meio ambiente"
+    # "Esta mensagem (e seus anexos) é confidencial...", "This e-mail is intended only for..."
+    r"|(?:est[ae]|ess[ae]) (?:mensagem|e-?mail|comunicação)[^\n]{0,120}?"
+    r"(?:confidencia|privilegiad|destinatário|uso exclusivo)"
+    r"|(?:as )?informações contidas (?:nest[ae]|n[ae]ss[ae])[^\n]{0,120}?(?:confidencia|privilegiad|destinatário)"
+    r"|this (?:message|e-?mail|communication)[^\n]{0,120}?"
+    r"(?:confidential|privileged|intended (?:only|solely) for|intended recipient)"
+    r"|the information (?:contained in|in) this[^\n]{0,120}?(?:confidential|privileged|intended)"
+    r")"
+)
+# Rodapés têm várias linhas de juridiquês; parágrafos curtos só saem no fim da mensagem
+_DISCLAIMER_MIN_CHARS = 200
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n")
+
+_EXTRA_BLANK_LINES = re.compile(r"\n[ \t]*\n(?:[ \t]*\n)+")
+
+# Assinatura e rodapés ficam no fim da mensagem (o histórico já foi
+# cortado): só os últimos caracteres são examinados
+_TAIL_CHARS = 4000
+
+
+def _reply_header_start(text: str) -> Optional[int]:
+    for match in _REPLY_HEADER.finditer(text):
+        dates = list(_HEADER_DATE.finditer(match.group(1)))
+        if dates and _HEADER_AUTHOR.search(match.group(1), dates[-1].end()):
+            return match.start()
+    return None
+
+
+def _cut_quoted_history(text: str, min_chars: int) -> Tuple[str, int]:
+    lowered = text.lower()
+    if not any(hint in lowered for hint in _QUOTE_HINTS):
+        return text, 0
+    match = _QUOTE_HEADERS.search(text)
+    starts = [start for start in (match and match.start(), _reply_header_start(text)) if start is not None]
+    if not starts:
+        return text, 0
+    kept = text[:min(starts)]
+    # Encaminhamento (ou resposta sem texto novo): o histórico é o próprio conteúdo
+    if _FORWARD_MARKER.search(kept) or len(kept.strip()) < min_chars:
+        return text, 0
+    return kept, len(text) - len(kept)
+
+
+def _remove_quoted_lines(text: str) -> Tuple[str, int]:
+    if ">" not in text:
+        return text, 0
+    reduced = _QUOTED_LINES.sub("", text)
+    return reduced, len(text) - len(reduced)
+
+
+def _remove_disclaimers(text: str) -> Tuple[str, int]:
+    paragraphs = _PARAGRAPH_BREAK.split(text)
+
+    # Percorre os parágrafos do fim para o início, até `_TAIL_CHARS`
+    removed = set()
+    scanned = 0
+    last = len(paragraphs) - 1
+    for index in range(last, 0, -1):
+        if scanned > _TAIL_CHARS:
+            break
+        paragraph = paragraphs[index]
+        scanned += len(paragraph)
+        at_end = all(later in removed for later in range(index + 1, last + 1))
+        if (at_end or len(paragraph) >= _DISCLAIMER_MIN_CHARS) and _DISCLAIMER.match(paragraph.lower()):
+            removed.add(index)
+
+    if not removed:
+        return text, 0
+
+    reduced = "\n\n".join(p for i, p in enumerate(paragraphs) if i not in removed)
+    return reduced, max(0, len(text) - len(reduced))
+
+
+def _remove_signature(text: str) -> Tuple[str, int]:
+    limit = max(0, len(text) - _TAIL_CHARS)
+    cut = text.rfind("\n", 0, limit) + 1 or limit
+    head, tail = text[:cut], text[cut:]
+
+    tail = _SENT_FROM.sub("", tail)
+
+    match = _SIGNATURE_DELIMITER.search(tail)
+    if match:
+        tail = tail[:match.start()]
+
+    stripped = tail.rstrip()
+    for pattern in _VALEDICTIONS:
+        match = pattern.search(stripped)
+        if match and _looks_like_signature(match.group(1)):
+            tail = tail[:match.start(1)]
+            break
+
+    reduced = head + tail
+    return reduced, max(0, len(text) - len(reduced))
+
+
+def reduce_content(text: str, min_chars: Optional[int] = None) -> Tuple[str, Dict[str, int]]:
+    """
+    Remove do email o que não diz nada sobre a mensagem mais recente.
+
+    Nesta ordem: histórico citado (a partir de "Em ... escreveu:",
+    "On ... wrote:", "-----Mensagem original-----" ou de um bloco
+    "De:/Enviado:"), linhas citadas com ">", parágrafos de aviso legal e
+    a assinatura ("-- ", "Enviado do meu iPhone" e as linhas curtas após
+    o fecho). Se sobrarem menos de `min_chars` caracteres (padrão:
+    `settings.CONTENT_REDUCTION_MIN_CHARS`), o texto original é mantido.
+
+    Returns:
+        Tupla (texto, metadados) com o tamanho original, o total removido
+        e os caracteres removidos por regra (`quoted`, `disclaimer`,
+        `signature`).
+    """
+    min_chars = settings.CONTENT_REDUCTION_MIN_CHARS if min_chars is None else min_chars
+
+    reduced, quoted = _cut_quoted_history(text, min_chars)
+    reduced, quoted_lines = _remove_quoted_lines(reduced)
+    reduced, disclaimer = _remove_disclaimers(reduced)
+    reduced, signature = _remove_signature(reduced)
+    reduced = _EXTRA_BLANK_LINES.sub("\n\n", reduced).strip()
+
+    if len(reduced) < min_chars:
+        reduced = text
+        quoted = quoted_lines = disclaimer = signature = 0
+
+    return reduced, {
+        "original_chars": len(text),
+        "removed_chars": len(text) - len(reduced),
+        "quoted": quoted + quoted_lines,
+        "disclaimer": disclaimer,
+        "signature": signature,
+    }
+
+
+def reduce_texts(text: str, message: str) -> Tuple[str, str, Dict[str, Dict[str, int]]]:
+    """
+    Aplica `reduce_content` ao texto de classificação e à mensagem.
+
+    Quando o texto termina com a mensagem ("assunto + mensagem", ou o
+    próprio conteúdo de um arquivo), a mensagem é reduzida uma única vez
+    e o resultado é reaproveitado.
+
+    Returns:
+        Tupla (text, message, metadados por tarefa).
+    """
+    reduced_message, generate_meta = reduce_content(message)
+
+    if message and text.endswith(message):
+        prefix = text[:len(text) - len(message)]
+        reduced_text = prefix + reduced_message
+        classify_meta = dict(generate_meta, original_chars=len(text))
+    else:
+        reduced_text, classify_meta = reduce_content(text)
+
+    return reduced_text, reduced_message, {"classify": classify_meta, "generate": generate_meta}
+
+
+def reduce_and_budget(text: str, message: str) -> Tuple[str, str, Dict, Dict, float]:
+    """
+    Redução de conteúdo seguida dos orçamentos de tokens, em uma única tarefa do pool.
+
+    Returns:
+        Tupla (text, message, metadados do orçamento, metadados da
+        redução, segundos gastos na redução).
+    """
+    reduction = {}
+    elapsed = 0.0
+
+    if settings.CONTENT_REDUCTION_ENABLED:
+        start = time.perf_counter()
+        text, message, reduction = reduce_texts(text, message)
+        elapsed = time.perf_counter() - start
+
+    text, message, token_budget = apply_token_budgets(text, message)
+
+    return text, message, token_budget, reduction, elapsed
+
+
+def reduce_and_budget_batch(items: List[Tuple[str, str]]) -> List[Tuple[str, str, Dict, Dict, float]]:
+    """`reduce_and_budget` para vários pares (text, message)"""
+    return [reduce_and_budget(text, message) for text, message in items]
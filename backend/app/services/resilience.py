@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """O circuito está aberto: a chamada nem é tentada"""
+
+
+class CircuitBreaker:
+    """
+    Disjuntor para um provedor de LLM.
+
+    - closed: chamadas passam; `failure_threshold` falhas seguidas abrem o circuito
+    - open: chamadas falham na hora (direto para os fallbacks) por `reset_timeout` segundos
+    - half_open: uma chamada de teste passa; sucesso fecha, falha reabre
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Indica se uma chamada pode ser feita agora"""
+        if self.failure_threshold <= 0:
+            return True
+
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info("[BREAKER] %s fechado", self.name)
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def release_probe(self) -> None:
+        """Libera a chamada de teste sem resultado (cancelada), para que outra possa ser feita"""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+
+        if self.failure_threshold > 0 and (
+            self.opened_at is not None or self.failures >= self.failure_threshold
+        ):
+            if self.opened_at is None:
+                logger.warning("[BREAKER] %s aberto após %d falhas", self.name, self.failures)
+            self.opened_at = time.monotonic()
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Timeouts, erros de conexão, 429 e 5xx valem nova tentativa; outros
+    erros do cliente (400, 401, 404...) falhariam de novo.
+    """
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+
+    name = type(error).__name__
+    return "Timeout" in name or "Connection" in name
+
+
+def backoff_delay(attempt: int) -> float:
+    """Backoff exponencial com "full jitter" (0 a base * 2^tentativa, limitado)"""
+    cap = min(settings.LLM_RETRY_BACKOFF_MAX, settings.LLM_RETRY_BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, cap)
+
+
+async def _hedged(
+    factory: Callable[[], Awaitable[T]],
+    hedge_delay: float,
+    on_hedge: Optional[Callable[[], None]] = None,
+) -> T:
+    """
+    Dispara a chamada e, se ela não terminar em `hedge_delay` segundos,
+    dispara uma segunda igual; vale a primeira que der certo.
+    """
+    first = asyncio.ensure_future(factory())
+
+    try:
+        return await asyncio.wait_for(asyncio.shield(first), hedge_delay)
+    except asyncio.TimeoutError:
+        pass
+    except BaseException:
+        first.cancel()
+        raise
+
+    logger.debug("[HEDGE] Chamada lenta após %.3fs; disparando cópia", hedge_delay)
+    if on_hedge is not None:
+        on_hedge()
+    pending = {first, asyncio.ensure_future(factory())}
+    error: Optional[BaseException] = None
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def call_with_resilience(
+    factory: Callable[[], Awaitable[T]],
+    breaker: CircuitBreaker,
+    deadline: Optional[float] = None,
+    retries: Optional[int] = None,
+    hedge_delay: Optional[float] = None,
+    on_retry: Optional[Callable[[int, BaseException], None]] = None,
+    on_hedge: Optional[Callable[[], None]] = None,
+) -> T:
+    """
+    Executa `factory()` com prazo, novas tentativas, disjuntor e hedging.
+
+    Args:
+        factory: Cria uma nova tentativa da chamada a cada invocação
+        breaker: Disjuntor do provedor
+        deadline: Prazo total em segundos, somando todas as tentativas
+            (padrão: `settings.LLM_DEADLINE`)
+        retries: Tentativas extras em erros transitórios (padrão: `settings.LLM_RETRIES`)
+        hedge_delay: Atraso para disparar a cópia da chamada; 0 desativa
+            (padrão: `settings.LLM_HEDGE_DELAY`)
+        on_retry: Chamado antes de cada nova tentativa
+        on_hedge: Chamado quando uma cópia da chamada é disparada
+
+    Raises:
+        CircuitOpenError: se o circuito estiver aberto
+        asyncio.TimeoutError: se o prazo total se esgotar
+    """
+    deadline = settings.LLM_DEADLINE if deadline is None else deadline
+    retries = settings.LLM_RETRIES if retries is None else retries
+    hedge_delay = settings.LLM_HEDGE_DELAY if hedge_delay is None else hedge_delay
+
+    if not breaker.allow():
+        raise CircuitOpenError(f"Circuito aberto para {breaker.name}")
+
+    # Em half_open esta chamada é a de teste; se for cancelada (cliente
+    # desconectado, cópia perdedora do hedge, desligamento), nem sucesso nem
+    # falha são registrados e a vaga precisa ser liberada
+    probe = breaker.state == "half_open"
+
+    try:
+        return await _call_with_retries(factory, breaker, deadline, retries, hedge_delay, on_retry, on_hedge)
+    except asyncio.CancelledError:
+        if probe:
+            breaker.release_probe()
+        raise
+
+
+async def _call_with_retries(
+    factory: Callable[[], Awaitable[T]],
+    breaker: CircuitBreaker,
+    deadline: float,
+    retries: int,
+    hedge_delay: float,
+    on_retry: Optional[Callable[[int, BaseException], None]],
+    on_hedge: Optional[Callable[[], None]],
+) -> T:
+    expires_at = time.monotonic() + deadline if deadline > 0 else None
+    attempt = 0
+
+    while True:
+        call = _hedged(factory, hedge_delay, on_hedge) if hedge_delay > 0 else factory()
+        remaining = None if expires_at is None else expires_at - time.monotonic()
+
+        try:
+            result = await asyncio.wait_for(call, remaining)
+        except Exception as e:
+            if not is_retryable(e):
+                # O provedor respondeu; o erro é da chamada, não da saúde dele
+                breaker.record_success()
+                raise
+
+            breaker.record_failure()
+
+            if attempt >= retries:
+                raise
+
+            delay = backoff_delay(attempt)
+            if expires_at is not None and time.monotonic() + delay >= expires_at:
+                raise
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuito aberto para {breaker.name}") from e
+
+            attempt += 1
+            if on_retry is not None:
+                on_retry(attempt, e)
+            logger.warning("[RETRY] Tentativa %d após %s (espera %.3fs)", attempt, type(e).__name__, delay)
+            await asyncio.sleep(delay)
+            continue
+
+        breaker.record_success()
+        return result
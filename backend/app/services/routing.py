@@ -0,0 +1,162 @@
+import logging
+import random
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import register_gauge
+from app.services.resilience import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+# Tarefas sem rota própria usam a rota da tarefa indicada aqui
+_TASK_FALLBACKS = {
+    "classify_and_respond": "generate",
+}
+
+# Peso da última latência na média móvel exponencial
+_EWMA_ALPHA = 0.2
+
+
+class Endpoint:
+    """
+    Um modelo em um endpoint compatível com a API OpenAI.
+
+    Guarda o estado usado pelo roteamento: chamadas em andamento, média
+    móvel da latência e o disjuntor próprio do endpoint.
+    """
+
+    def __init__(self, base_url: str, model: str, api_key: str):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.api_key = api_key
+        self.name = f"{model}@{self.base_url}"
+        self.outstanding = 0
+        self.latency_ewma: Optional[float] = None
+        self.breaker = CircuitBreaker(
+            self.name,
+            failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.LLM_BREAKER_RESET_TIMEOUT,
+        )
+
+    def record_latency(self, seconds: float) -> None:
+        if self.latency_ewma is None:
+            self.latency_ewma = seconds
+        else:
+            self.latency_ewma += _EWMA_ALPHA * (seconds - self.latency_ewma)
+
+    def available(self) -> bool:
+        """Falso enquanto o circuito está aberto (meio-aberto conta como disponível)"""
+        return self.breaker.state != "open"
+
+
+class ModelRouter:
+    """
+    Registro de modelos por tarefa, com balanceamento e failover.
+
+    Estratégias (`settings.LLM_ROUTING_STRATEGY`):
+    - "least_outstanding": menos chamadas em andamento primeiro
+    - "latency": menor latência média primeiro (endpoints ainda sem
+      medição vêm antes, para serem medidos)
+    """
+
+    def __init__(self, routes: Dict[str, List[Dict[str, str]]], strategy: str):
+        self.strategy = strategy
+        self.routes: Dict[str, List[Endpoint]] = {}
+        endpoints: Dict[str, Endpoint] = {}
+
+        for task, specs in routes.items():
+            self.routes[task] = []
+            for spec in specs:
+                endpoint = Endpoint(
+                    base_url=spec.get("base_url", settings.HF_API_URL),
+                    model=spec["model"],
+                    api_key=spec.get("api_key", settings.HF_TOKEN),
+                )
+                # O mesmo endpoint em várias tarefas compartilha estado
+                endpoint = endpoints.setdefault(endpoint.name, endpoint)
+                self.routes[task].append(endpoint)
+
+        self.endpoints = list(endpoints.values())
+        self._signature = ";".join(
+            f"{task}=" + ",".join(sorted({e.model for e in route}))
+            for task, route in sorted(self.routes.items())
+        )
+
+    @classmethod
+    def from_settings(cls) -> "ModelRouter":
+        routes = settings.LLM_ROUTES or {
+            "default": [{
+                "base_url": settings.HF_API_URL,
+                "model": settings.LLM_MODEL,
+                "api_key": settings.HF_TOKEN,
+            }]
+        }
+        return cls(routes, settings.LLM_ROUTING_STRATEGY)
+
+    def endpoints_for(self, task: str) -> List[Endpoint]:
+        route = self.routes.get(task)
+        if not route and task in _TASK_FALLBACKS:
+            route = self.routes.get(_TASK_FALLBACKS[task])
+        return route or self.routes.get("default", [])
+
+    def candidates(self, task: str) -> List[Endpoint]:
+        """
+        Endpoints da tarefa na ordem em que devem ser tentados.
+
+        Os de circuito aberto vão para o fim (só são tentados se todos
+        os outros falharem); empates são desfeitos ao acaso para
+        espalhar a carga.
+        """
+        endpoints = self.endpoints_for(task)
+
+        if self.strategy == "latency":
+            def key(e: Endpoint):
+                return (not e.available(), e.latency_ewma or 0.0, e.outstanding, random.random())
+        else:
+            def key(e: Endpoint):
+                return (not e.available(), e.outstanding, e.latency_ewma or 0.0, random.random())
+
+        return sorted(endpoints, key=key)
+
+    def signature(self) -> str:
+        """Modelos configurados por tarefa; entra na chave do cache de resultados"""
+        return self._signature
+
+
+_router: Optional[ModelRouter] = None
+
+
+def get_router() -> ModelRouter:
+    global _router
+
+    if _router is None:
+        _router = ModelRouter.from_settings()
+        logger.info("Rotas de LLM: %s (%s)", _router.signature(), _router.strategy)
+
+    return _router
+
+
+register_gauge(
+    "llm_endpoint_outstanding",
+    "Chamadas em andamento por endpoint",
+    ["endpoint"],
+    lambda: {} if _router is None else {(e.name,): e.outstanding for e in _router.endpoints},
+)
+
+register_gauge(
+    "llm_endpoint_latency_ewma_seconds",
+    "Média móvel da latência por endpoint",
+    ["endpoint"],
+    lambda: {} if _router is None else {
+        (e.name,): e.latency_ewma for e in _router.endpoints if e.latency_ewma is not None
+    },
+)
+
+register_gauge(
+    "llm_circuit_open",
+    "1 quando o circuito do endpoint está aberto ou em teste",
+    ["endpoint"],
+    lambda: {} if _router is None else {
+        (e.name,): float(e.breaker.state != "closed") for e in _router.endpoints
+    },
+)
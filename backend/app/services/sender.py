@@ -0,0 +1,133 @@
+import re
+from email.utils import parseaddr
+from functools import lru_cache
+from typing import NamedTuple, Optional, Pattern, Tuple
+
+from app.core.config import settings
+
+PERSON = "pessoa"
+COMPANY = "empresa"
+
+# Prefixos de endereço que indicam cargo/função, não um nome
+FUNCTION_WORDS = frozenset([
+    'admin', 'suporte', 'vendas', 'contato', 'info', 'noreply',
+    'support', 'sales', 'contact', 'no reply', 'hello', 'hi',
+    'service', 'servico', 'atendimento', 'help', 'helpdesk',
+    'newsletter', 'notificacao', 'notificação', 'alert', 'alerta'
+])
+
+_SEPARATORS = re.compile(r'[._+\-\s]+')
+_VALID_NAME = re.compile(r'^[a-záàâãéèêíïóôõöúçñ0-9\s&]+$', re.IGNORECASE)
+_COMPANY_HINT = re.compile(r'[0-9&]')
+
+
+class SenderIdentity(NamedTuple):
+    """Remetente identificado: nome, tipo ("pessoa" ou "empresa") e se o corpo o confirma"""
+    name: str
+    kind: str
+    confirmed: bool
+
+
+class _ParsedSender(NamedTuple):
+    name: str
+    kind: str
+    first_word: str
+    patterns: Tuple[Tuple[Pattern, Optional[str]], ...]
+
+
+def _confirmation_patterns(name: str) -> Tuple[Tuple[Pattern, Optional[str]], ...]:
+    """
+    Formas de o corpo (em minúsculas) citar o remetente, com o tipo que cada uma indica.
+
+    Os padrões ficam separados (cada um começa por um literal, o que
+    permite a busca rápida do `re`) e são compilados uma vez por endereço.
+    """
+    full = re.escape(name.lower())
+    first = re.escape(name.split()[0].lower())
+
+    return tuple((re.compile(pattern), kind) for pattern, kind in [
+        (f"meu nome é {full}", PERSON),
+        (f"sou o {first}", PERSON),                 # Também "eu sou o João"
+        (f"nome da empresa é {full}", COMPANY),
+        (f"somos {full}", COMPANY),
+        (f"estou na {full}", COMPANY),
+        # "da"/"pela" também precedem pessoas ("a proposta da Maria Silva"):
+        # só indicam empresa junto de "empresa" ou da natureza jurídica
+        (f"da empresa {full}", COMPANY),
+        (f"pela empresa {full}", COMPANY),
+        (f"da {full},? (?:ltda|eireli|s\\.?a\\b)", COMPANY),
+        (f"pela {full},? (?:ltda|eireli|s\\.?a\\b)", COMPANY),
+        # Menções sem tipo por último, para não esconder as explícitas
+        (f"^{first}[^a-z]", None),                  # No início (Ex: "João,")
+        (f" {first}[,.]", None),                    # No meio com pontuação
+    ])
+
+
+@lru_cache(maxsize=settings.SENDER_CACHE_SIZE)
+def _parse_sender(sender: str) -> Optional[_ParsedSender]:
+    """
+    Nome e tipo do remetente a partir do cabeçalho, memoizados por endereço.
+
+    O nome vem do nome de exibição ("Maria Souza <maria@x.com>") ou, na
+    falta dele, do endereço antes do @. É descartado se tiver caracteres
+    fora de letras (com acentos), números, espaços e "&", se for uma
+    palavra de função (admin, suporte...) ou se tiver menos de 2 caracteres.
+    """
+    display_name, address = parseaddr(sender)
+    if "@" not in address:
+        return None
+
+    local_part, _, domain = address.partition("@")
+
+    candidates = [display_name, local_part] if display_name else [local_part]
+    for candidate in candidates:
+        name = _SEPARATORS.sub(' ', candidate).strip()
+        if len(name) < 2 or name.lower() in FUNCTION_WORDS or not _VALID_NAME.match(name):
+            continue
+
+        # Números e "&" ou o nome igual ao domínio ("acme@acme.com") indicam empresa
+        if _COMPANY_HINT.search(name) or name.lower().replace(' ', '') == domain.split('.')[0].lower():
+            kind = COMPANY
+        else:
+            kind = PERSON
+
+        return _ParsedSender(name.title(), kind, name.split()[0].lower(), _confirmation_patterns(name))
+
+    return None
+
+
+def identify_sender(sender: Optional[str], message: Optional[str] = None) -> Optional[SenderIdentity]:
+    """
+    Identifica o remetente (pessoa ou empresa) e faz a validação cruzada com o corpo.
+
+    A análise do cabeçalho é feita uma vez por endereço (LRU de
+    `settings.SENDER_CACHE_SIZE` entradas); por chamada resta apenas uma
+    busca no corpo com os padrões já compilados, e só se o primeiro nome
+    aparecer nele. Uma menção explícita ("meu nome é", "somos") também
+    define o tipo.
+
+    Returns:
+        SenderIdentity, ou None se não houver nome utilizável.
+    """
+    if not sender or "@" not in sender:
+        return None
+
+    parsed = _parse_sender(sender.strip())
+    if parsed is None:
+        return None
+
+    kind = parsed.kind
+    confirmed = False
+
+    if message:
+        lowered = message.lower()
+        # Todos os padrões contêm o primeiro nome; sem ele não há o que buscar
+        if parsed.first_word in lowered:
+            for pattern, pattern_kind in parsed.patterns:
+                if pattern.search(lowered):
+                    confirmed = True
+                    kind = pattern_kind or kind
+                    break
+
+    return SenderIdentity(parsed.name, kind, confirmed)
+
@@ -1,65 +1,265 @@
-from pypdf import PdfReader
 import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.services.mime import parse_email
 
 logger = logging.getLogger(__name__)
 
+FileSource = Union[bytes, str, BinaryIO]
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+
 
-def extract_text_from_file(file, filename: str) -> str:
+def extract_text_from_file(file: FileSource, filename: str) -> str:
     """
-    Extrai texto de arquivo (PDF ou TXT).
+    Extrai texto de arquivo (PDF, TXT ou EML).
+
+    `file` pode ser o conteúdo em bytes, o caminho de um arquivo em disco
+    ou um objeto de arquivo binário (ex.: arquivo temporário do upload).
     """
-    
+
     try:
         if filename.endswith(".txt"):
+            content = _read_all(file)
             try:
-                return file.decode("utf-8")
+                return content.decode("utf-8")
             except UnicodeDecodeError:
-                return file.decode("latin-1")
-        
+                return content.decode("latin-1")
+
         if filename.endswith(".pdf"):
             return _extract_text_from_pdf(file)
-        
+
+        if filename.endswith(".eml"):
+            # Cabeçalhos "De:"/"Assunto:" seguidos do corpo de texto
+            return parse_email(file).to_text()
+
         return ""
-    
+
     except Exception as e:
         logger.error(f"Erro ao extrair texto: {e}")
         raise Exception(f"Não foi possível extrair texto do arquivo: {str(e)}")
 
 
-def _extract_text_from_pdf(file_content: bytes) -> str:
+def _read_all(file: FileSource) -> bytes:
+    if isinstance(file, bytes):
+        return file
+    if isinstance(file, str):
+        with open(file, "rb") as f:
+            return f.read()
+    file.seek(0)
+    return file.read()
+
+
+def _open_stream(file: FileSource) -> Tuple[BinaryIO, bool]:
+    """
+    Retorna um stream com seek para o PdfReader, sem copiar o conteúdo.
+
+    Caminhos são abertos como arquivo (o pypdf lê sob demanda); se
+    recebesse o caminho em si, leria o arquivo inteiro para a memória.
+
+    Returns:
+        Tupla (stream, deve_fechar).
+    """
+    if isinstance(file, bytes):
+        return BytesIO(file), True
+    if isinstance(file, str):
+        return open(file, "rb"), True
+    file.seek(0)
+    return file, False
+
+
+def _iter_reader_pages(reader, start: int, end: Optional[int]) -> Iterator[Tuple[int, str]]:
+    total = len(reader.pages)
+
+    for page_num in range(start, min(end if end is not None else total, total)):
+        try:
+            page_text = reader.pages[page_num].extract_text() or ""
+        except Exception as e:
+            logger.warning("Erro ao extrair página %d: %s", page_num + 1, e)
+            page_text = ""
+
+        if not page_text:
+            logger.debug("Página %d: Nenhum texto extraído", page_num + 1)
+
+        yield page_num, page_text
+
+
+def iter_pdf_pages(
+    file: FileSource,
+    start: int = 0,
+    end: Optional[int] = None
+) -> Iterator[Tuple[int, str]]:
+    """
+    Extrai as páginas do PDF sob demanda.
+
+    Args:
+        file: Conteúdo, caminho ou stream do PDF
+        start: Primeira página (base 0)
+        end: Página final (exclusiva); None para ir até o fim
+
+    Yields:
+        Tuplas (número da página, texto extraído).
+    """
+    from pypdf import PdfReader
+
+    stream, should_close = _open_stream(file)
+
+    try:
+        yield from _iter_reader_pages(PdfReader(stream), start, end)
+    finally:
+        if should_close:
+            stream.close()
+
+
+def _extract_page_range(path: str, start: int, end: int) -> List[str]:
+    """Executado nos processos do pool: abre o PDF e extrai um intervalo de páginas"""
+    return [text for _, text in iter_pdf_pages(path, start, end)]
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(max_workers=settings.PDF_WORKERS)
+
+    return _pdf_pool
+
+
+def shutdown_pdf_pool() -> None:
+    """Encerra o pool de processos de extração (chamado no shutdown)"""
+    global _pdf_pool
+
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+
+
+def _spool_to_disk(file: FileSource) -> Tuple[str, bool]:
+    """
+    Garante um caminho em disco para os processos do pool abrirem.
+
+    Returns:
+        Tupla (caminho, é_temporário).
+    """
+    if isinstance(file, str):
+        return file, False
+
+    name = getattr(file, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return name, False
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        if isinstance(file, bytes):
+            tmp.write(file)
+        else:
+            file.seek(0)
+            shutil.copyfileobj(file, tmp)
+        return tmp.name, True
+
+
+def _iter_pages_parallel(file: FileSource, total_pages: int) -> Iterator[str]:
     """
-    Extrai texto de PDF com múltiplas tentativas.
+    Extrai as páginas em paralelo, em ondas de intervalos enviados ao pool.
+
+    As ondas são consumidas em ordem, então quem itera pode parar assim
+    que o orçamento de caracteres for atingido sem extrair o resto.
     """
-    pdf_file = BytesIO(file_content)
-    
+    path, is_temp = _spool_to_disk(file)
+    pool = _get_pdf_pool()
+    pages_per_task = settings.PDF_PAGES_PER_TASK
+    wave_size = settings.PDF_WORKERS * pages_per_task
+
     try:
-        reader = PdfReader(pdf_file)
-        
-        if len(reader.pages) == 0:
+        for wave_start in range(0, total_pages, wave_size):
+            wave_end = min(wave_start + wave_size, total_pages)
+            futures = [
+                pool.submit(_extract_page_range, path, start, min(start + pages_per_task, wave_end))
+                for start in range(wave_start, wave_end, pages_per_task)
+            ]
+            for future in futures:
+                yield from future.result()
+    finally:
+        if is_temp:
+            os.unlink(path)
+
+
+def _extract_text_from_pdf(
+    file: FileSource,
+    max_chars: Optional[int] = None,
+    max_pages: Optional[int] = None
+) -> str:
+    """
+    Extrai texto de PDF página a página.
+
+    A extração para assim que `max_chars` caracteres (padrão:
+    `settings.PDF_MAX_CHARS`) ou `max_pages` páginas (padrão:
+    `settings.PDF_MAX_PAGES`) são atingidos; 0 desativa o limite.
+    Documentos grandes são extraídos em um pool de processos quando
+    `settings.PDF_WORKERS` > 0.
+    """
+    max_chars = settings.PDF_MAX_CHARS if max_chars is None else max_chars
+    max_pages = settings.PDF_MAX_PAGES if max_pages is None else max_pages
+
+    from pypdf import PdfReader
+
+    stream, should_close = _open_stream(file)
+
+    try:
+        reader = PdfReader(stream)
+        total_pages = len(reader.pages)
+
+        if total_pages == 0:
             raise Exception("PDF vazio ou corrompido")
-        
-        logger.info(f"PDF contém {len(reader.pages)} página(s)")
-        
-        text = ""
-        for page_num, page in enumerate(reader.pages):
-            try:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-                    logger.info(f"Página {page_num + 1}: {len(page_text)} caracteres extraídos")
-                else:
-                    logger.warning(f"Página {page_num + 1}: Nenhum texto extraído")
-            except Exception as e:
-                logger.warning(f"Erro ao extrair página {page_num + 1}: {e}")
-                continue
-        
+
+        pages_to_read = min(total_pages, max_pages) if max_pages else total_pages
+
+        logger.info(f"PDF contém {total_pages} página(s); lendo até {pages_to_read}")
+
+        # Dentro de um processo do pool de CPU, não abre outro pool de processos
+        parallel = settings.PDF_WORKERS > 0 and multiprocessing.parent_process() is None
+        if parallel and pages_to_read >= settings.PDF_PARALLEL_MIN_PAGES:
+            pages = _iter_pages_parallel(file, pages_to_read)
+        else:
+            pages = (text for _, text in _iter_reader_pages(reader, 0, pages_to_read))
+
+        parts: List[str] = []
+        length = 0
+        pages_read = 0
+
+        try:
+            for page_text in pages:
+                pages_read += 1
+                if not page_text:
+                    continue
+                parts.append(page_text)
+                length += len(page_text) + 1
+                if max_chars and length >= max_chars:
+                    logger.info(f"Limite de {max_chars} caracteres atingido na página {pages_read}")
+                    break
+        finally:
+            pages.close()
+
+        text = "\n".join(parts)
+        if max_chars:
+            text = text[:max_chars]
+
         if not text or text.strip() == "":
             raise Exception("Nenhum texto foi extraído do PDF")
-        
-        logger.info(f"Total de caracteres extraídos: {len(text)}")
+
+        logger.info(f"Total de caracteres extraídos: {len(text)} ({pages_read} página(s))")
         return text.strip()
-    
+
     except Exception as e:
         logger.error(f"Erro ao processar PDF: {e}")
-        raise Exception(f"Erro ao ler PDF: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Erro ao ler PDF: {str(e)}")
+
+    finally:
+        if should_close:
+            stream.close()
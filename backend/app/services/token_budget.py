@@ -0,0 +1,160 @@
+import math
+import re
+from bisect import bisect_right
+from typing import Dict, List, Tuple
+
+from app.core.config import settings
+from app.services.keywords import keyword_matcher
+
+# Média de caracteres por token em português nos tokenizadores BPE comuns;
+# a estimativa não precisa ser exata, só limitar o tamanho do prompt
+CHARS_PER_TOKEN = 3.5
+
+OMISSION = "\n[...]\n"
+
+# O meio do texto só é pontuado até este tamanho, para que o custo do
+# estágio também fique limitado em entradas enormes
+MAX_SCAN_CHARS = 200_000
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?;])\s+|\n\s*\n")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa barata do número de tokens (sem carregar tokenizador)"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def _cut_head(text: str, max_chars: int) -> str:
+    """Início do texto, terminando em um espaço quando possível"""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    boundary = cut.rfind(" ", int(max_chars * 0.8))
+    return cut[:boundary] if boundary > 0 else cut
+
+
+def _cut_tail(text: str, max_chars: int) -> str:
+    """Fim do texto, começando após um espaço quando possível"""
+    if max_chars <= 0:
+        return ""
+    if len(text) <= max_chars:
+        return text
+    cut = text[-max_chars:]
+    boundary = cut.find(" ", 0, int(max_chars * 0.2))
+    return cut[boundary + 1:] if boundary >= 0 else cut
+
+
+def _top_sentences(text: str, max_chars: int) -> List[str]:
+    """
+    Frases com mais peso de palavras-chave (ver `app/data/keywords.json`)
+    que cabem em `max_chars`, na ordem em que aparecem no texto.
+    """
+    spans = keyword_matcher.weighted_spans(text)
+    if not spans or max_chars <= 0:
+        return []
+
+    bounds = []
+    start = 0
+    for match in _SENTENCE_BREAK.finditer(text):
+        bounds.append((start, match.start()))
+        start = match.end()
+    bounds.append((start, len(text)))
+
+    starts = [s for s, _ in bounds]
+    scores = [0.0] * len(bounds)
+    for position, weight in spans:
+        scores[bisect_right(starts, position) - 1] += weight
+
+    ranked = sorted(
+        (i for i, score in enumerate(scores) if score > 0),
+        key=lambda i: scores[i],
+        reverse=True,
+    )
+
+    chosen = []
+    remaining = max_chars
+    for i in ranked:
+        size = bounds[i][1] - bounds[i][0] + 1
+        if size <= remaining:
+            chosen.append(i)
+            remaining -= size
+
+    return [text[bounds[i][0]:bounds[i][1]].strip() for i in sorted(chosen)]
+
+
+def fit_to_budget(
+    text: str,
+    max_tokens: int,
+    top_sentences: bool = True
+) -> Tuple[str, Dict[str, float]]:
+    """
+    Reduz o texto para caber em `max_tokens` tokens estimados.
+
+    Mantém o início (assunto e abertura), o fim (pedido e fechamento) e,
+    se `top_sentences`, as frases do meio com mais palavras-chave. As
+    partes omitidas são marcadas com "[...]".
+
+    Args:
+        text: Texto a reduzir
+        max_tokens: Orçamento de tokens; 0 desativa o limite
+        top_sentences: Se True, reserva parte do orçamento para frases do meio
+
+    Returns:
+        Tupla (texto, metadados) com o orçamento, os tokens estimados antes e
+        depois e a fração removida (`truncation_ratio`).
+    """
+    original_tokens = estimate_tokens(text)
+    meta = {
+        "budget_tokens": max_tokens,
+        "original_tokens": original_tokens,
+        "kept_tokens": original_tokens,
+        "truncation_ratio": 0.0,
+    }
+
+    if not max_tokens or original_tokens <= max_tokens:
+        return text, meta
+
+    budget_chars = max(0, int(max_tokens * CHARS_PER_TOKEN) - 2 * len(OMISSION))
+    tail_chars = int(budget_chars * 0.2)
+    middle_chars = int(budget_chars * 0.25) if top_sentences else 0
+    head_chars = budget_chars - tail_chars - middle_chars
+
+    tail = _cut_tail(text, tail_chars)
+    body = text[:len(text) - len(tail)]
+    head = _cut_head(body, head_chars)
+
+    middle = body[len(head):len(head) + MAX_SCAN_CHARS]
+    picked = _top_sentences(middle, middle_chars) if middle_chars else []
+    if not picked:
+        head = _cut_head(body, head_chars + middle_chars)
+
+    parts = [head]
+    if picked:
+        parts.append(" ".join(picked))
+    if tail:
+        parts.append(tail)
+    reduced = OMISSION.join(parts)
+
+    kept_tokens = estimate_tokens(reduced)
+    meta["kept_tokens"] = kept_tokens
+    meta["truncation_ratio"] = round(1 - kept_tokens / original_tokens, 4)
+
+    return reduced, meta
+
+
+def apply_token_budgets(text: str, message: str) -> Tuple[str, str, Dict[str, Dict[str, float]]]:
+    """
+    Aplica os orçamentos de cada tarefa antes do pré-processamento e dos prompts.
+
+    - `text` (assunto + corpo, usado na classificação): `settings.TOKEN_BUDGET_CLASSIFY`
+    - `message` (corpo original, usado na resposta): `settings.TOKEN_BUDGET_GENERATE`
+
+    Returns:
+        Tupla (text, message, metadados por tarefa).
+    """
+    top_sentences = settings.TOKEN_BUDGET_TOP_SENTENCES
+
+    text, classify_meta = fit_to_budget(text, settings.TOKEN_BUDGET_CLASSIFY, top_sentences)
+    message, generate_meta = fit_to_budget(message, settings.TOKEN_BUDGET_GENERATE, top_sentences)
+
+    return text, message, {"classify": classify_meta, "generate": generate_meta}
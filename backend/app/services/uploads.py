@@ -0,0 +1,185 @@
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, BinaryIO, Optional, Union
+
+from fastapi import HTTPException, UploadFile
+
+from app.core.config import settings
+from app.core.metrics import observe_stage
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLargeError(Exception):
+    """O upload ultrapassou `settings.MAX_FILE_SIZE`"""
+
+
+@asynccontextmanager
+async def spooled_upload(upload: UploadFile, max_size: Optional[int] = None) -> AsyncIterator[BinaryIO]:
+    """
+    Entrega o upload como arquivo binário sem carregá-lo inteiro na memória.
+
+    Quando o tamanho já é conhecido (o parser multipart do Starlette grava
+    o arquivo em um SpooledTemporaryFile), o limite é verificado sem ler
+    nada e o próprio arquivo do upload é reaproveitado; nesse caso quem
+    impede que um corpo grande demais chegue inteiro ao disco é o
+    `UploadSizeLimitMiddleware`. Caso contrário, o conteúdo é copiado em
+    blocos de `settings.UPLOAD_CHUNK_SIZE` para um SpooledTemporaryFile
+    que vai para o disco acima de `settings.UPLOAD_SPOOL_THRESHOLD`,
+    abortando assim que o limite é ultrapassado.
+
+    Raises:
+        UploadTooLargeError: Se o arquivo for maior que `max_size`
+            (padrão: `settings.MAX_FILE_SIZE`).
+    """
+    max_size = settings.MAX_FILE_SIZE if max_size is None else max_size
+
+    if upload.size is not None:
+        if upload.size > max_size:
+            raise UploadTooLargeError()
+        await upload.seek(0)
+        yield upload.file
+        return
+
+    spool = tempfile.SpooledTemporaryFile(max_size=settings.UPLOAD_SPOOL_THRESHOLD)
+
+    try:
+        start = time.perf_counter()
+        size = 0
+        while True:
+            chunk = await upload.read(settings.UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_size:
+                raise UploadTooLargeError()
+            spool.write(chunk)
+
+        spool.seek(0)
+        observe_stage("upload_read", time.perf_counter() - start)
+        yield spool
+
+    finally:
+        spool.close()
+
+
+def cpu_source(file: BinaryIO) -> Optional[Union[BinaryIO, bytes, str]]:
+    """
+    Versão do upload que pode ser enviada a `run_cpu`.
+
+    Com `CPU_EXECUTOR=process` os argumentos vão por pickle: arquivos com
+    nome em disco são passados pelo caminho e os pequenos (até
+    `UPLOAD_SPOOL_THRESHOLD`, ainda em memória) pelo conteúdo. Com o pool
+    de threads o próprio arquivo serve.
+
+    Returns:
+        Arquivo, caminho ou bytes; None se só existir o descritor de um
+        arquivo temporário anônimo grande (use `run_cpu_thread`).
+    """
+    if settings.CPU_EXECUTOR != "process":
+        return file
+
+    name = getattr(file, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return name
+
+    size = file.seek(0, os.SEEK_END)
+    file.seek(0)
+    if size <= settings.UPLOAD_SPOOL_THRESHOLD:
+        return file.read()
+
+    return None
+
+
+def _limit_for(path: str) -> int:
+    if path.endswith("/classify-mbox"):
+        return settings.MBOX_MAX_FILE_SIZE
+    return settings.MAX_FILE_SIZE
+
+
+def _too_large_detail(limit: int) -> str:
+    return f"Arquivo muito grande. Máximo: {limit / 1024 / 1024}MB"
+
+
+class BodyTooLargeError(HTTPException):
+    """O corpo da requisição passou do limite durante a leitura"""
+
+    def __init__(self, limit: int):
+        super().__init__(status_code=413, detail=_too_large_detail(limit), headers={"Connection": "close"})
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Limita o tamanho do corpo das requisições POST.
+
+    Com Content-Length acima do limite, rejeita antes de ler o corpo. Sem
+    ele (ou com transferência em blocos), conta os bytes recebidos e
+    interrompe a leitura assim que o limite é ultrapassado, então o parser
+    multipart nunca grava em disco mais do que o limite. A folga cobre os
+    cabeçalhos do multipart. Caixas .mbox (`/classify-mbox`) têm limite
+    próprio, `settings.MBOX_MAX_FILE_SIZE`.
+    """
+
+    def __init__(self, app, overhead: int = 64 * 1024):
+        self.app = app
+        self.overhead = overhead
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        limit = _limit_for(scope["path"])
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > limit + self.overhead:
+                    logger.warning("Upload rejeitado pelo Content-Length: %d bytes", int(value))
+                    await self._reject(send, limit)
+                    return
+                break
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit + self.overhead:
+                    logger.warning("Upload interrompido após %d bytes", received)
+                    # Tratada pelo FastAPI como qualquer HTTPException (resposta 413)
+                    raise BodyTooLargeError(limit)
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except BodyTooLargeError:
+            # Leitura feita fora do tratamento de exceções do FastAPI
+            if response_started:
+                raise
+            await self._reject(send, limit)
+
+    async def _reject(self, send, limit: int) -> None:
+        body = json.dumps({"detail": _too_large_detail(limit)}, ensure_ascii=False).encode("utf-8")
+
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,101 @@
+"""
+Benchmark do pré-processamento spaCy.
+
+Compara o pipeline completo (todos os componentes) com o pipeline enxuto
+usado por `preprocess_text`, medindo tempo de CPU por email e RSS do
+processo. Cada configuração roda em um subprocesso próprio para que o
+RSS de uma não contamine a outra.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_nlp --emails 500 --size 1500
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+CONFIGS = {
+    "full": [],
+    "slim": None,
+}
+
+
+def _rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_config(name: str, emails: int, size: int, batch: bool) -> dict:
+    """Executa uma configuração no processo atual e retorna as métricas"""
+    from app.core.config import settings
+    from app.services import nlp
+    from benchmarks.corpus import generate_emails
+
+    exclude = CONFIGS[name]
+    if exclude is not None:
+        settings.SPACY_EXCLUDE = exclude
+
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    nlp.get_nlp()
+    load_time = time.perf_counter() - start
+
+    texts = generate_emails(emails, size)
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    if batch:
+        nlp.preprocess_texts(texts)
+    else:
+        for text in texts:
+            nlp.preprocess_text(text)
+    cpu_time = time.process_time() - cpu_start
+    wall_time = time.perf_counter() - wall_start
+
+    return {
+        "config": name,
+        "mode": "batch" if batch else "single",
+        "components": nlp.get_nlp().pipe_names,
+        "emails": emails,
+        "email_size": size,
+        "load_time_s": round(load_time, 3),
+        "cpu_ms_per_email": round(cpu_time * 1000 / emails, 3),
+        "wall_ms_per_email": round(wall_time * 1000 / emails, 3),
+        "rss_model_mb": round(_rss_mb() - rss_before, 1),
+        "rss_peak_mb": round(_rss_mb(), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--emails", type=int, default=500)
+    parser.add_argument("--size", type=int, default=1500)
+    parser.add_argument("--config", choices=CONFIGS, help="Executa só esta configuração (uso interno)")
+    parser.add_argument("--batch", action="store_true", help="Usa preprocess_texts (nlp.pipe)")
+    args = parser.parse_args()
+
+    if args.config:
+        print(json.dumps(run_config(args.config, args.emails, args.size, args.batch)))
+        return
+
+    results = []
+    for name in CONFIGS:
+        for batch in (False, True):
+            command = [
+                sys.executable, "-m", "benchmarks.bench_nlp",
+                "--config", name,
+                "--emails", str(args.emails),
+                "--size", str(args.size),
+            ]
+            if batch:
+                command.append("--batch")
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
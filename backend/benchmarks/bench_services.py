@@ -0,0 +1,121 @@
+"""
+Microbenchmarks das funções de serviço.
+
+Mede cada função sobre corpora gerados (`benchmarks.corpus`) de vários
+tamanhos e reporta vazão e percentis p50/p95/p99 por caso, em JSON.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_services
+    python -m benchmarks.bench_services --only preprocess --sizes 500 5000 --output antes.json
+"""
+
+import argparse
+import logging
+import time
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.corpus import generate_emails, generate_pdf
+from benchmarks.stats import environment, summarize, write_report
+
+DEFAULT_SIZES = [500, 5000, 50000]
+DEFAULT_PAGES = [1, 10, 50]
+
+# Cada caso: (nome, função que recebe um item do corpus, corpus)
+Case = Tuple[str, Callable[[any], any], List[any]]
+
+
+def _text_cases(sizes: List[int], count: int) -> List[Case]:
+    from app.services.ai import _fallback_classification
+    from app.services.near_duplicate import minhash
+    from app.services.nlp import preprocess_text
+    from app.services.pipeline import extract_subject_and_sender
+    from app.services.reducer import reduce_content
+    from app.services.token_budget import apply_token_budgets
+
+    cases = []
+    for size in sizes:
+        emails = generate_emails(count, size)
+        # Cabeçalho no formato esperado por extract_subject_and_sender
+        with_headers = [
+            f"De: Maria Souza <maria@example.com>\nAssunto: Proposta {i}\n\n{email}"
+            for i, email in enumerate(emails)
+        ]
+        # Resposta com assinatura e o email anterior citado
+        with_thread = [
+            f"{email}\n\nAtenciosamente,\nMaria Souza\n\n"
+            f"Em ter., 13 de out. de 2026 às 10:02, João <joao@example.com> escreveu:\n"
+            + "".join(f"> {line}\n" for line in emails[i - 1].splitlines())
+            for i, email in enumerate(emails)
+        ]
+        cases += [
+            (f"preprocess_text[{size}]", preprocess_text, emails),
+            (f"fallback_classification[{size}]", _fallback_classification, emails),
+            (f"token_budget[{size}]", lambda text: apply_token_budgets(text, text), emails),
+            (f"reduce_content[{size}]", reduce_content, with_thread),
+            (f"near_duplicate_minhash[{size}]", minhash, emails),
+            (f"extract_subject_and_sender[{size}]", extract_subject_and_sender, with_headers),
+        ]
+    return cases
+
+
+def _pdf_cases(pages: List[int], count: int) -> List[Case]:
+    from app.services.text_extractor import _extract_text_from_pdf
+
+    return [
+        (
+            f"extract_text_from_pdf[{n}p]",
+            _extract_text_from_pdf,
+            [generate_pdf(n, seed=seed) for seed in range(count)],
+        )
+        for n in pages
+    ]
+
+
+def run_case(func: Callable[[any], any], corpus: List[any], warmup: int, min_time: float,
+             max_iterations: int) -> Dict[str, float]:
+    """Executa `func` ciclando pelo corpus até `min_time` segundos ou `max_iterations` chamadas"""
+    for item in corpus[:warmup]:
+        func(item)
+
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < max_iterations:
+        item = corpus[len(samples) % len(corpus)]
+        start = time.perf_counter()
+        func(item)
+        samples.append(time.perf_counter() - start)
+        if time.perf_counter() - started >= min_time and len(samples) >= len(corpus):
+            break
+
+    return summarize(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Tamanhos de email (caracteres)")
+    parser.add_argument("--pages", type=int, nargs="+", default=DEFAULT_PAGES, help="Tamanhos de PDF (páginas)")
+    parser.add_argument("--corpus", type=int, default=20, help="Itens distintos por caso")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--min-time", type=float, default=1.0, help="Tempo mínimo por caso (s)")
+    parser.add_argument("--max-iterations", type=int, default=1000)
+    parser.add_argument("--only", help="Executa só os casos cujo nome contém este texto")
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: saída padrão)")
+    args = parser.parse_args()
+
+    # Os serviços registram logs por chamada; só interessam os avisos
+    logging.basicConfig(level=logging.WARNING)
+
+    cases = _text_cases(args.sizes, args.corpus) + _pdf_cases(args.pages, args.corpus)
+    if args.only:
+        cases = [case for case in cases if args.only in case[0]]
+
+    results = {}
+    for name, func, corpus in cases:
+        results[name] = run_case(func, corpus, args.warmup, args.min_time, args.max_iterations)
+        logging.warning("%s: p50 %.3f ms", name, results[name]["p50_ms"])
+
+    write_report({"benchmark": "services", "environment": environment(), "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
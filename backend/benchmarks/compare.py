@@ -0,0 +1,76 @@
+"""
+Compara dois relatórios JSON dos benchmarks (ex.: antes e depois de uma mudança).
+
+Mostra a variação de cada métrica de latência (`*_ms`, menor é melhor) e
+de vazão (`*_per_s`, maior é melhor) e termina com código 1 se alguma
+piorou mais que `--threshold`.
+
+Uso (a partir de backend/):
+    python -m benchmarks.compare antes.json depois.json --threshold 0.10
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict
+
+
+def _flatten(data: any, prefix: str = "") -> Dict[str, float]:
+    if isinstance(data, dict):
+        flat = {}
+        for key, value in data.items():
+            flat.update(_flatten(value, f"{prefix}.{key}" if prefix else key))
+        return flat
+    if isinstance(data, (int, float)) and not isinstance(data, bool):
+        return {prefix: float(data)}
+    return {}
+
+
+def compare(baseline: Dict[str, any], current: Dict[str, any], threshold: float) -> bool:
+    """Imprime a tabela de variações; retorna True se houve regressão"""
+    before = _flatten(baseline.get("results", {}))
+    after = _flatten(current.get("results", {}))
+    regressed = False
+
+    print(f"{'métrica':<60} {'antes':>12} {'depois':>12} {'variação':>9}")
+    for name in sorted(before.keys() & after.keys()):
+        if name.endswith("_ms"):
+            higher_is_better = False
+        elif name.endswith("_per_s"):
+            higher_is_better = True
+        else:
+            continue
+
+        old, new = before[name], after[name]
+        change = (new - old) / old if old else 0.0
+        worse = -change if higher_is_better else change
+        flag = ""
+        if worse > threshold:
+            flag = "  <- regressão"
+            regressed = True
+        print(f"{name:<60} {old:>12.3f} {new:>12.3f} {change:>+8.1%}{flag}")
+
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Piora tolerada (fração)")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+
+    for label, report in (("antes", baseline), ("depois", current)):
+        env = report.get("environment", {})
+        print(f"{label}: {report.get('benchmark')} @ {env.get('git_commit')} ({env.get('timestamp')})")
+
+    sys.exit(1 if compare(baseline, current, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
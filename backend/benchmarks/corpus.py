@@ -0,0 +1,98 @@
+"""
+Geração de corpora sintéticos para os benchmarks.
+"""
+
+import random
+from typing import List
+
+PRODUCTIVE_SENTENCES = [
+    "Gostaria de agendar uma reunião para discutir o planejamento do trimestre.",
+    "Segue em anexo o relatório com a análise de performance da equipe.",
+    "Precisamos revisar o contrato antes da assinatura na próxima semana.",
+    "O prazo de entrega do projeto foi ajustado para o dia 15.",
+    "Poderia enviar o feedback sobre a proposta apresentada ontem?",
+    "Os dados do orçamento foram atualizados na planilha compartilhada.",
+]
+
+UNPRODUCTIVE_SENTENCES = [
+    "CLIQUE AQUI e ganhe 50% de desconto em todos os produtos!",
+    "Parabéns, você foi selecionado para receber um prêmio exclusivo!",
+    "Oferta imperdível por tempo limitado, compre agora!",
+    "Confirme seus dados de acesso clicando no link abaixo.",
+    "Não perca as novidades da semana na nossa newsletter.",
+    "Sorteio válido por 24 horas, aproveite!",
+]
+
+
+def generate_email(size: int, productive: bool = True, seed: int = 0) -> str:
+    """Gera um email com aproximadamente `size` caracteres"""
+    rng = random.Random(seed)
+    sentences = PRODUCTIVE_SENTENCES if productive else UNPRODUCTIVE_SENTENCES
+
+    parts = ["Olá,"]
+    length = 0
+    while length < size:
+        sentence = rng.choice(sentences)
+        parts.append(sentence)
+        length += len(sentence) + 1
+    parts.append("Atenciosamente,")
+
+    return "\n".join(parts)
+
+
+def generate_emails(count: int, size: int, seed: int = 0) -> List[str]:
+    """Gera `count` emails alternando produtivos e improdutivos"""
+    return [
+        generate_email(size, productive=index % 2 == 0, seed=seed + index)
+        for index in range(count)
+    ]
+
+
+def _pdf_escape(line: str) -> bytes:
+    encoded = line.encode("cp1252", errors="replace")
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def generate_pdf(pages: int, chars_per_page: int = 1500, seed: int = 0) -> bytes:
+    """
+    Gera um PDF válido com `pages` páginas de texto extraível.
+
+    O arquivo é montado à mão (fonte Helvetica padrão, sem compressão),
+    para não depender de bibliotecas de geração de PDF.
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    page_ids = []
+
+    for page in range(pages):
+        text = generate_email(chars_per_page, productive=page % 2 == 0, seed=seed + page)
+        lines = b"".join(b"(" + _pdf_escape(line) + b") Tj T* " for line in text.split("\n"))
+        stream = b"BT /F1 10 Tf 12 TL 40 800 Td " + lines + b"ET"
+
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    return bytes(output)
@@ -0,0 +1,237 @@
+"""
+Teste de carga ponta a ponta.
+
+Sobe o stub LLM (`benchmarks.stub_llm`) e a aplicação (uvicorn) em
+subprocessos, apontando a aplicação para o stub, e dispara requisições
+concorrentes contra um endpoint. Reporta vazão, erros e latência
+p50/p95/p99 em JSON (e, no streaming, também o tempo até o primeiro byte).
+
+Uso (a partir de backend/):
+    python -m benchmarks.load_test --endpoint classify --concurrency 32 --requests 500
+    python -m benchmarks.load_test --endpoint stream --stub-latency 0.5 --output stream.json
+
+Para medir uma instância já em execução (sem subir stub e aplicação):
+    python -m benchmarks.load_test --url http://127.0.0.1:8000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+import httpx
+
+from benchmarks.corpus import generate_email, generate_pdf
+from benchmarks.stats import environment, summarize, write_report
+
+logger = logging.getLogger("benchmarks.load_test")
+
+ENDPOINTS = ["classify", "stream", "batch", "file"]
+API_PREFIX = "/api/v1/email"
+
+
+def _email_payload(index: int, size: int) -> Dict[str, any]:
+    # Mensagens distintas por requisição; com use_cache=False toda chamada chega ao LLM
+    return {
+        "sender": f"Contato {index} <contato{index}@example.com>",
+        "subject": f"Assunto {index}",
+        "message": generate_email(size, productive=index % 2 == 0, seed=index),
+        "use_cache": False,
+    }
+
+
+async def _request(client: httpx.AsyncClient, endpoint: str, index: int, args) -> Dict[str, any]:
+    """Executa uma requisição e retorna status, duração e tempo até o primeiro byte"""
+    start = time.perf_counter()
+    first_byte = None
+
+    if endpoint == "classify":
+        response = await client.post(f"{API_PREFIX}/classify", json=_email_payload(index, args.size))
+    elif endpoint == "batch":
+        items = [_email_payload(index * args.batch_size + i, args.size) for i in range(args.batch_size)]
+        response = await client.post(f"{API_PREFIX}/classify-batch", json={"items": items, "use_cache": False})
+    elif endpoint == "file":
+        response = await client.post(
+            f"{API_PREFIX}/classify-file",
+            params={"use_cache": False},
+            files={"file": (f"email-{index}.pdf", generate_pdf(args.pages, seed=index), "application/pdf")},
+        )
+    else:
+        async with client.stream("POST", f"{API_PREFIX}/classify-stream", json=_email_payload(index, args.size)) as response:
+            async for _ in response.aiter_bytes():
+                if first_byte is None:
+                    first_byte = time.perf_counter() - start
+
+    return {
+        "status": response.status_code,
+        "duration": time.perf_counter() - start,
+        "first_byte": first_byte,
+    }
+
+
+async def run_load(base_url: str, args) -> Dict[str, any]:
+    """Dispara `args.requests` requisições (ou até `args.duration` s) com `args.concurrency` simultâneas"""
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    samples: List[Dict[str, any]] = []
+    errors: Counter = Counter()
+    next_index = 0
+    deadline = time.perf_counter() + args.duration if args.duration else None
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal next_index
+        while next_index < args.requests and (deadline is None or time.perf_counter() < deadline):
+            index = next_index
+            next_index += 1
+            try:
+                sample = await _request(client, args.endpoint, index, args)
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] += 1
+                continue
+            if sample["status"] >= 400:
+                errors[str(sample["status"])] += 1
+            else:
+                samples.append(sample)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        # Aquecimento: carrega modelos e abre conexões antes da medição
+        for index in range(args.warmup):
+            await _request(client, args.endpoint, args.requests + index, args)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+        metrics = (await client.get("/metrics")).text if args.scrape_metrics else None
+
+    report = {
+        "latency": summarize([s["duration"] for s in samples], elapsed),
+        "errors": dict(errors),
+        "error_rate": round(sum(errors.values()) / max(1, len(samples) + sum(errors.values())), 4),
+        "elapsed_s": round(elapsed, 3),
+    }
+    if args.endpoint == "stream":
+        report["time_to_first_byte"] = summarize([s["first_byte"] for s in samples if s["first_byte"] is not None])
+    if args.endpoint == "batch":
+        report["emails_per_s"] = round(len(samples) * args.batch_size / elapsed, 2) if elapsed else 0.0
+    if metrics is not None:
+        report["metrics"] = metrics
+    return report
+
+
+def _wait_until_ready(url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{url} não ficou pronto em {timeout}s")
+
+
+@contextmanager
+def _local_servers(args) -> Iterator[str]:
+    """Sobe stub LLM e aplicação em subprocessos e retorna a URL da aplicação"""
+    stub_command = [
+        sys.executable, "-m", "benchmarks.stub_llm",
+        "--port", str(args.stub_port),
+        "--latency", str(args.stub_latency),
+        "--jitter", str(args.stub_jitter),
+        "--slow-rate", str(args.stub_slow_rate),
+        "--error-rate", str(args.stub_error_rate),
+    ]
+    env = {
+        **os.environ,
+        "HF_API_URL": f"http://127.0.0.1:{args.stub_port}/v1",
+        "HF_TOKEN": "stub",
+        "LLM_ROUTES": "{}",
+        "CACHE_ENABLED": "false",
+        "JOBS_ENABLED": "false",
+        "LOG_LEVEL": "WARNING",
+    }
+    app_command = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1",
+        "--port", str(args.app_port),
+        "--workers", str(args.app_workers),
+        "--log-level", "warning",
+        "--no-access-log",
+    ]
+
+    processes: List[subprocess.Popen] = []
+    try:
+        processes.append(subprocess.Popen(stub_command, stdout=subprocess.DEVNULL))
+        processes.append(subprocess.Popen(app_command, env=env))
+
+        base_url = f"http://127.0.0.1:{args.app_port}"
+        _wait_until_ready(f"{base_url}/ready", args.startup_timeout)
+        yield base_url
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint", choices=ENDPOINTS, default="classify")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="Total de requisições medidas")
+    parser.add_argument("--duration", type=float, default=0, help="Limite de tempo (s); 0 = sem limite")
+    parser.add_argument("--warmup", type=int, default=5, help="Requisições de aquecimento (não medidas)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Timeout por requisição (s)")
+    parser.add_argument("--size", type=int, default=1500, help="Tamanho dos emails (caracteres)")
+    parser.add_argument("--batch-size", type=int, default=10, help="Emails por requisição no endpoint batch")
+    parser.add_argument("--pages", type=int, default=3, help="Páginas do PDF no endpoint file")
+    parser.add_argument("--url", help="Aplicação já em execução (não sobe stub nem aplicação)")
+    parser.add_argument("--app-port", type=int, default=8010)
+    parser.add_argument("--app-workers", type=int, default=1)
+    parser.add_argument("--stub-port", type=int, default=8011)
+    parser.add_argument("--stub-latency", type=float, default=0.2)
+    parser.add_argument("--stub-jitter", type=float, default=0.05)
+    parser.add_argument("--stub-slow-rate", type=float, default=0.0)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--scrape-metrics", action="store_true", help="Inclui o /metrics final no relatório")
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: saída padrão)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    config = {
+        key: value for key, value in vars(args).items()
+        if key not in ("output", "scrape_metrics", "startup_timeout")
+    }
+
+    if args.url:
+        results = asyncio.run(run_load(args.url.rstrip("/"), args))
+    else:
+        with _local_servers(args) as base_url:
+            results = asyncio.run(run_load(base_url, args))
+
+    latency = results["latency"]
+    logger.info(
+        "%s: %.1f req/s, p50 %.1f ms, p95 %.1f ms, p99 %.1f ms, erros %s",
+        args.endpoint, latency["throughput_per_s"], latency["p50_ms"],
+        latency["p95_ms"], latency["p99_ms"], results["errors"] or 0,
+    )
+
+    write_report(
+        {"benchmark": f"load:{args.endpoint}", "environment": environment(), "config": config, "results": results},
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
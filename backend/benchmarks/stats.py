@@ -0,0 +1,85 @@
+"""
+Estatísticas e relatório comuns aos benchmarks.
+
+Todos os scripts produzem JSON com o mesmo formato de resumo
+(`summarize`) e os mesmos metadados de ambiente (`environment`), para
+que resultados de versões diferentes possam ser comparados com
+`python -m benchmarks.compare`.
+"""
+
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, Iterable, List, Optional
+
+
+def percentile(sorted_samples: List[float], fraction: float) -> float:
+    """Percentil por interpolação linear (amostras já ordenadas)"""
+    if not sorted_samples:
+        return 0.0
+    position = (len(sorted_samples) - 1) * fraction
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    return sorted_samples[lower] + (sorted_samples[upper] - sorted_samples[lower]) * (position - lower)
+
+
+def summarize(samples: Iterable[float], elapsed: Optional[float] = None) -> Dict[str, float]:
+    """
+    Resume durações em segundos: contagem, vazão e percentis em milissegundos.
+
+    `elapsed` é o tempo de parede total; sem ele, a vazão é calculada pela
+    soma das durações (execução sequencial).
+    """
+    ordered = sorted(samples)
+    total = sum(ordered)
+    elapsed = total if elapsed is None else elapsed
+
+    def ms(value: float) -> float:
+        return round(value * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "throughput_per_s": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": ms(total / len(ordered)) if ordered else 0.0,
+        "min_ms": ms(ordered[0]) if ordered else 0.0,
+        "p50_ms": ms(percentile(ordered, 0.50)),
+        "p95_ms": ms(percentile(ordered, 0.95)),
+        "p99_ms": ms(percentile(ordered, 0.99)),
+        "max_ms": ms(ordered[-1]) if ordered else 0.0,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, timeout=5,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def environment() -> Dict[str, any]:
+    """Versão do código e da máquina, gravados junto com os resultados"""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def write_report(report: Dict[str, any], output: Optional[str]) -> None:
+    """Grava o relatório em `output` (JSON) ou o imprime na saída padrão"""
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Resultados gravados em {output}", file=sys.stderr)
+    else:
+        print(text)
@@ -0,0 +1,219 @@
+"""
+Servidor LLM falso, compatível com `/v1/chat/completions` da API OpenAI.
+
+Serve para exercitar a camada de resiliência e os testes de carga sem
+depender do provedor real: latência configurável (com cauda lenta),
+taxa de erros (503 ou outro status) e streaming SSE. Usa só a
+biblioteca padrão; os testes de tests/test_resilience.py sobem o
+servidor no próprio processo.
+
+Uso (a partir de backend/):
+    python -m benchmarks.stub_llm --port 8001 --latency 0.2 --slow-rate 0.05 --error-rate 0.1
+
+e aponte a aplicação para ele:
+    HF_API_URL=http://127.0.0.1:8001/v1 HF_TOKEN=stub uvicorn app.main:app
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, Optional, Tuple
+
+CLASSIFY_REPLY = {"classification": "Produtivo", "confidence": 0.9}
+RESPONSE_TEXT = (
+    "Olá,\n\nAgradecemos o contato e as informações enviadas.\n"
+    "Vamos analisar os pontos apresentados com atenção.\n"
+    "Em breve retornaremos com um feedback completo.\n"
+    "Seguimos à disposição.\n\nAtenciosamente"
+)
+
+
+class StubConfig:
+    def __init__(self, latency: float, jitter: float, slow_rate: float, slow_latency: float,
+                 error_rate: float, chunk_delay: float, error_status: int = 503):
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.chunk_delay = chunk_delay
+        self.error_status = error_status
+        self.requests = 0
+
+    def delay(self) -> float:
+        if random.random() < self.slow_rate:
+            return self.slow_latency
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+
+def _reply_for(body: Dict) -> str:
+    """Escolhe o conteúdo pelo tipo de prompt (classificação, fused ou resposta)"""
+    prompt = " ".join(m.get("content", "") for m in body.get("messages", []))
+    if "suggested_response" in prompt:
+        return json.dumps({**CLASSIFY_REPLY, "suggested_response": RESPONSE_TEXT}, ensure_ascii=False)
+    if '"classification"' in prompt:
+        return json.dumps(CLASSIFY_REPLY)
+    return RESPONSE_TEXT
+
+
+def _completion(body: Dict, content: str) -> Dict:
+    prompt_chars = sum(len(m.get("content", "")) for m in body.get("messages", []))
+    return {
+        "id": f"stub-{time.monotonic_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": (prompt_chars + len(content)) // 4,
+        },
+    }
+
+
+def _chunk(body: Dict, delta: Dict, finish_reason: Optional[str] = None) -> bytes:
+    payload = {
+        "id": "stub-stream",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+
+    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+    return method, path, headers, body
+
+
+def _response_head(status: int, content_type: str, length: Optional[int] = None) -> bytes:
+    reason = {
+        200: "OK",
+        400: "Bad Request",
+        404: "Not Found",
+        429: "Too Many Requests",
+        503: "Service Unavailable",
+    }.get(status, "Error")
+    lines = [f"HTTP/1.1 {status} {reason}", f"Content-Type: {content_type}"]
+    if length is None:
+        lines.append("Transfer-Encoding: chunked")
+    else:
+        lines.append(f"Content-Length: {length}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def _http_chunk(data: bytes) -> bytes:
+    return f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n"
+
+
+async def handle(config: StubConfig, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            request = await _read_request(reader)
+            if request is None:
+                break
+
+            method, path, _, raw_body = request
+            config.requests += 1
+
+            if method != "POST" or not path.rstrip("/").endswith("/chat/completions"):
+                body = b'{"error": "not found"}'
+                writer.write(_response_head(404, "application/json", len(body)) + body)
+                await writer.drain()
+                continue
+
+            payload = json.loads(raw_body or b"{}")
+            await asyncio.sleep(config.delay())
+
+            if random.random() < config.error_rate:
+                body = b'{"error": {"message": "stub overloaded"}}'
+                writer.write(_response_head(config.error_status, "application/json", len(body)) + body)
+                await writer.drain()
+                continue
+
+            content = _reply_for(payload)
+
+            if not payload.get("stream"):
+                body = json.dumps(_completion(payload, content), ensure_ascii=False).encode("utf-8")
+                writer.write(_response_head(200, "application/json", len(body)) + body)
+                await writer.drain()
+                continue
+
+            writer.write(_response_head(200, "text/event-stream"))
+            writer.write(_http_chunk(_chunk(payload, {"role": "assistant", "content": ""})))
+            for word in content.split(" "):
+                writer.write(_http_chunk(_chunk(payload, {"content": word + " "})))
+                await writer.drain()
+                if config.chunk_delay:
+                    await asyncio.sleep(config.chunk_delay)
+            writer.write(_http_chunk(_chunk(payload, {}, "stop")))
+            writer.write(_http_chunk(b"data: [DONE]\n\n"))
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str, port: int, config: StubConfig) -> None:
+    server = await asyncio.start_server(
+        lambda r, w: handle(config, r, w), host, port, backlog=1024
+    )
+    print(f"Stub LLM em http://{host}:{port}/v1")
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor LLM falso para testes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2, help="Latência base (s)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Variação da latência (s)")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fração de respostas lentas")
+    parser.add_argument("--slow-latency", type=float, default=5.0, help="Latência das respostas lentas (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de respostas com erro")
+    parser.add_argument("--error-status", type=int, default=503, help="Status HTTP das respostas com erro")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="Intervalo entre trechos no streaming (s)")
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency,
+        error_rate=args.error_rate,
+        chunk_delay=args.chunk_delay,
+        error_status=args.error_status,
+    )
+
+    try:
+        asyncio.run(serve(args.host, args.port, config))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,19 @@
 import uvicorn
 import sys
 
+from app.core.config import settings
+
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+    # Desenvolvimento: processo único com reload (`python run.py --dev` ou SERVER_MODE=development)
+    if "--dev" in sys.argv or settings.SERVER_MODE == "development":
+        uvicorn.run(
+            "app.main:app",
+            host=settings.SERVER_HOST,
+            port=settings.SERVER_PORT,
+            reload=True,
+            log_level="info"
+        )
+    else:
+        from app.core.server import run_production
+
+        run_production("app.main:app")
@@ -0,0 +1,55 @@
+"""
+Empacota no build os recursos que a aplicação usa em runtime.
+
+- Lista de stopwords do NLTK (gravada em settings.STOPWORDS_PATH)
+- Modelo spaCy (settings.SPACY_MODEL), instalado se ainda não estiver
+
+Deve rodar no build da imagem (com rede). Em runtime a aplicação apenas
+lê esses arquivos e nunca acessa a rede.
+
+Uso (a partir de backend/):
+    python scripts/prepare_assets.py
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+
+
+def prepare_stopwords() -> None:
+    import nltk
+    from nltk.corpus import stopwords
+
+    with tempfile.TemporaryDirectory() as download_dir:
+        nltk.download("stopwords", download_dir=download_dir, quiet=True)
+        nltk.data.path.insert(0, download_dir)
+        words = sorted(set(stopwords.words("portuguese")))
+
+    os.makedirs(os.path.dirname(settings.STOPWORDS_PATH), exist_ok=True)
+    with open(settings.STOPWORDS_PATH, "w", encoding="utf-8") as f:
+        f.write("\n".join(words) + "\n")
+
+    print(f"{len(words)} stopwords gravadas em {settings.STOPWORDS_PATH}")
+
+
+def prepare_spacy_model() -> None:
+    import spacy
+
+    try:
+        spacy.load(settings.SPACY_MODEL, exclude=settings.SPACY_EXCLUDE)
+    except OSError:
+        from spacy.cli import download
+
+        download(settings.SPACY_MODEL)
+        spacy.load(settings.SPACY_MODEL, exclude=settings.SPACY_EXCLUDE)
+
+    print(f"Modelo spaCy disponível: {settings.SPACY_MODEL}")
+
+
+if __name__ == "__main__":
+    prepare_stopwords()
+    prepare_spacy_model()
@@ -0,0 +1,110 @@
+"""
+Treina e exporta o classificador local (n-gramas com hashing + pesos lineares).
+
+O arquivo de entrada é JSONL, uma linha por email:
+    {"text": "corpo do email", "label": "Produtivo"}
+    {"text": "...", "label": "Improdutivo"}
+
+Os textos passam pelo mesmo caminho do serviço (redução de conteúdo,
+orçamento de tokens e `preprocess_text` em lote), a menos que
+--preprocessed seja usado. O modelo é salvo em .npz no caminho indicado
+(padrão: settings.LOCAL_CLASSIFIER_PATH).
+
+Uso (a partir de backend/):
+    python scripts/train_classifier.py --data emails.jsonl
+    python scripts/train_classifier.py --data emails.jsonl --test-split 0.2 --out model.npz
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.local_classifier import LABELS, train
+
+
+def load_dataset(path: str):
+    texts, labels = [], []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if row["label"] not in LABELS:
+                raise ValueError(f"Linha {line_number}: label inválido '{row['label']}'")
+            texts.append(row["text"])
+            labels.append(row["label"])
+    return texts, labels
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", required=True, help="Arquivo JSONL com text/label")
+    parser.add_argument("--out", default=settings.LOCAL_CLASSIFIER_PATH, help="Caminho do .npz exportado")
+    parser.add_argument("--preprocessed", action="store_true", help="Textos já passaram por preprocess_text")
+    parser.add_argument("--n-features", type=int, default=2 ** 18)
+    parser.add_argument("--ngram-max", type=int, default=2)
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--learning-rate", type=float, default=0.5)
+    parser.add_argument("--l2", type=float, default=1e-4)
+    parser.add_argument("--test-split", type=float, default=0.0, help="Fração reservada para avaliação")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    texts, labels = load_dataset(args.data)
+    print(f"{len(texts)} emails carregados de {args.data}")
+
+    if not args.preprocessed:
+        from app.services.nlp import preprocess_texts
+        from app.services.reducer import reduce_and_budget_batch
+
+        # Sem isso o modelo veria histórico citado e assinaturas que o serviço remove
+        texts = preprocess_texts([text for text, *_ in reduce_and_budget_batch([(t, t) for t in texts])])
+
+    samples = list(zip(texts, labels))
+    random.Random(args.seed).shuffle(samples)
+    n_test = int(len(samples) * args.test_split)
+    test, train_samples = samples[:n_test], samples[n_test:]
+
+    start = time.perf_counter()
+    classifier = train(
+        [text for text, _ in train_samples],
+        [label for _, label in train_samples],
+        n_features=args.n_features,
+        ngram_max=args.ngram_max,
+        epochs=args.epochs,
+        learning_rate=args.learning_rate,
+        l2=args.l2,
+    )
+    print(f"Treinado em {time.perf_counter() - start:.2f}s")
+
+    if test:
+        start = time.perf_counter()
+        predictions = [classifier.classify(text) for text, _ in test]
+        elapsed = time.perf_counter() - start
+        accuracy = sum(p["classification"] == label for p, (_, label) in zip(predictions, test)) / len(test)
+        confident = [
+            p["classification"] == label
+            for p, (_, label) in zip(predictions, test)
+            if p["confidence"] >= settings.LOCAL_CLASSIFIER_THRESHOLD
+        ]
+        print(f"Acurácia: {accuracy:.3f} ({len(test)} emails de teste)")
+        print(
+            f"Acima do limiar {settings.LOCAL_CLASSIFIER_THRESHOLD}: "
+            f"{len(confident)}/{len(test)} emails, acurácia "
+            f"{(sum(confident) / len(confident)) if confident else 0:.3f}"
+        )
+        print(f"Tempo médio de classificação: {elapsed * 1e6 / len(test):.1f}µs")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    classifier.save(args.out)
+    print(f"Modelo exportado para {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import sqlite3
+import time
+
+from app.services.cache import ResultCache
+
+
+def _disk_keys(path):
+    with sqlite3.connect(path) as db:
+        return {key for key, in db.execute("SELECT key FROM results")}
+
+
+def test_expired_rows_are_pruned_from_disk(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ResultCache(max_entries=10, ttl=60, db_path=path, prune_interval=0)
+
+    cache.set("antigo", {"classification": "Produtivo"})
+    cache._db.execute("UPDATE results SET created_at = ? WHERE key = 'antigo'", (time.time() - 120,))
+    cache._db.commit()
+
+    cache.set("novo", {"classification": "Improdutivo"})
+
+    assert _disk_keys(path) == {"novo"}
+    assert cache.stats()["pruned"] == 1
+
+
+def test_disk_hit_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ResultCache(max_entries=10, ttl=60, db_path=path).set("chave", {"classification": "Produtivo"})
+
+    cache = ResultCache(max_entries=10, ttl=60, db_path=path)
+
+    assert cache.get("chave") == {"classification": "Produtivo"}
+    assert cache.stats()["disk_hits"] == 1
@@ -0,0 +1,18 @@
+import asyncio
+import threading
+
+from app.core.executor import run_blocking, run_cpu_thread
+
+
+def _thread_name():
+    return threading.current_thread().name
+
+
+def test_blocking_io_does_not_use_cpu_workers():
+    async def scenario():
+        return await run_blocking(_thread_name), await run_cpu_thread(_thread_name)
+
+    io_thread, cpu_thread = asyncio.run(scenario())
+
+    assert io_thread.startswith("io")
+    assert cpu_thread.startswith("cpu")
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services import jobs as jobs_module
+from app.services.jobs import InvalidCallbackError, JobQueue, validate_callback_url
+
+
+@pytest.mark.parametrize("url", [
+    "ftp://example.com/hook",
+    "file:///etc/passwd",
+    "http://127.0.0.1:8000/admin",
+    "http://localhost/hook",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://10.0.0.5/hook",
+    "http://[::1]/hook",
+    "http://example.com:99999/hook",
+])
+def test_callback_to_internal_or_invalid_url_is_rejected(url):
+    with pytest.raises(InvalidCallbackError):
+        validate_callback_url(url)
+
+
+def test_public_ip_callback_is_accepted():
+    validate_callback_url("https://93.184.216.34/webhooks/email")
+
+
+def test_allowlist_restricts_hosts(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_CALLBACK_ALLOWED_HOSTS", [".cliente.example.com"])
+
+    validate_callback_url("https://hooks.cliente.example.com/email")
+    with pytest.raises(InvalidCallbackError):
+        validate_callback_url("https://outro.example.com/email")
+
+
+def test_recover_removes_file_of_job_out_of_attempts(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    path = tmp_path / "upload.pdf"
+    path.write_bytes(b"%PDF")
+
+    queue.enqueue("file", {"path": str(path), "filename": "upload.pdf"})
+    job = queue.claim()
+    time.sleep(0.01)
+
+    assert queue.recover(stale_after=0, max_attempts=1) == 0
+    assert queue.get(job["id"])["status"] == "failed"
+    assert not os.path.exists(path)
+
+
+def test_metrics_read_cached_job_counts(monkeypatch, tmp_path):
+    from app.core.metrics import render_metrics
+
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(queue, "counts", lambda: pytest.fail("/metrics não deve consultar o SQLite"))
+    monkeypatch.setattr(jobs_module, "_queue", queue)
+    monkeypatch.setattr(jobs_module, "_counts", {"queued": 2})
+
+    assert 'jobs{status="queued"} 2' in render_metrics()
+
+
+def test_pinned_request_keeps_host_header_and_sni():
+    url, headers, extensions = jobs_module._pinned_request("https://hooks.example.com:8443/a?b=1", "2606:2800::1")
+
+    assert url == "https://[2606:2800::1]:8443/a?b=1"
+    assert headers == {"Host": "hooks.example.com:8443"}
+    assert extensions == {"sni_hostname": "hooks.example.com"}
+
+
+def test_callback_connects_to_the_validated_address(monkeypatch):
+    received = []
+
+    async def handle(reader, writer):
+        head = await reader.readuntil(b"\r\n\r\n")
+        received.append(head.decode("latin-1"))
+        writer.write(b"HTTP/1.1 302 Found\r\nLocation: http://169.254.169.254/\r\nContent-Length: 0\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+    async def scenario():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        # O DNS de "rebind.example" agora aponta para outro lugar; vale o IP validado antes
+        monkeypatch.setattr(jobs_module, "validate_callback_url", lambda url: "127.0.0.1")
+        job = {"id": "1", "status": "done", "result": None, "error": None,
+               "callback_url": f"http://rebind.example:{port}/hook"}
+        await jobs_module._send_callback(job)
+        server.close()
+
+    asyncio.run(scenario())
+
+    assert len(received) == 1
+    assert f"\r\nhost: rebind.example:" in received[0].lower()
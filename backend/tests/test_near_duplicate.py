@@ -0,0 +1,39 @@
+import sqlite3
+import threading
+
+from app.services.near_duplicate import IndexedResult, NearDuplicateIndex, minhash
+
+
+def _entry():
+    return IndexedResult("ctx", "Produtivo", 0.9, None, None)
+
+
+def test_evicted_entries_are_removed_from_disk(tmp_path):
+    path = str(tmp_path / "near.db")
+    index = NearDuplicateIndex(max_entries=2, threshold=0.9, bands=8, db_path=path)
+    signatures = [minhash(f"pedido numero {n} atraso entrega cliente") for n in range(3)]
+
+    for signature in signatures:
+        index.add(signature, _entry())
+
+    with sqlite3.connect(path) as db:
+        stored = {signature for signature, in db.execute("SELECT signature FROM near_duplicates")}
+
+    assert stored == set(signatures[1:])
+    assert index.stats()["evictions"] == 1
+
+
+def test_lookup_does_not_wait_for_disk_write(tmp_path):
+    index = NearDuplicateIndex(max_entries=10, threshold=0.9, bands=8, db_path=str(tmp_path / "near.db"))
+    signature = minhash("pedido numero 1 atraso entrega cliente")
+
+    # Simula um commit lento: a gravação fica presa no lock do disco
+    with index._db_lock:
+        writer = threading.Thread(target=index.add, args=(signature, _entry()))
+        writer.start()
+        writer.join(0.1)
+
+        assert writer.is_alive()
+        assert index.lookup(signature, "ctx") is not None
+
+    writer.join()
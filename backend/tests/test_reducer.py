@@ -0,0 +1,111 @@
+from app.services.reducer import reduce_content
+
+REQUEST = (
+    "Could you send me the signed contract for the Q3 renewal by Friday? Legal needs the "
+    "countersigned copy before they can release the purchase order, and finance has asked "
+    "for the updated invoice schedule as well."
+)
+
+
+def test_thanks_before_request_keeps_request():
+    text = f"Hi Ana, hope you are well.\nThanks!\n{REQUEST}"
+
+    reduced, meta = reduce_content(text)
+
+    assert REQUEST in reduced
+    assert meta["signature"] == 0
+
+
+def test_thanks_paragraph_before_long_lines_keeps_them():
+    text = f"Hi Ana, hope you are well.\n\nObrigado!\n{REQUEST}"
+
+    reduced, _ = reduce_content(text)
+
+    assert REQUEST in reduced
+
+
+def test_valediction_removes_short_signature_lines():
+    text = (
+        "Olá Maria,\n\nPodemos marcar a reunião para quinta às 15h?\n\n"
+        "Atenciosamente,\nJoão Silva\nGerente de Projetos | ACME\n+55 11 99999-0000"
+    )
+
+    reduced, meta = reduce_content(text)
+
+    assert reduced.endswith("Atenciosamente,")
+    assert "99999" not in reduced
+    assert meta["signature"] > 0
+
+
+def test_quoted_history_is_cut():
+    text = (
+        "Podemos marcar a reunião para quinta?\n\n"
+        "Em qua., 14 de out. de 2026 às 10:02, Maria <maria@x.com> escreveu:\n> mensagem antiga\n"
+    )
+
+    reduced, meta = reduce_content(text)
+
+    assert reduced == "Podemos marcar a reunião para quinta?"
+    assert meta["quoted"] > 0
+
+
+BODY = "Olá equipe,\n\nSegue a planilha com os números do trimestre para revisão interna antes da reunião.\n\n"
+
+
+def test_business_paragraph_mentioning_confidentiality_is_kept():
+    for paragraph in (
+        "Por favor, trate os números como confidenciais até a reunião de sexta, quando apresentaremos ao conselho.",
+        "Essas são informações privilegiadas sobre a negociação; revise o valor de R$ 45.000 antes de assinar.",
+    ):
+        reduced, meta = reduce_content(BODY + paragraph + "\n\nAbs,\nCarla")
+
+        assert paragraph in reduced
+        assert meta["disclaimer"] == 0
+
+
+def test_legal_footer_at_the_end_is_removed():
+    footer = (
+        "AVISO LEGAL: Esta mensagem e seus anexos são confidenciais e destinados "
+        "exclusivamente ao destinatário.\n\nAntes de imprimir, pense no meio ambiente."
+    )
+
+    reduced, meta = reduce_content(BODY + footer)
+
+    assert "AVISO LEGAL" not in reduced
+    assert "imprimir" not in reduced
+    assert meta["disclaimer"] > 0
+
+
+def test_body_line_mentioning_escreveu_is_not_a_reply_header():
+    text = (
+        "Oi Ana,\n\n"
+        "Em relação ao que o cliente escreveu: precisamos entregar o projeto até sexta.\n"
+        "Consegue confirmar o prazo com a equipe de design?"
+    )
+
+    reduced, meta = reduce_content(text)
+
+    assert reduced == text
+    assert meta["quoted"] == 0
+
+
+def test_thanks_before_short_request_keeps_request():
+    for request in ("Poderia também enviar o orçamento?", "Me liga no 11 99999-0000 urgente"):
+        text = f"Oi Ana,\n\nSegue em anexo a planilha revisada com os valores do trimestre.\n\nObrigado!\n{request}"
+
+        reduced, meta = reduce_content(text)
+
+        assert request in reduced
+        assert meta["signature"] == 0
+
+
+def test_thanks_before_name_and_phone_removes_signature():
+    text = (
+        "Oi Ana,\n\nSegue em anexo a planilha revisada com os valores do trimestre.\n\n"
+        "Obrigado!\nCarlos Lima\nFinanceiro | ACME\n11 99999-0000"
+    )
+
+    reduced, meta = reduce_content(text)
+
+    assert reduced.endswith("Obrigado!")
+    assert meta["signature"] > 0
@@ -0,0 +1,216 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+import openai
+import pytest
+
+from app.core.config import settings
+from app.services.resilience import CircuitBreaker, CircuitOpenError, call_with_resilience
+from benchmarks.stub_llm import StubConfig, handle
+
+
+def _open_breaker(reset_timeout: float = 0.05) -> CircuitBreaker:
+    breaker = CircuitBreaker("stub", failure_threshold=1, reset_timeout=reset_timeout)
+    breaker.record_failure()
+    return breaker
+
+
+def test_cancelled_probe_releases_half_open_slot():
+    async def scenario():
+        breaker = _open_breaker()
+        await asyncio.sleep(0.06)
+        assert breaker.state == "half_open"
+
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+
+        probe = asyncio.create_task(call_with_resilience(slow, breaker, deadline=0, retries=0, hedge_delay=0))
+        await started.wait()
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        async def ok():
+            return "ok"
+
+        assert await call_with_resilience(ok, breaker, deadline=0, retries=0, hedge_delay=0) == "ok"
+        assert breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_open_breaker_short_circuits():
+    async def scenario():
+        breaker = _open_breaker(reset_timeout=60)
+
+        async def ok():
+            return "ok"
+
+        with pytest.raises(CircuitOpenError):
+            await call_with_resilience(ok, breaker, deadline=0, retries=0, hedge_delay=0)
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RETRY_BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(settings, "LLM_RETRY_BACKOFF_MAX", 0.001)
+
+
+@asynccontextmanager
+async def _stub_llm(timeout: float = 5.0, **options):
+    """Sobe o stub LLM em uma porta livre e entrega (config, factory da chamada)"""
+    config = StubConfig(**{
+        "latency": 0.0,
+        "jitter": 0.0,
+        "slow_rate": 0.0,
+        "slow_latency": 0.0,
+        "error_rate": 0.0,
+        "chunk_delay": 0.0,
+        **options,
+    })
+    server = await asyncio.start_server(lambda r, w: handle(config, r, w), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    client = openai.AsyncOpenAI(
+        base_url=f"http://127.0.0.1:{port}/v1",
+        api_key="stub",
+        max_retries=0,
+        timeout=httpx.Timeout(timeout),
+    )
+
+    def factory():
+        return client.chat.completions.create(model="stub", messages=[{"role": "user", "content": "oi"}])
+
+    try:
+        yield config, factory
+    finally:
+        await client.close()
+        server.close()
+
+
+def _breaker(failure_threshold: int = 5, reset_timeout: float = 60) -> CircuitBreaker:
+    return CircuitBreaker("stub", failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+
+
+def test_retries_transient_errors_until_success():
+    async def scenario():
+        async with _stub_llm(error_rate=1.0) as (config, factory):
+            def on_retry(attempt, error):
+                assert isinstance(error, openai.InternalServerError)
+                if attempt == 2:
+                    config.error_rate = 0.0
+
+            result = await call_with_resilience(
+                factory, _breaker(), deadline=5, retries=3, hedge_delay=0, on_retry=on_retry
+            )
+
+            assert result.choices[0].message.content
+            assert config.requests == 3
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("status, error, requests", [
+    (429, openai.RateLimitError, 3),
+    (503, openai.InternalServerError, 3),
+    (400, openai.BadRequestError, 1),
+])
+def test_only_429_and_5xx_are_retried(status, error, requests):
+    async def scenario():
+        async with _stub_llm(error_rate=1.0, error_status=status) as (config, factory):
+            breaker = _breaker()
+            with pytest.raises(error):
+                await call_with_resilience(factory, breaker, deadline=5, retries=2, hedge_delay=0)
+
+            assert config.requests == requests
+            # Erro do cliente não conta contra a saúde do provedor
+            assert breaker.failures == (0 if status == 400 else requests)
+
+    asyncio.run(scenario())
+
+
+def test_timeouts_are_retried():
+    async def scenario():
+        async with _stub_llm(timeout=0.05, latency=1.0) as (config, factory):
+            with pytest.raises(openai.APITimeoutError):
+                await call_with_resilience(factory, _breaker(), deadline=5, retries=2, hedge_delay=0)
+
+            assert config.requests == 3
+
+    asyncio.run(scenario())
+
+
+def test_deadline_caps_total_time_across_retries():
+    async def scenario():
+        async with _stub_llm(latency=2.0) as (config, factory):
+            start = time.monotonic()
+            with pytest.raises(asyncio.TimeoutError):
+                await call_with_resilience(factory, _breaker(), deadline=0.2, retries=5, hedge_delay=0)
+
+            assert time.monotonic() - start < 1.0
+            assert config.requests == 1
+
+    asyncio.run(scenario())
+
+
+def test_breaker_opens_probes_once_and_closes():
+    async def scenario():
+        async with _stub_llm(error_rate=1.0) as (config, factory):
+            breaker = _breaker(failure_threshold=2, reset_timeout=0.1)
+
+            for _ in range(2):
+                with pytest.raises(openai.InternalServerError):
+                    await call_with_resilience(factory, breaker, deadline=5, retries=0, hedge_delay=0)
+            assert breaker.state == "open"
+
+            with pytest.raises(CircuitOpenError):
+                await call_with_resilience(factory, breaker, deadline=5, retries=0, hedge_delay=0)
+            assert config.requests == 2
+
+            await asyncio.sleep(0.1)
+            assert breaker.state == "half_open"
+            config.error_rate = 0.0
+            config.latency = 0.05
+
+            # Só uma chamada de teste passa; as concorrentes falham na hora
+            probe, other = await asyncio.gather(
+                call_with_resilience(factory, breaker, deadline=5, retries=0, hedge_delay=0),
+                call_with_resilience(factory, breaker, deadline=5, retries=0, hedge_delay=0),
+                return_exceptions=True,
+            )
+
+            assert probe.choices[0].message.content
+            assert isinstance(other, CircuitOpenError)
+            assert config.requests == 3
+            assert breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_hedge_returns_first_success():
+    async def scenario():
+        async with _stub_llm(slow_rate=1.0, slow_latency=2.0) as (config, factory):
+            hedges = []
+
+            def on_hedge():
+                # A cópia disparada pelo hedge responde na hora
+                hedges.append(time.monotonic())
+                config.slow_rate = 0.0
+
+            start = time.monotonic()
+            result = await call_with_resilience(
+                factory, _breaker(), deadline=5, retries=0, hedge_delay=0.05, on_hedge=on_hedge
+            )
+
+            assert result.choices[0].message.content
+            assert len(hedges) == 1
+            assert time.monotonic() - start < 1.0
+            assert config.requests == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,21 @@
+from app.services.sender import COMPANY, PERSON, identify_sender
+
+
+def test_name_after_da_stays_a_person():
+    identity = identify_sender(
+        "Maria Silva <maria.silva@gmail.com>",
+        "Bom dia, segue a proposta da Maria Silva, revisada com os novos valores.",
+    )
+
+    assert identity.kind == PERSON
+
+
+def test_company_marker_after_name_marks_a_company():
+    for message in (
+        "Escrevo em nome da Nova Era Ltda, sobre o contrato de manutenção.",
+        "O pagamento será feito pela empresa Nova Era até sexta.",
+    ):
+        identity = identify_sender("Nova Era <financeiro@gmail.com>", message)
+
+        assert identity.kind == COMPANY
+        assert identity.confirmed
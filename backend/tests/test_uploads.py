@@ -0,0 +1,78 @@
+import asyncio
+import tempfile
+
+import httpx
+
+from app.core.config import settings
+from app.main import app
+from app.services.uploads import cpu_source
+
+CHUNK = b"x" * 16 * 1024
+PREAMBLE = (
+    b"--limite\r\n"
+    b'Content-Disposition: form-data; name="file"; filename="email.txt"\r\n'
+    b"Content-Type: text/plain\r\n\r\n"
+)
+
+
+def _post_chunked(path: str, chunks: int, sent: list) -> httpx.Response:
+    async def body():
+        yield PREAMBLE
+        for _ in range(chunks):
+            sent.append(len(CHUNK))
+            yield CHUNK
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(
+                path,
+                content=body(),
+                headers={"content-type": "multipart/form-data; boundary=limite"},
+            )
+
+    return asyncio.run(scenario())
+
+
+def test_chunked_upload_without_content_length_is_cut_at_limit(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_FILE_SIZE", 16 * 1024)
+    sent = []
+
+    response = _post_chunked("/api/v1/email/classify-file", chunks=64, sent=sent)
+
+    assert response.status_code == 413
+    # Limite (16 KiB) + folga do multipart (64 KiB): a leitura para logo depois
+    assert sum(sent) <= 16 * 1024 + 64 * 1024 + 2 * len(CHUNK)
+
+
+def test_content_length_above_limit_is_rejected_before_reading(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_FILE_SIZE", 16 * 1024)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(
+                "/api/v1/email/classify-file",
+                content=PREAMBLE + b"x" * (200 * 1024),
+                headers={"content-type": "multipart/form-data; boundary=limite"},
+            )
+
+    assert asyncio.run(scenario()).status_code == 413
+
+
+def test_cpu_source_is_picklable_for_the_process_pool(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "CPU_EXECUTOR", "process")
+    monkeypatch.setattr(settings, "UPLOAD_SPOOL_THRESHOLD", 16)
+
+    small = tempfile.SpooledTemporaryFile(max_size=16)
+    small.write(b"pequeno")
+    assert cpu_source(small) == b"pequeno"
+
+    named = tmp_path / "email.eml"
+    named.write_bytes(b"x" * 32)
+    with open(named, "rb") as f:
+        assert cpu_source(f) == str(named)
+
+    large = tempfile.SpooledTemporaryFile(max_size=16)
+    large.write(b"x" * 32)
+    assert cpu_source(large) is None
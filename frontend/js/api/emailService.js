@@ -84,3 +84,96 @@ export async function classifyEmailFile(file) {
         throw error;
     }
 }
+
+/**
+ * Classifica um email e recebe a resposta sugerida em streaming (SSE)
+ * @param {string} emailText - Texto do email a ser classificado
+ * @param {string} sender - Remetente do email
+ * @param {string} subject - Assunto do email
+ * @param {Object} handlers - Callbacks dos eventos
+ * @param {Function} handlers.onClassification - Recebe classificação e confiança
+ * @param {Function} handlers.onToken - Recebe cada trecho da resposta
+ * @returns {Promise<Object>} Resultado final (evento "done")
+ */
+export async function classifyEmailStream(emailText, sender, subject, handlers = {}) {
+    const payload = {
+        sender: sender,
+        subject: subject,
+        message: emailText,
+    };
+
+    console.log("📤 classifyEmailStream - URL:", `${BACKEND_URL}/api/v1/email/classify-stream`);
+
+    const response = await fetch(`${BACKEND_URL}/api/v1/email/classify-stream`, {
+        method: "POST",
+        headers: {
+            "Content-Type": "application/json",
+            Accept: "text/event-stream",
+        },
+        body: JSON.stringify(payload),
+    });
+
+    if (!response.ok || !response.body) {
+        throw new Error(`Erro ${response.status}: ${response.statusText}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let result = null;
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) {
+            break;
+        }
+
+        buffer += decoder.decode(value, { stream: true });
+
+        let separatorIndex;
+        while ((separatorIndex = buffer.indexOf("\n\n")) !== -1) {
+            const rawEvent = buffer.slice(0, separatorIndex);
+            buffer = buffer.slice(separatorIndex + 2);
+
+            const { event, data } = parseSseEvent(rawEvent);
+            if (!event) {
+                continue;
+            }
+
+            if (event === "classification" && handlers.onClassification) {
+                handlers.onClassification(data);
+            } else if (event === "token" && handlers.onToken) {
+                handlers.onToken(data.text);
+            } else if (event === "done") {
+                result = data;
+            } else if (event === "error") {
+                throw new Error(data.detail || "Erro no streaming");
+            }
+        }
+    }
+
+    if (!result) {
+        throw new Error("Stream encerrado sem resultado");
+    }
+
+    console.log("📥 classifyEmailStream - Resultado final:", result);
+    return result;
+}
+
+function parseSseEvent(rawEvent) {
+    let event = null;
+    const dataLines = [];
+
+    for (const line of rawEvent.split("\n")) {
+        if (line.startsWith("event:")) {
+            event = line.slice(6).trim();
+        } else if (line.startsWith("data:")) {
+            dataLines.push(line.slice(5).trim());
+        }
+    }
+
+    return {
+        event,
+        data: dataLines.length ? JSON.parse(dataLines.join("\n")) : {},
+    };
+}
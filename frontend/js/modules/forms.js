@@ -2,11 +2,16 @@
  * Handlers para envio de emails e arquivos
  */
 
-import { classifyEmail, classifyEmailFile } from "../api/emailService.js";
+import { classifyEmailStream, classifyEmailFile } from "../api/emailService.js";
 import { getQuillContent, clearQuill } from "./quillConfig.js";
 import { clearFileInput, getSelectedFile } from "./fileUpload.js";
 import { showError, setButtonLoading } from "../utils/ui.js";
-import { showResult, showLoadingSpinner } from "./results.js";
+import {
+    showResult,
+    showLoadingSpinner,
+    showStreamingResult,
+    appendResponseChunk,
+} from "./results.js";
 import { toggleTab } from "./tabs.js";
 import { saveToHistory } from "./history.js";
 
@@ -34,10 +39,14 @@ export async function handleSendEmail() {
 
     console.log("📤 Enviando para o backend...");
     try {
-        const result = await classifyEmail(
+        const result = await classifyEmailStream(
             emailText,
             fromInput || null,
             subjectInput || null,
+            {
+                onClassification: showStreamingResult,
+                onToken: appendResponseChunk,
+            },
         );
         
         console.log("✅ Resposta recebida do backend:", result);
@@ -72,6 +72,12 @@ export function setResponseQuillContent(text) {
     }
 }
 
+export function appendResponseQuillContent(text) {
+    if (responseQuill) {
+        responseQuill.insertText(responseQuill.getLength() - 1, text);
+    }
+}
+
 export function clearQuill() {
     quill.setContents([]);
     document.getElementById("char-count").textContent = "0 caracteres";
@@ -5,6 +5,7 @@
 import {
     initializeResponseQuill,
     setResponseQuillContent,
+    appendResponseQuillContent,
 } from "./quillConfig.js";
 
 let responseQuillInitialized = false;
@@ -104,20 +105,7 @@ ${JSON.stringify(data, null, 2)}
     }
 
     if (data.suggested_response) {
-        if (!responseQuillInitialized) {
-            initializeResponseQuill();
-            responseQuillInitialized = true;
-        }
-
-        setResponseQuillContent(data.suggested_response);
-
-        responseEditorSection.classList.remove("hidden");
-        resultActions.classList.add("hidden");
-
-        const copyBtn = document.getElementById("copy-response-btn");
-        if (copyBtn) {
-            copyBtn.onclick = copyResponseToClipboard;
-        }
+        showResponseEditor(data.suggested_response);
     } else {
         responseEditorSection.classList.add("hidden");
         resultActions.classList.remove("hidden");
@@ -127,6 +115,41 @@ ${JSON.stringify(data, null, 2)}
     resultContainer.scrollIntoView({ behavior: "smooth", block: "start" });
 }
 
+function showResponseEditor(text) {
+    const responseEditorSection = document.getElementById(
+        "response-editor-section",
+    );
+    const resultActions = document.getElementById("result-actions");
+
+    if (!responseQuillInitialized) {
+        initializeResponseQuill();
+        responseQuillInitialized = true;
+    }
+
+    setResponseQuillContent(text);
+
+    responseEditorSection.classList.remove("hidden");
+    resultActions.classList.add("hidden");
+
+    const copyBtn = document.getElementById("copy-response-btn");
+    if (copyBtn) {
+        copyBtn.onclick = copyResponseToClipboard;
+    }
+}
+
+/**
+ * Exibe a classificação recebida no streaming e prepara o editor
+ * para receber a resposta sugerida progressivamente
+ */
+export function showStreamingResult(data) {
+    showResult(data);
+    showResponseEditor("");
+}
+
+export function appendResponseChunk(text) {
+    appendResponseQuillContent(text);
+}
+
 export function clearResult() {
     const loadingSpinner = document.getElementById("loading-spinner");
     const resultContainer = document.getElementById("result-container");